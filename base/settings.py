@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # 3rd party apps
     "rest_framework",
     # project apps
@@ -50,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "train_station.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -143,17 +145,73 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "train_station.throttling.GCRAThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/day", "user": "30/day"},
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.ClaimsJWTAuthentication",
     ),
 }
 
+# shared by all workers through Redis when REDIS_URL is set
+THROTTLING = {
+    "BACKEND": (
+        "train_station.throttling.RedisBackend"
+        if os.getenv("REDIS_URL")
+        else "train_station.throttling.LocalBackend"
+    ),
+    "REDIS_URL": os.getenv("REDIS_URL"),
+    "RATES": {
+        "anon": "10/day",
+        "browse": "30/day",
+        "write": "30/day",
+        "booking": "30/day",
+    },
+}
+
+RESPONSE_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+    "AVAILABILITY_TIMEOUT": 30,
+}
+
+METRICS = {
+    "SAMPLE_RATE": 1.0,
+    "SLOW_REQUEST_MS": 1000,
+}
+
+KEYSET_PAGINATION = {
+    "PAGE_SIZE": 20,
+    "MAX_PAGE_SIZE": 100,
+}
+
+GEOCODING = {
+    "PROVIDERS": [
+        "train_station.geocoding.GazetteerProvider",
+        "train_station.geocoding.NominatimProvider",
+    ],
+    "GAZETTEER_PATH": BASE_DIR / "train_station" / "data" / "gazetteer.csv",
+    "CACHE_SIZE": 4096,
+}
+
+JOURNEY_PLANNER = {
+    "MIN_TRANSFER_MINUTES": 10,
+    "MAX_TRANSFERS": 5,
+    # seconds before a worker rebuilds its network to pick up
+    # changes made by other processes, 0 disables rebuilding
+    "REBUILD_INTERVAL": 300,
+}
+
+STATION_AUTOCOMPLETE = {
+    "REBUILD_INTERVAL": 300,
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
+}
+
+TOKEN_AUTHENTICATION = {
+    "STATE_TIMEOUT": 30,
 }
@@ -0,0 +1,55 @@
+"""
+Production settings of train_station, on top of `base.settings`.
+
+Selected with `DJANGO_SETTINGS_MODULE=base.settings_production`, which
+`gunicorn.conf.py` sets by default. Database connections come from a
+psycopg 3 pool per worker process, or persist per thread for
+`CONN_MAX_AGE` seconds with `DB_POOL=false` (e.g. behind PgBouncer).
+"""
+
+import os
+
+from base.settings import *  # noqa: F401,F403
+from base.settings import DATABASES, METRICS
+
+
+def env_flag(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    host.strip() for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host.strip()
+]
+
+# a pool per worker: keep workers * DB_POOL_MAX_SIZE below max_connections
+if env_flag("DB_POOL", True):
+    connection_settings = {
+        # pooled connections go back to the pool at the end of each request
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+                "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+                # seconds a request waits for a free connection
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            }
+        },
+    }
+else:
+    connection_settings = {"CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 600))}
+
+DATABASES = {
+    **DATABASES,
+    "default": {
+        **DATABASES["default"],
+        **connection_settings,
+        "CONN_HEALTH_CHECKS": True,
+    },
+}
+
+METRICS = {
+    **METRICS,
+    "SAMPLE_RATE": float(os.getenv("METRICS_SAMPLE_RATE", 0.1)),
+}
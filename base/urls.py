@@ -18,10 +18,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from train_station.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path(
         "api/train-stations/", include("train_station.urls", namespace="train_station")
     ),
     path("api/users/", include("user.urls", namespace="user")),
+    path("internal/metrics/", metrics_view, name="metrics"),
 ]
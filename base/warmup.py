@@ -0,0 +1,35 @@
+import logging
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up_database(timeout=30.0):
+    """
+    Connects every configured database before a worker takes traffic.
+    A pooled database waits until its pool holds `min_size` connections
+    and fails with `PoolTimeout` after `timeout` seconds, others open the
+    calling thread's persistent connection. Returns the warmed aliases.
+    """
+    warmed = []
+    for connection in connections.all():
+        start = time.perf_counter()
+        # the postgresql backend's pool, None when pooling is off
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            pool.wait(timeout=timeout)
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if pool is not None:
+            # hands the connection back to the pool
+            connection.close()
+        logger.info(
+            "Database %s ready in %.1f ms",
+            connection.alias,
+            (time.perf_counter() - start) * 1000,
+        )
+        warmed.append(connection.alias)
+    return warmed
@@ -11,6 +11,6 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "train_station.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base.settings")
 
 application = get_wsgi_application()
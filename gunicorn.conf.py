@@ -0,0 +1,39 @@
+"""
+Gunicorn configuration of the production profile, serving the ASGI
+application through uvicorn workers:
+
+    gunicorn -c gunicorn.conf.py
+
+Environment: WEB_CONCURRENCY (workers), GUNICORN_BIND, GUNICORN_TIMEOUT.
+"""
+
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base.settings_production")
+
+wsgi_app = "base.asgi:application"
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# each worker's event loop overlaps requests waiting on the database,
+# so one worker per core keeps the CPUs busy without oversubscribing
+workers = int(os.getenv("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count())))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+# recycle workers now and then, staggered so they do not restart together
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    """Fills the worker's connection pool before it accepts requests"""
+    from base.warmup import warm_up_database
+
+    warm_up_database()
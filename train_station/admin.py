@@ -1,7 +1,9 @@
 from django.contrib import admin
 
+from train_station.exports import CHUNK_SIZE, export_response
 from train_station.models import (
     Crew,
+    GeocodedCity,
     Station,
     Route,
     TrainType,
@@ -9,13 +11,62 @@ from train_station.models import (
     Journey,
     Order,
     Ticket,
+    TableVersion,
+    RouteDailyAvailability,
 )
 
 admin.site.register(Crew)
+admin.site.register(GeocodedCity)
 admin.site.register(Station)
 admin.site.register(Route)
 admin.site.register(TrainType)
 admin.site.register(Train)
 admin.site.register(Journey)
-admin.site.register(Order)
 admin.site.register(Ticket)
+admin.site.register(TableVersion)
+admin.site.register(RouteDailyAvailability)
+
+
+ORDER_EXPORT_FIELDS = {
+    "order": "order_id",
+    "created_at": "order__created_at",
+    "user": "order__user__email",
+    "ticket": "id",
+    "journey": "journey_id",
+    "source": "journey__route__source__name",
+    "destination": "journey__route__destination__name",
+    "departure_time": "journey__departure_time",
+    "cargo": "cargo",
+    "seat": "seat",
+}
+
+
+def export_orders(request, queryset, format):
+    """Streams one row per ticket of the `queryset` orders"""
+    rows = (
+        Ticket.objects.filter(order__in=queryset)
+        .order_by("order_id", "id")
+        .values_list(*ORDER_EXPORT_FIELDS.values())
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    return export_response(
+        request,
+        (dict(zip(ORDER_EXPORT_FIELDS, row)) for row in rows),
+        list(ORDER_EXPORT_FIELDS),
+        format,
+        "orders",
+    )
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "created_at")
+    actions = ("export_csv", "export_ndjson")
+
+    @admin.action(description="Export selected orders as CSV")
+    def export_csv(self, request, queryset):
+        return export_orders(request, queryset, "csv")
+
+    @admin.action(description="Export selected orders as JSON Lines")
+    def export_ndjson(self, request, queryset):
+        return export_orders(request, queryset, "ndjson")
@@ -0,0 +1,100 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from train_station.caching import HandlerMixin
+from train_station.metrics import measure_serializer
+from train_station.mixins import values_lookups, values_to_representation
+
+
+class AsyncReadView(View):
+    """
+    Serves one read `action` (`list`, `retrieve` or `seats`) of
+    `viewset_class` from an async view. The viewset's authentication,
+    permissions, throttles, filters, query plans, pagination, serializers
+    and response caches are reused; only the queries move to the async
+    ORM, so under ASGI a worker keeps serving other requests while one
+    waits on the database. Responses match the viewset's byte for byte.
+    """
+
+    viewset_class = None
+    action = None
+    http_method_names = ["get", "options"]
+
+    def get_viewset(self, request, kwargs):
+        viewset = self.viewset_class(
+            action_map={"get": self.action},
+            args=(),
+            kwargs=kwargs,
+            format_kwarg=None,
+            # the browsable API renders forms with synchronous queries
+            renderer_classes=(JSONRenderer,),
+        )
+        viewset.request = viewset.initialize_request(request)
+        viewset.headers = viewset.default_response_headers
+        return viewset
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request, kwargs)
+        request = viewset.request
+        handler = partial(getattr(self, self.action), viewset)
+        try:
+            await sync_to_async(viewset.initial)(request, *args, **kwargs)
+            if isinstance(viewset, HandlerMixin):
+                response = await viewset.acall_handler(handler, request)
+            else:
+                response = await handler(request)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        return viewset.finalize_response(request, response, *args, **kwargs)
+
+    @staticmethod
+    async def get_object(viewset):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        try:
+            instance = await queryset.aget(
+                **{viewset.lookup_field: viewset.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f"No {queryset.model._meta.object_name} matches the query.")
+        viewset.check_object_permissions(viewset.request, instance)
+        return instance
+
+    async def list(self, viewset, request):
+        serializer_class = viewset.get_serializer_class()
+        fast = hasattr(getattr(serializer_class, "Meta", None), "values")
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        if fast:
+            names, expressions = values_lookups(serializer_class)
+            queryset = queryset.values(*names, **expressions)
+
+        paginator = viewset.paginator
+        page = None
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, request, view=viewset)
+        rows = page if page is not None else [row async for row in queryset]
+
+        with measure_serializer():
+            if fast:
+                data = values_to_representation(serializer_class, rows)
+            else:
+                data = viewset.get_serializer(rows, many=True).data
+        if page is not None:
+            return viewset.get_paginated_response(data)
+        return Response(data)
+
+    async def retrieve(self, viewset, request):
+        instance = await self.get_object(viewset)
+        return Response(viewset.serialized(viewset.get_serializer(instance)))
+
+    async def seats(self, viewset, request):
+        context = viewset.get_seats_context()
+        journey = await self.get_object(viewset)
+        serializer = viewset.get_serializer(journey, context=context)
+        return Response(viewset.serialized(serializer))
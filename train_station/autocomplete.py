@@ -0,0 +1,179 @@
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Count
+
+DEFAULT_SETTINGS = {
+    # seconds before a worker rebuilds its index to pick up changes made
+    # by other processes, 0 keeps it until the process exits
+    "REBUILD_INTERVAL": 300,
+}
+
+WORD = re.compile(r"\w+")
+
+# letters NFKD does not decompose into a base letter and a mark
+TRANSLITERATION = str.maketrans(
+    {
+        "ł": "l",
+        "ø": "o",
+        "đ": "d",
+        "ð": "d",
+        "ħ": "h",
+        "ı": "i",
+        "ŧ": "t",
+        "þ": "th",
+        "æ": "ae",
+        "œ": "oe",
+        "ß": "ss",
+    }
+)
+
+
+def autocomplete_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "STATION_AUTOCOMPLETE", {})}
+
+
+def fold(text):
+    """
+    Search form of a name: accents stripped, case-folded, stroke letters
+    such as "ł" transliterated and punctuation turned into single spaces,
+    so "Lviv-Holovnyi" and "lviv holovnyí", "Łódź" and "lodz" compare equal
+    """
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(WORD.findall(stripped.casefold().translate(TRANSLITERATION)))
+
+
+def name_keys(name):
+    """The folded name from each of its words on, "a b c", "b c" and "c" """
+    words = fold(name).split(" ")
+    return {" ".join(words[start:]) for start in range(len(words)) if words[start]}
+
+
+class StationIndex:
+    """
+    In-memory autocomplete index over `Station` names: every key of
+    `name_keys` in one sorted list, so the stations matching a prefix are
+    a contiguous run found by bisection. Matches rank by the number of
+    routes from or to the station. Results are remembered until the next
+    change, as short prefixes come back on every keystroke. Built from one
+    query and kept current through model signals.
+    """
+
+    # results remembered before all are dropped
+    MAX_RESULTS = 4096
+
+    def __init__(self):
+        self.stations = {}
+        self.routes = {}
+        self.entries = []
+        self.results = {}
+        self.built_at = time.monotonic()
+        self.lock = threading.RLock()
+
+    @classmethod
+    def build(cls):
+        Station = apps.get_model("train_station", "Station")
+
+        index = cls()
+        for station_id, name, sources, destinations in Station.objects.annotate(
+            sources=Count("source_routes", distinct=True),
+            destinations=Count("destination_routes", distinct=True),
+        ).values_list("id", "name", "sources", "destinations"):
+            index.stations[station_id] = name
+            index.routes[station_id] = sources + destinations
+            index.entries.extend((key, station_id) for key in name_keys(name))
+        index.entries.sort()
+        return index
+
+    def update_station(self, station_id, name):
+        with self.lock:
+            self.remove_station(station_id)
+            self.results.clear()
+            self.stations[station_id] = name
+            self.routes.setdefault(station_id, 0)
+            for key in name_keys(name):
+                insort(self.entries, (key, station_id))
+
+    def remove_station(self, station_id):
+        with self.lock:
+            name = self.stations.pop(station_id, None)
+            if name is None:
+                return
+            self.results.clear()
+            for key in name_keys(name):
+                position = bisect_left(self.entries, (key, station_id))
+                del self.entries[position]
+
+    def count_route(self, source_id, destination_id, step=1):
+        with self.lock:
+            self.results.clear()
+            for station_id in (source_id, destination_id):
+                if station_id in self.routes:
+                    self.routes[station_id] = max(self.routes[station_id] + step, 0)
+
+    def search(self, query, limit):
+        """Up to `limit` `{id, name, routes}` matches of `query`, best first"""
+        prefix = fold(query)
+        if not prefix:
+            return []
+
+        with self.lock:
+            key = (prefix, limit)
+            if key not in self.results:
+                if len(self.results) >= self.MAX_RESULTS:
+                    self.results.clear()
+                self.results[key] = self._search(prefix, limit)
+            return self.results[key]
+
+    def _search(self, prefix, limit):
+        matches = set()
+        entries = self.entries
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and entries[position][0].startswith(prefix):
+            matches.add(entries[position][1])
+            position += 1
+        ranked = heapq.nsmallest(
+            limit,
+            (
+                (-self.routes[station_id], self.stations[station_id], station_id)
+                for station_id in matches
+            ),
+        )
+        return [
+            {"id": station_id, "name": name, "routes": -routes}
+            for routes, name, station_id in ranked
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Returns the process wide index, building it on first use"""
+    global _index
+    interval = autocomplete_settings()["REBUILD_INTERVAL"]
+    with _index_lock:
+        if _index is None or (
+            interval and time.monotonic() - _index.built_at > interval
+        ):
+            _index = StationIndex.build()
+        return _index
+
+
+def current_index():
+    """Returns the index if it was already built, without building it"""
+    return _index
+
+
+def reset_index():
+    global _index
+    with _index_lock:
+        _index = None
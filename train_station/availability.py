@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from train_station.caching import bump_versions
+
+
+def service_date(departure_time):
+    return timezone.localtime(departure_time, timezone.get_default_timezone()).date()
+
+
+def service_day_bounds(day):
+    """Half-open `[start, end)` range of departures on service day `day`"""
+    tz = timezone.get_default_timezone()
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()), tz)
+    end = timezone.make_aware(
+        datetime.combine(day + timedelta(days=1), datetime.min.time()), tz
+    )
+    return start, end
+
+
+def with_service_date(journeys):
+    return journeys.order_by().annotate(
+        service_date=TruncDate("departure_time", tzinfo=timezone.get_default_timezone())
+    )
+
+
+def summarize(journeys):
+    """
+    `(route, service day)` totals of a `Journey` queryset,
+    one GROUP BY query yielding dicts of the summary fields
+    """
+    return (
+        with_service_date(journeys)
+        .values("route_id", "service_date")
+        .annotate(
+            journeys=Count("id"),
+            capacity=Sum(F("train__cargo_num") * F("train__places_in_cargo")),
+            sold=Sum("seats_taken"),
+        )
+    )
+
+
+def refresh_route_days(keys):
+    """
+    Recomputes the summary rows of `(route_id, service_date)` keys from
+    their journeys. Each row is locked before its journeys are counted,
+    so of two concurrent refreshes the later one counts what the earlier
+    one wrote and the last commit of a journey always wins.
+    """
+    Route = apps.get_model("train_station", "Route")
+    Journey = apps.get_model("train_station", "Journey")
+    RouteDailyAvailability = apps.get_model("train_station", "RouteDailyAvailability")
+    existing_routes = set(
+        Route.objects.filter(pk__in={route_id for route_id, _ in keys}).values_list(
+            "pk", flat=True
+        )
+    )
+    for route_id, day in sorted(keys):
+        if route_id not in existing_routes:
+            # deleted with its summary rows
+            continue
+        with transaction.atomic():
+            summary, _ = RouteDailyAvailability.objects.get_or_create(
+                route_id=route_id, service_date=day
+            )
+            summary = RouteDailyAvailability.objects.select_for_update().get(
+                pk=summary.pk
+            )
+            start, end = service_day_bounds(day)
+            totals = list(
+                summarize(
+                    Journey.objects.filter(
+                        route_id=route_id,
+                        departure_time__gte=start,
+                        departure_time__lt=end,
+                    )
+                )
+            )
+            if not totals:
+                summary.delete()
+                continue
+            totals = totals[0]
+            summary.journeys = totals["journeys"]
+            summary.capacity = totals["capacity"]
+            summary.sold = totals["sold"]
+            summary.save(update_fields=["journeys", "capacity", "sold"])
+
+
+def schedule_refresh(keys):
+    """Refreshes `keys` once the current transaction commits"""
+    keys = set(keys)
+    if keys:
+        transaction.on_commit(lambda: refresh_route_days(keys))
+
+
+def journey_keys(journeys):
+    """Distinct `(route_id, service_date)` keys of a `Journey` queryset"""
+    return set(
+        with_service_date(journeys).values_list("route_id", "service_date").distinct()
+    )
+
+
+def rebuild(date_from=None, date_to=None, batch_size=1000):
+    """
+    Replaces the summary rows of service days `date_from`..`date_to`
+    (inclusive, unbounded when None) with fresh totals, returns their count
+    """
+    Journey = apps.get_model("train_station", "Journey")
+    RouteDailyAvailability = apps.get_model("train_station", "RouteDailyAvailability")
+    journeys = Journey.objects.all()
+    summaries = RouteDailyAvailability.objects.all()
+    if date_from is not None:
+        journeys = journeys.filter(departure_time__gte=service_day_bounds(date_from)[0])
+        summaries = summaries.filter(service_date__gte=date_from)
+    if date_to is not None:
+        journeys = journeys.filter(departure_time__lt=service_day_bounds(date_to)[1])
+        summaries = summaries.filter(service_date__lte=date_to)
+
+    with transaction.atomic():
+        summaries.delete()
+        rows = RouteDailyAvailability.objects.bulk_create(
+            (RouteDailyAvailability(**totals) for totals in summarize(journeys)),
+            batch_size=batch_size,
+        )
+        bump_versions(RouteDailyAvailability)
+    return len(rows)
@@ -0,0 +1,365 @@
+import hashlib
+import json
+import math
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    "ALIAS": "default",
+    "KEY_PREFIX": "train_station",
+    "TIMEOUT": 300,
+    # journeys carry seat availability, which changes with every order
+    "AVAILABILITY_TIMEOUT": 30,
+}
+
+
+def response_cache_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "RESPONSE_CACHE", {})}
+
+
+def get_cache():
+    return caches[response_cache_settings()["ALIAS"]]
+
+
+def version_key(model):
+    prefix = response_cache_settings()["KEY_PREFIX"]
+    return f"{prefix}:version:{model._meta.label_lower}"
+
+
+def get_versions(models):
+    """
+    Current version of each model. A version missing from the cache,
+    never set or evicted, starts at the current time in nanoseconds,
+    so it cannot fall back to a number older responses were keyed on.
+    """
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(models):
+    cache = get_cache()
+    for model in models:
+        key = version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def _bump_tables(models):
+    TableVersion = apps.get_model("train_station", "TableVersion")
+    names = [model._meta.label_lower for model in models]
+    now = timezone.now()
+    rows = TableVersion.objects.filter(name__in=names)
+    if rows.update(version=F("version") + 1, updated_at=now) < len(names):
+        TableVersion.objects.bulk_create(
+            [TableVersion(name=name, version=1, updated_at=now) for name in names],
+            ignore_conflicts=True,
+        )
+
+
+def get_table_versions(models):
+    """`{label: (version, updated_at)}` of `models` from one query"""
+    TableVersion = apps.get_model("train_station", "TableVersion")
+    rows = TableVersion.objects.filter(
+        name__in=[model._meta.label_lower for model in models]
+    ).values_list("name", "version", "updated_at")
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def bump_versions(*models):
+    """
+    Invalidates every cached response built from `models`. Cache versions
+    are bumped right away and again on commit, so a response cached by a
+    concurrent request before the writing transaction commits is not
+    served. `TableVersion` rows only on commit: bumping them inside the
+    transaction would hold their row lock and serialize all writers.
+    """
+    _bump(models)
+    transaction.on_commit(partial(_bump, models))
+    transaction.on_commit(partial(_bump_tables, models))
+
+
+def request_role(request):
+    user = request.user
+    if user is None or not user.is_authenticated:
+        return "anonymous"
+    return "staff" if user.is_staff else "user"
+
+
+def request_fingerprint(request):
+    """Parts identifying a GET response: URL, sorted query and role"""
+    query = sorted(
+        (key, sorted(values)) for key, values in request.query_params.lists()
+    )
+    return [
+        request.build_absolute_uri(request.path),
+        json.dumps(query),
+        request_role(request),
+    ]
+
+
+def make_etag(data):
+    content = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f'"{hashlib.md5(content.encode()).hexdigest()}"'
+
+
+def request_etags(request):
+    """Entity tags of `If-None-Match`, `*` included as is"""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def etag_matches(request, etag):
+    tags = request_etags(request)
+    return "*" in tags or etag in tags
+
+
+def last_modified_second(last_modified):
+    """
+    `last_modified` rounded up to the whole second sent as Last-Modified,
+    None while that second is still running: a change later in it would
+    compare as not modified since the sent date
+    """
+    second = math.ceil(last_modified.timestamp())
+    return second if second <= time.time() else None
+
+
+class HandlerMixin:
+    """
+    DRF's `dispatch` calling the action through `call_handler`, once
+    `initial` has authenticated the request and checked its permissions
+    and throttles, and `AsyncReadView` through `acall_handler`. Mixins
+    wrap actions by overriding both and calling `super()`.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = self.call_handler(handler, request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def call_handler(self, handler, request, *args, **kwargs):
+        return handler(request, *args, **kwargs)
+
+    async def acall_handler(self, handler, request, *args, **kwargs):
+        return await handler(request, *args, **kwargs)
+
+
+class ResponseCacheMixin(HandlerMixin):
+    """
+    Read-through cache of serialized GET responses of `cache_actions`.
+    Entries are keyed by the absolute URL with normalized query params,
+    the role of the user and the versions of `cache_models`, the models
+    the responses are built from, which signals bump on every change.
+    Responses carry an ETag and `If-None-Match` is answered with a 304.
+    """
+
+    cache_actions = ("list", "retrieve")
+    cache_models = ()
+    cache_timeout_setting = "TIMEOUT"
+
+    def call_handler(self, handler, request, *args, **kwargs):
+        if not self.caches_response(request):
+            return super().call_handler(handler, request, *args, **kwargs)
+        return self.cached_response(
+            partial(super().call_handler, handler), request, *args, **kwargs
+        )
+
+    async def acall_handler(self, handler, request, *args, **kwargs):
+        if not self.caches_response(request):
+            return await super().acall_handler(handler, request, *args, **kwargs)
+        return await self.acached_response(
+            partial(super().acall_handler, handler), request, *args, **kwargs
+        )
+
+    def caches_response(self, request):
+        return (
+            request.method == "GET"
+            and self.action in self.cache_actions
+            and response_cache_settings()["ENABLED"]
+        )
+
+    def get_cache_key(self, request):
+        parts = [
+            *request_fingerprint(request),
+            *map(str, get_versions(self.cache_models)),
+        ]
+        digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+        return f"{response_cache_settings()['KEY_PREFIX']}:response:{digest}"
+
+    def cache_entry(self, response):
+        return {"data": response.data, "etag": make_etag(response.data)}
+
+    @staticmethod
+    def entry_response(request, entry):
+        if etag_matches(request, entry["etag"]):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": entry["etag"]}
+            )
+        return Response(entry["data"], headers={"ETag": entry["etag"]})
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_cache_key(request)
+
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = self.cache_entry(response)
+            timeout = response_cache_settings()[self.cache_timeout_setting]
+            cache.set(key, entry, timeout=timeout)
+        return self.entry_response(request, entry)
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        """`cached_response` of an async `handler`"""
+        cache = get_cache()
+        key = await sync_to_async(self.get_cache_key)(request)
+
+        entry = await cache.aget(key)
+        if entry is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = self.cache_entry(response)
+            timeout = response_cache_settings()[self.cache_timeout_setting]
+            await cache.aset(key, entry, timeout=timeout)
+        return self.entry_response(request, entry)
+
+
+class ConditionalGetMixin(HandlerMixin):
+    """
+    ETag and Last-Modified of `conditional_actions` derived from the
+    `TableVersion` rows of `cache_models` and the request, so a client
+    holding a current copy gets a 304 after a single small query and
+    nothing is serialized. Put it before `ResponseCacheMixin`.
+    """
+
+    conditional_actions = ("list", "retrieve")
+    cache_models = ()
+
+    def call_handler(self, handler, request, *args, **kwargs):
+        if not self.checks_conditions(request):
+            return super().call_handler(handler, request, *args, **kwargs)
+        return self.conditional_response(
+            partial(super().call_handler, handler), request, *args, **kwargs
+        )
+
+    async def acall_handler(self, handler, request, *args, **kwargs):
+        if not self.checks_conditions(request):
+            return await super().acall_handler(handler, request, *args, **kwargs)
+        return await self.aconditional_response(
+            partial(super().acall_handler, handler), request, *args, **kwargs
+        )
+
+    def checks_conditions(self, request):
+        return request.method == "GET" and self.action in self.conditional_actions
+
+    def get_validators(self, request):
+        """`(etag, last_modified)`, `last_modified` is None for unseen tables"""
+        versions = get_table_versions(self.cache_models)
+        parts = request_fingerprint(request)
+        for model in self.cache_models:
+            version, _ = versions.get(model._meta.label_lower, (0, None))
+            parts.append(f"{model._meta.label_lower}:{version}")
+        digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+        updated = [updated_at for _, updated_at in versions.values()]
+        last_modified = max(updated) if updated else None
+        return f'"{digest[:32]}"', last_modified
+
+    @staticmethod
+    def not_modified(request, etag, last_modified):
+        """
+        Whether the validators alone show the client copy is current.
+        `If-None-Match: *` waits for the handler, the versions cannot tell
+        whether the resource exists.
+        """
+        if "If-None-Match" in request.headers:
+            return etag in request_etags(request)
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        return (
+            since is not None
+            and last_modified is not None
+            and last_modified.timestamp() < since
+        )
+
+    def check_conditions(self, request):
+        """Validator headers and whether the client copy is current"""
+        etag, last_modified = self.get_validators(request)
+        headers = {"ETag": etag}
+        if last_modified is not None:
+            second = last_modified_second(last_modified)
+            if second is not None:
+                headers["Last-Modified"] = http_date(second)
+        return headers, self.not_modified(request, etag, last_modified)
+
+    @staticmethod
+    def add_validators(request, response, headers):
+        """Validators of a 200 response, a 304 for `If-None-Match: *`"""
+        if response.status_code == status.HTTP_200_OK and "*" in request_etags(request):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        if response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        headers, not_modified = self.check_conditions(request)
+        if not_modified:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return self.add_validators(request, handler(request, *args, **kwargs), headers)
+
+    async def aconditional_response(self, handler, request, *args, **kwargs):
+        """`conditional_response` of an async `handler`"""
+        headers, not_modified = await sync_to_async(self.check_conditions)(request)
+        if not_modified:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return self.add_validators(
+            request, await handler(request, *args, **kwargs), headers
+        )
@@ -0,0 +1,103 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from train_station.renderers import FastJSONRenderer
+
+# rows fetched per round trip of the server side cursor
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object handing back what `csv.writer` writes"""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    renderer = FastJSONRenderer()
+    for row in rows:
+        yield renderer.render(row) + b"\n"
+
+
+def csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([csv_value(row.get(field)) for field in fields])
+
+
+async def aiter_chunks(content):
+    """
+    `content` as an async iterator, pulled `CHUNK_SIZE` parts at a time in
+    the request's thread, where its queries have to run
+    """
+    next_chunk = sync_to_async(lambda: list(islice(content, CHUNK_SIZE)))
+    try:
+        while chunk := await next_chunk():
+            for part in chunk:
+                yield part
+    finally:
+        await sync_to_async(content.close)()
+
+
+def export_response(request, rows, fields, format, filename):
+    """
+    Streams `rows`, dicts with the keys of `fields`, as JSON Lines or
+    CSV. `rows` should come from `QuerySet.iterator()`, so memory stays
+    flat however many rows are exported. Under ASGI the content is handed
+    over as an async iterator, as Django reads a sync one whole before
+    sending any of it.
+    """
+    if format == "csv":
+        content, content_type = csv_lines(fields, rows), CSVRenderer.media_type
+    else:
+        content, content_type = ndjson_lines(rows), NDJSONRenderer.media_type
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        content = aiter_chunks(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{format}"'
+    return response
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Negotiates `?format=ndjson` and renders errors as one JSON line"""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(ndjson_lines(rows))
+
+
+class CSVRenderer(BaseRenderer):
+    """Negotiates `?format=csv` and renders errors as a one row table"""
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        return "".join(csv_lines(fields, rows)).encode()
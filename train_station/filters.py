@@ -0,0 +1,136 @@
+import re
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from train_station.models import Station
+
+# "YYYY-MM-DD[ HH[:MM[:SS]]]" with the width of the step each prefix covers
+PREFIX_PATTERN = re.compile(
+    r"^(?P<date>\d{4}-\d{2}-\d{2})"
+    r"(?:[ T](?P<hour>\d{2})(?::(?P<minute>\d{2})(?::(?P<second>\d{2}))?)?)?$"
+)
+
+
+def parse_timezone(value):
+    """`?tz=Europe/Kyiv`, the current time zone when empty"""
+    if not value:
+        return timezone.get_current_timezone()
+    try:
+        return ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError({"tz": f"Unknown time zone '{value}'."})
+
+
+def parse_timestamp(field, value, tz):
+    """An ISO date or datetime, naive values are taken in `tz`"""
+    try:
+        moment = parse_datetime(value)
+        day = parse_date(value) if moment is None else None
+    except ValueError:
+        moment = day = None
+    if moment is None:
+        if day is None:
+            raise ValidationError({field: "Use the YYYY-MM-DD[THH:MM[:SS]] format."})
+        moment = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, tz)
+    return moment
+
+
+def prefix_range(field, value, tz):
+    """
+    Half-open `[start, end)` range covered by a date or datetime prefix,
+    e.g. "2025-01-10 08" is the hour from 08:00 on that day in `tz`.
+    """
+    match = PREFIX_PATTERN.match(value.strip())
+    if match is None:
+        raise ValidationError({field: "Use the YYYY-MM-DD[ HH[:MM[:SS]]] format."})
+    parts = match.groupdict()
+    try:
+        day = parse_date(parts["date"])
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({field: "Use the YYYY-MM-DD[ HH[:MM[:SS]]] format."})
+
+    start = datetime.combine(day, datetime.min.time())
+    step = timedelta(days=1)
+    for unit in ("hour", "minute", "second"):
+        if parts[unit] is None:
+            break
+        try:
+            start = start.replace(**{unit: int(parts[unit])})
+        except ValueError:
+            raise ValidationError({field: f"Invalid {unit} '{parts[unit]}'."})
+        step = timedelta(**{f"{unit}s": 1})
+    start = timezone.make_aware(start, tz)
+    return start, start + step
+
+
+def _narrow(lookups, key, value):
+    """Keeps the tighter bound when a lookup is given twice"""
+    if key in lookups:
+        value = (
+            max(value, lookups[key])
+            if key.endswith("gte")
+            else min(value, lookups[key])
+        )
+    lookups[key] = value
+
+
+def time_range_filters(params):
+    """
+    Translates journey time query params into range lookups that an index
+    on `departure_time`/`arrival_time` can serve:
+
+    - `departure_after`, `departure_before`, `arrival_after`,
+      `arrival_before`: ISO timestamps, lower bounds inclusive and upper
+      bounds exclusive;
+    - `date`: the day of departure;
+    - `departure_time`, `arrival_time`: a date or datetime prefix;
+
+    all read in `tz`, the current time zone by default.
+    """
+    tz = parse_timezone(params.get("tz"))
+    lookups = {}
+
+    for param, field in (
+        ("departure_time", "departure_time"),
+        ("arrival_time", "arrival_time"),
+        ("date", "departure_time"),
+    ):
+        if params.get(param):
+            start, end = prefix_range(param, params[param], tz)
+            _narrow(lookups, f"{field}__gte", start)
+            _narrow(lookups, f"{field}__lt", end)
+
+    for prefix in ("departure", "arrival"):
+        for bound, lookup in (("after", "gte"), ("before", "lt")):
+            param = f"{prefix}_{bound}"
+            if params.get(param):
+                moment = parse_timestamp(param, params[param], tz)
+                _narrow(lookups, f"{prefix}_time__{lookup}", moment)
+
+    return lookups
+
+
+def matching_stations(term):
+    """
+    Ids of the stations whose name contains `term`, ignoring case, or on
+    PostgreSQL has a part close to it by trigram word similarity, so
+    "Lvov" still finds "Lviv". `station_name_trgm_idx` serves both lookups there.
+    """
+    term = term.upper()
+    condition = Q(upper_name__contains=term)
+    if connection.vendor == "postgresql":
+        condition |= Q(upper_name__trigram_word_similar=term)
+    return (
+        Station.objects.alias(upper_name=Upper("name")).filter(condition).values("id")
+    )
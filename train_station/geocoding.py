@@ -0,0 +1,269 @@
+import csv
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import backoff
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from geopy.exc import GeocoderTimedOut
+from geopy.geocoders import Nominatim
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "PROVIDERS": [
+        "train_station.geocoding.GazetteerProvider",
+        "train_station.geocoding.NominatimProvider",
+    ],
+    "GAZETTEER_PATH": Path(__file__).resolve().parent / "data" / "gazetteer.csv",
+    "CACHE_SIZE": 4096,
+    "NOMINATIM_USER_AGENT": "train_station_v1.0",
+    "NOMINATIM_TIMEOUT": 5,
+}
+
+
+def geocoding_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "GEOCODING", {})}
+
+
+def normalize_name(city_name):
+    """Cache key for a city: case-folded with collapsed whitespace"""
+    return " ".join(str(city_name).split()).casefold()
+
+
+class BaseProvider:
+    """
+    Resolves a city name to coordinates.
+    `geocode` returns a `(latitude, longitude)` tuple or None when unknown.
+    """
+
+    name = None
+
+    def geocode(self, city_name):
+        raise NotImplementedError
+
+
+class GazetteerProvider(BaseProvider):
+    """
+    Offline provider backed by a local CSV or JSON file.
+    CSV files need `name`, `latitude` and `longitude` columns, JSON files
+    hold either a list of such objects or a `{name: [latitude, longitude]}` map.
+    """
+
+    name = "gazetteer"
+
+    def __init__(self, path=None):
+        self.path = Path(path or geocoding_settings()["GAZETTEER_PATH"])
+        self._places = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.path.suffix.lower() == ".json":
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+            if isinstance(data, dict):
+                rows = (
+                    {"name": name, "latitude": lat, "longitude": lon}
+                    for name, (lat, lon) in data.items()
+                )
+            else:
+                rows = data
+            return self._index(rows)
+
+        with open(self.path, encoding="utf-8", newline="") as file:
+            return self._index(csv.DictReader(file))
+
+    @staticmethod
+    def _index(rows):
+        return {
+            normalize_name(row["name"]): (
+                float(row["latitude"]),
+                float(row["longitude"]),
+            )
+            for row in rows
+        }
+
+    @property
+    def places(self):
+        if self._places is None:
+            with self._lock:
+                if self._places is None:
+                    try:
+                        self._places = self._load()
+                    except FileNotFoundError:
+                        logger.warning("Gazetteer file %s not found", self.path)
+                        self._places = {}
+        return self._places
+
+    def geocode(self, city_name):
+        return self.places.get(normalize_name(city_name))
+
+
+class NominatimProvider(BaseProvider):
+    """Online provider using OpenStreetMap Nominatim through geopy"""
+
+    name = "nominatim"
+
+    def __init__(self, user_agent=None, timeout=None):
+        options = geocoding_settings()
+        self.client = Nominatim(
+            user_agent=user_agent or options["NOMINATIM_USER_AGENT"],
+            timeout=timeout or options["NOMINATIM_TIMEOUT"],
+        )
+
+    @backoff.on_exception(backoff.expo, GeocoderTimedOut, max_tries=5, max_value=2)
+    def geocode(self, city_name):
+        location = self.client.geocode(city_name)
+        if location:
+            return location.latitude, location.longitude
+        return None
+
+
+class Geocoder:
+    """
+    Resolves city names through an in-process LRU, then the
+    `GeocodedCity` table, then each provider in order.
+    Provider hits are written back to both cache levels.
+    """
+
+    def __init__(self, providers, cache_size=4096):
+        self.providers = list(providers)
+        self.cache_size = cache_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lru_get(self, key):
+        with self._lock:
+            coordinates = self._lru.get(key)
+            if coordinates is not None:
+                self._lru.move_to_end(key)
+            return coordinates
+
+    def _lru_set(self, key, coordinates):
+        with self._lock:
+            self._lru[key] = coordinates
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.cache_size:
+                self._lru.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    def lookup_providers(self, city_name):
+        """Returns `(coordinates, provider name)` or `(None, None)`"""
+        for provider in self.providers:
+            coordinates = provider.geocode(city_name)
+            if coordinates:
+                return tuple(coordinates), provider.name
+        return None, None
+
+    def geocode(self, city_name):
+        key = normalize_name(city_name)
+        coordinates = self._lru_get(key)
+        if coordinates is not None:
+            return coordinates
+
+        GeocodedCity = apps.get_model("train_station", "GeocodedCity")
+        cached = (
+            GeocodedCity.objects.filter(name=key)
+            .values_list("latitude", "longitude")
+            .first()
+        )
+        if cached:
+            self._lru_set(key, cached)
+            return cached
+
+        coordinates, provider = self.lookup_providers(city_name)
+        if coordinates is None:
+            raise ValueError(f"Coordinates for '{city_name}' could not be found!")
+
+        GeocodedCity.objects.get_or_create(
+            name=key,
+            defaults={
+                "latitude": coordinates[0],
+                "longitude": coordinates[1],
+                "provider": provider,
+            },
+        )
+        self._lru_set(key, coordinates)
+        return coordinates
+
+    def geocode_many(self, city_names, max_workers=4):
+        """
+        Resolves many cities at once: duplicates are collapsed, the table cache
+        is read with a single query and the remaining names are sent to the
+        providers concurrently by at most `max_workers` threads.
+        Returns a `{normalized name: (latitude, longitude)}` dict,
+        names no provider knows are left out.
+        """
+        pending = {}
+        for city_name in city_names:
+            pending.setdefault(normalize_name(city_name), city_name)
+
+        resolved = {}
+        for key in list(pending):
+            coordinates = self._lru_get(key)
+            if coordinates is not None:
+                resolved[key] = coordinates
+                del pending[key]
+
+        if not pending:
+            return resolved
+
+        GeocodedCity = apps.get_model("train_station", "GeocodedCity")
+        for key, latitude, longitude in GeocodedCity.objects.filter(
+            name__in=list(pending)
+        ).values_list("name", "latitude", "longitude"):
+            resolved[key] = latitude, longitude
+            self._lru_set(key, resolved[key])
+            del pending[key]
+
+        if not pending:
+            return resolved
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self.lookup_providers, pending.values())
+            found = []
+            for key, (coordinates, provider) in zip(pending, results):
+                if coordinates is None:
+                    continue
+                resolved[key] = coordinates
+                self._lru_set(key, coordinates)
+                found.append(
+                    GeocodedCity(
+                        name=key,
+                        latitude=coordinates[0],
+                        longitude=coordinates[1],
+                        provider=provider,
+                    )
+                )
+
+        GeocodedCity.objects.bulk_create(found, ignore_conflicts=True)
+        return resolved
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    options = geocoding_settings()
+    providers = [import_string(path)() for path in options["PROVIDERS"]]
+    return Geocoder(providers, cache_size=options["CACHE_SIZE"])
+
+
+@receiver(setting_changed)
+def reset_geocoder(*, setting, **kwargs):
+    if setting == "GEOCODING":
+        get_geocoder.cache_clear()
+
+
+def get_coordinates(city_name):
+    """Returns `(latitude, longitude)` of a city, raises ValueError if unknown"""
+    return get_geocoder().geocode(city_name)
@@ -0,0 +1,187 @@
+import math
+
+import numpy as np
+from django.apps import apps
+from django.db.models import Q
+
+from train_station.distances import EARTH_RADIUS_KM, haversine
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# characters stored per station, cells of about 38 x 19 m
+PRECISION = 8
+
+# along a meridian of the sphere `haversine` measures on
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# cells a radius query reads at most, more of smaller cells read fewer
+# stations outside the circle
+MAX_CELLS = 16
+
+# first radius tried for the nearest stations, widened 4 times per step
+NEAREST_START_KM = 10
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Geohash of a point: nearby points share long prefixes"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            bound, coordinate = lon_range, longitude
+        else:
+            bound, coordinate = lat_range, latitude
+        middle = (bound[0] + bound[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bound[0] = middle
+        else:
+            bound[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """`(latitude, longitude)` degrees spanned by a cell of `precision`"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells together cover the circle of `radius_km`
+    around the point: the cells meeting its bounding box at the longest
+    precision needing at most `MAX_CELLS` of them. `[""]`, every station,
+    when the box spans a pole or half the globe.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    south = max(latitude - lat_delta, -90.0)
+    north = min(latitude + lat_delta, 90.0)
+    widest = math.cos(math.radians(max(abs(south), abs(north))))
+    if widest < 1e-9 or radius_km / (KM_PER_DEGREE * widest) >= 90:
+        return [""]
+    lon_delta = radius_km / (KM_PER_DEGREE * widest)
+    west, east = longitude - lon_delta, longitude + lon_delta
+
+    for precision in range(PRECISION, 0, -1):
+        lat_span, lon_span = cell_size(precision)
+        first_row = math.floor((south + 90) / lat_span)
+        last_row = min(math.floor((north + 90) / lat_span), round(180 / lat_span) - 1)
+        first_column = math.floor((west + 180) / lon_span)
+        last_column = math.floor((east + 180) / lon_span)
+        if (last_row - first_row + 1) * (last_column - first_column + 1) > MAX_CELLS:
+            continue
+        return sorted(
+            {
+                encode(
+                    (row + 0.5) * lat_span - 90,
+                    ((column + 0.5) * lon_span) % 360 - 180,
+                    precision,
+                )
+                for row in range(first_row, last_row + 1)
+                for column in range(first_column, last_column + 1)
+            }
+        )
+    return [""]
+
+
+def prefix_ranges(prefixes):
+    """
+    `prefix_range` of each prefix, sorted, with ranges that meet merged,
+    e.g. the neighbouring cells "u4p" and "u4q" into `("u4p", "u4r")`
+    """
+    ranges = []
+    for lowest, upper in sorted(prefix_range(prefix) for prefix in prefixes):
+        if ranges and ranges[-1][1] == lowest:
+            ranges[-1] = (ranges[-1][0], upper)
+        else:
+            ranges.append((lowest, upper))
+    return ranges
+
+
+def prefix_range(prefix):
+    """
+    `(lowest, upper)` bounds of the geohashes starting with `prefix`,
+    `lowest <= geohash < upper`, so an ordinary index serves the lookup.
+    `upper` is None when nothing sorts after the prefix.
+    """
+    chars = list(prefix)
+    while chars:
+        position = BASE32.index(chars[-1])
+        if position + 1 < len(BASE32):
+            chars[-1] = BASE32[position + 1]
+            return prefix, "".join(chars)
+        chars.pop()
+    return prefix, None
+
+
+def stations_within(latitude, longitude, radius_km, limit):
+    """
+    Up to `limit` `{id, name, latitude, longitude, distance}` of the
+    stations at most `radius_km` away, nearest first. Only the stations
+    in the cells of `covering_prefixes` are read, by ranges of the indexed
+    geohash, and measured by haversine.
+    """
+    Station = apps.get_model("train_station", "Station")
+
+    condition = Q()
+    for lowest, upper in prefix_ranges(
+        covering_prefixes(latitude, longitude, radius_km)
+    ):
+        cell = Q(geohash__gte=lowest)
+        if upper is not None:
+            cell &= Q(geohash__lt=upper)
+        condition |= cell
+    rows = list(
+        Station.objects.filter(condition, latitude__isnull=False).values_list(
+            "id", "name", "latitude", "longitude"
+        )
+    )
+    if not rows:
+        return []
+
+    distances = haversine(
+        latitude,
+        longitude,
+        np.array([row[2] for row in rows]),
+        np.array([row[3] for row in rows]),
+    )
+    nearest = sorted(
+        (distance, row)
+        for distance, row in zip(distances.tolist(), rows)
+        if distance <= radius_km
+    )
+    return [
+        {
+            "id": station_id,
+            "name": name,
+            "latitude": station_latitude,
+            "longitude": station_longitude,
+            "distance": round(distance, 3),
+        }
+        for distance, (station_id, name, station_latitude, station_longitude) in (
+            nearest[:limit]
+        )
+    ]
+
+
+def nearest_stations(latitude, longitude, limit):
+    """
+    The `limit` stations nearest to the point, by `stations_within` over
+    a radius widened until it holds enough of them or the whole Earth
+    """
+    radius_km = NEAREST_START_KM
+    while True:
+        stations = stations_within(latitude, longitude, radius_km, limit)
+        if len(stations) >= limit or radius_km >= math.pi * EARTH_RADIUS_KM:
+            return stations
+        radius_km *= 4
@@ -0,0 +1,312 @@
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from train_station import availability
+from train_station.caching import bump_versions
+from train_station.geohash import encode as encode_geohash
+from train_station.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from train_station.seating import SeatMap
+from user.tokens import RefreshToken
+
+# (weight, name) of the default request mix
+DEFAULT_MIX = (
+    (25, "journey-list"),
+    (15, "journey-detail"),
+    (10, "journey-seats"),
+    (10, "route-list"),
+    (5, "route-detail"),
+    (5, "station-list"),
+    (5, "train-list"),
+    (5, "order-list"),
+    (10, "order-allocate"),
+    (5, "plan"),
+    (5, "route-availability"),
+)
+
+
+def seed_network(
+    rng, stations=50, routes=200, trains=20, journeys=2000, tickets=5000, days=14
+):
+    """
+    Bulk creates a synthetic network and a loadtest user owning the
+    tickets, with seat maps and summaries consistent with them.
+    The same `rng` seed gives the same network.
+    """
+    user = get_user_model().objects.create_user(
+        email="loadtest@train-station.local", password="loadtest"
+    )
+    points = [(rng.uniform(44, 52), rng.uniform(22, 40)) for _ in range(stations)]
+    station_rows = Station.objects.bulk_create(
+        Station(
+            name=f"Station {index}",
+            latitude=latitude,
+            longitude=longitude,
+            geohash=encode_geohash(latitude, longitude),
+        )
+        for index, (latitude, longitude) in enumerate(points)
+    )
+    pairs = set()
+    while len(pairs) < min(routes, stations * (stations - 1)):
+        source, destination = rng.sample(station_rows, 2)
+        pairs.add((source.id, destination.id))
+    route_rows = Route.objects.bulk_create(
+        Route(
+            source_id=source_id,
+            destination_id=destination_id,
+            distance=rng.randint(50, 1500),
+        )
+        for source_id, destination_id in sorted(pairs)
+    )
+    train_type = TrainType.objects.create(name="Loadtest")
+    train_rows = Train.objects.bulk_create(
+        Train(
+            name=f"Train {index}",
+            cargo_num=rng.randint(4, 12),
+            places_in_cargo=rng.choice((36, 54, 64)),
+            train_type=train_type,
+        )
+        for index in range(trains)
+    )
+
+    start = timezone.now().replace(minute=0, second=0, microsecond=0)
+    journey_rows = []
+    for _ in range(journeys):
+        departure_time = start + timedelta(minutes=rng.randrange(days * 24 * 60))
+        journey_rows.append(
+            Journey(
+                route=rng.choice(route_rows),
+                train=rng.choice(train_rows),
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(minutes=rng.randint(60, 900)),
+            )
+        )
+    Journey.objects.bulk_create(journey_rows, batch_size=1000)
+
+    seat_maps = {
+        journey.id: SeatMap(journey.train.cargo_num, journey.train.places_in_cargo)
+        for journey in journey_rows
+    }
+    orders = Order.objects.bulk_create(
+        Order(user=user) for _ in range(max(1, (tickets + 2) // 3))
+    )
+    ticket_rows = []
+    for index in range(tickets):
+        journey = rng.choice(journey_rows)
+        seats = seat_maps[journey.id].allocate(1, together=False)
+        if not seats:
+            continue
+        cargo, seat = seats[0]
+        seat_maps[journey.id].take(cargo, seat)
+        ticket_rows.append(
+            Ticket(cargo=cargo, seat=seat, journey=journey, order=orders[index // 3])
+        )
+    Ticket.objects.bulk_create(ticket_rows, batch_size=1000)
+
+    for journey in journey_rows:
+        journey.seat_map = seat_maps[journey.id].to_bytes()
+        journey.seats_taken = seat_maps[journey.id].taken_count()
+    Journey.objects.bulk_update(
+        journey_rows, ["seat_map", "seats_taken"], batch_size=1000
+    )
+    availability.rebuild()
+    bump_versions(Station, Route, Train, Journey, Ticket)
+    return {
+        "user": user,
+        "stations": [station.id for station in station_rows],
+        "routes": [route.id for route in route_rows],
+        "journeys": [journey.id for journey in journey_rows],
+        "start": start,
+        "days": days,
+    }
+
+
+def build_requests(rng, network, count, mix=DEFAULT_MIX):
+    """`count` requests `(method, path, params)` drawn from the weighted `mix`"""
+    weights, names = zip(*mix)
+    start = network["start"]
+    requests = []
+    for name in rng.choices(names, weights=weights, k=count):
+        journey = rng.choice(network["journeys"])
+        route = rng.choice(network["routes"])
+        day = (start + timedelta(days=rng.randrange(network["days"]))).date()
+        if name == "journey-list":
+            params = rng.choice(
+                ({}, {"route": route}, {"date": day.isoformat()}, {"page_size": 50})
+            )
+            requests.append(("GET", reverse("train_station:journey-list"), params))
+        elif name == "journey-detail":
+            requests.append(
+                ("GET", reverse("train_station:journey-detail", args=[journey]), {})
+            )
+        elif name == "journey-seats":
+            params = {"encoding": rng.choice(("bitstring", "rle", "expanded"))}
+            requests.append(
+                ("GET", reverse("train_station:journey-seats", args=[journey]), params)
+            )
+        elif name == "route-list":
+            requests.append(("GET", reverse("train_station:route-list"), {}))
+        elif name == "route-detail":
+            requests.append(
+                ("GET", reverse("train_station:route-detail", args=[route]), {})
+            )
+        elif name == "station-list":
+            requests.append(("GET", reverse("train_station:station-list"), {}))
+        elif name == "train-list":
+            requests.append(("GET", reverse("train_station:train-list"), {}))
+        elif name == "order-list":
+            requests.append(("GET", reverse("train_station:order-list"), {}))
+        elif name == "order-allocate":
+            data = {"journey": journey, "seats": rng.randint(1, 3)}
+            requests.append(("POST", reverse("train_station:order-allocate"), data))
+        elif name == "plan":
+            source, destination = rng.sample(network["stations"], 2)
+            params = {"source": source, "destination": destination}
+            requests.append(("GET", reverse("train_station:plan-list"), params))
+        elif name == "route-availability":
+            params = {"route": route, "date_from": day.isoformat()}
+            requests.append(
+                ("GET", reverse("train_station:routedailyavailability-list"), params)
+            )
+    return requests
+
+
+def read_requests(path):
+    """
+    Requests of a JSON Lines file, one `{"method", "path", "params"|"data"}`
+    object per line, replayed in file order
+    """
+    requests = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                row = json.loads(line)
+                method = row.get("method", "GET").upper()
+                payload = row.get("data" if method != "GET" else "params") or {}
+                requests.append((method, row["path"], payload))
+    return requests
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted `values`"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+class Recorder:
+    """Latency, status and query count samples per endpoint"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def add(self, endpoint, seconds, status_code, queries):
+        with self.lock:
+            self.samples[endpoint].append((seconds, status_code, queries))
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = sorted(sample[0] * 1000 for sample in samples)
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "client_errors": sum(1 for sample in samples if 400 <= sample[1] < 500),
+                "server_errors": sum(1 for sample in samples if sample[1] >= 500),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "queries": round(
+                    sum(sample[2] for sample in samples) / len(samples), 1
+                ),
+            }
+        total = sum(report["requests"] for report in endpoints.values())
+        return {
+            "requests": total,
+            "seconds": round(elapsed, 3),
+            "throughput": round(total / elapsed, 1) if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def endpoint_name(method, path):
+    """`method` and URL name of `path`, so detail requests group together"""
+    try:
+        return f"{method} {resolve(path.split('?')[0]).url_name}"
+    except Resolver404:
+        return f"{method} {path}"
+
+
+def run(requests, user, concurrency=8):
+    """
+    Sends `requests` through in-process API clients authenticated with a
+    JWT of `user`, `concurrency` threads at a time. Returns the report.
+    """
+    token = str(RefreshToken.for_user(user).access_token)
+    recorder = Recorder()
+    local = threading.local()
+
+    def count_queries(execute, sql, params, many, context):
+        local.queries += 1
+        return execute(sql, params, many, context)
+
+    def send(request):
+        method, path, payload = request
+        if not hasattr(local, "client"):
+            # a failing view counts as a 500 instead of stopping the run
+            local.client = APIClient(raise_request_exception=False)
+            local.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        local.queries = 0
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            if method == "GET":
+                response = local.client.get(path, payload)
+            else:
+                response = local.client.generic(
+                    method,
+                    path,
+                    json.dumps(payload),
+                    content_type="application/json",
+                )
+        recorder.add(
+            endpoint_name(method, path),
+            time.perf_counter() - started,
+            response.status_code,
+            local.queries,
+        )
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        for request in requests:
+            send(request)
+    else:
+
+        def worker(chunk):
+            try:
+                for request in chunk:
+                    send(request)
+            finally:
+                connection.close()
+
+        chunks = [requests[index::concurrency] for index in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(worker, chunks))
+    return recorder.report(time.perf_counter() - started)
@@ -0,0 +1,196 @@
+import asyncio
+import time
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.views import APIView
+
+from train_station.models import Journey
+from user.tokens import RefreshToken
+
+# endpoint: (sync URL name, async URL name, model of the detail id or None)
+ENDPOINTS = {
+    "journeys": ("journey-list", "async-journey-list", None),
+    "journey": ("journey-detail", "async-journey-detail", Journey),
+    "seats": ("journey-seats", "async-journey-seats", Journey),
+    "routes": ("route-list", "async-route-list", None),
+    "availability": (
+        "routedailyavailability-list",
+        "async-routedailyavailability-list",
+        None,
+    ),
+}
+
+
+def wsgi_get(application, path, headers):
+    environ = {}
+    setup_testing_defaults(environ)
+    environ.update(PATH_INFO=path)
+    environ.update(
+        (f"HTTP_{name.upper().replace('-', '_')}", value)
+        for name, value in headers.items()
+    )
+    statuses = []
+    body = b"".join(
+        application(environ, lambda status, *_: statuses.append(int(status[:3])))
+    )
+    return statuses[0], body
+
+
+async def asgi_get(application, path, headers):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": (headers["host"], 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    done = asyncio.Event()
+    statuses, body = [], []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await application(scope, receive, send)
+    done.set()
+    return statuses[0], b"".join(body)
+
+
+class Command(BaseCommand):
+    help = (
+        "Serves the same reads through the sync viewsets one at a time, as "
+        "a sync worker does, and through the async views on one event loop "
+        "with `--concurrency` requests in flight, adding `--latency-ms` to "
+        "every query to stand for a slow database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            choices=list(ENDPOINTS),
+            action="append",
+            help="Endpoints to measure, all by default",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=100, help="Requests per endpoint"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=20, help="Async requests in flight"
+        )
+        parser.add_argument(
+            "--latency-ms", type=float, default=20, help="Delay added to each query"
+        )
+        parser.add_argument("--email", help="User to authenticate as")
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_active=True)
+        if options["email"]:
+            users = users.filter(email=options["email"])
+        user = users.order_by("pk").first()
+        if user is None:
+            raise CommandError("No active user to authenticate as.")
+        headers = {
+            "host": options["host"],
+            "authorization": f"Bearer {RefreshToken.for_user(user).access_token}",
+        }
+        latency = options["latency_ms"] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def slow_down(sender, connection, **kwargs):
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        slow_down(None, connection)
+        connection_created.connect(slow_down)
+        try:
+            # measure the views, not the response cache or the throttles
+            with override_settings(
+                RESPONSE_CACHE={"ENABLED": False}
+            ), mock.patch.object(APIView, "throttle_classes", []):
+                self.run(options, headers)
+        finally:
+            connection_created.disconnect(slow_down)
+            connection.execute_wrappers.remove(slow_query)
+
+    def run(self, options, headers):
+        wsgi = get_wsgi_application()
+        asgi = get_asgi_application()
+        count = options["requests"]
+
+        for name in options["endpoint"] or ENDPOINTS:
+            sync_name, async_name, model = ENDPOINTS[name]
+            args = []
+            if model is not None:
+                pk = model.objects.order_by("pk").values_list("pk", flat=True).first()
+                if pk is None:
+                    self.stdout.write(f"{name}: no {model._meta.verbose_name} rows")
+                    continue
+                args = [pk]
+            sync_path = reverse(f"train_station:{sync_name}", args=args)
+            async_path = reverse(f"train_station:{async_name}", args=args)
+
+            start = time.perf_counter()
+            for _ in range(count):
+                expected = wsgi_get(wsgi, sync_path, headers)
+            sync_seconds = time.perf_counter() - start
+
+            async def serve():
+                semaphore = asyncio.Semaphore(options["concurrency"])
+
+                async def one():
+                    async with semaphore:
+                        return await asgi_get(asgi, async_path, headers)
+
+                return await asyncio.gather(*(one() for _ in range(count)))
+
+            start = time.perf_counter()
+            responses = asyncio.run(serve())
+            async_seconds = time.perf_counter() - start
+
+            if expected[0] != 200:
+                raise CommandError(f"{name}: the sync view answered {expected[0]}")
+            # pagination links point at the view that served the page
+            expected = (expected[0], expected[1].replace(sync_path.encode(), b""))
+            if any(
+                (status, body.replace(async_path.encode(), b"")) != expected
+                for status, body in responses
+            ):
+                raise CommandError(f"{name}: the async view responses differ")
+
+            self.stdout.write(
+                f"{name}: sync {count / sync_seconds:.1f} requests/s, async "
+                f"{count / async_seconds:.1f} requests/s with "
+                f"{options['concurrency']} in flight "
+                f"({sync_seconds / async_seconds:.1f}x)"
+            )
@@ -0,0 +1,89 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from train_station.mixins import (
+    apply_query_plan,
+    values_lookups,
+    values_to_representation,
+)
+from train_station.renderers import FastJSONRenderer, orjson
+from train_station.serializers import (
+    JourneyListSerializer,
+    RouteListSerializer,
+    TrainListSerializer,
+)
+from train_station.views import JourneyViewSet, RouteViewSet, TrainViewSet
+
+ENDPOINTS = {
+    "journeys": (JourneyViewSet, JourneyListSerializer),
+    "routes": (RouteViewSet, RouteListSerializer),
+    "trains": (TrainViewSet, TrainListSerializer),
+}
+
+
+def best_of(repeat, function):
+    """Fastest of `repeat` runs in milliseconds and the last result"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = (
+        "Times list rendering through the model serializers against the "
+        "`.values()` fast path on the current database and checks that "
+        "both produce the same bytes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            choices=list(ENDPOINTS),
+            action="append",
+            help="Endpoints to measure, all by default",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=1000, help="Rows rendered per run"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Runs, the fastest is reported"
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write("orjson is not installed, using the json fallback")
+
+        for name in options["endpoint"] or ENDPOINTS:
+            viewset, serializer_class = ENDPOINTS[name]
+            pagination = viewset.pagination_class
+            ordering = getattr(pagination, "ordering", None) or ("id",)
+            queryset = viewset.queryset.order_by(*ordering)
+            limit = options["limit"]
+
+            def serialize():
+                instances = apply_query_plan(queryset, serializer_class)[:limit]
+                data = serializer_class(instances, many=True).data
+                return JSONRenderer().render(data)
+
+            def fast():
+                names, expressions = values_lookups(serializer_class)
+                rows = queryset.values(*names, **expressions)[:limit]
+                data = values_to_representation(serializer_class, rows)
+                return FastJSONRenderer().render(data)
+
+            serializer_ms, expected = best_of(options["repeat"], serialize)
+            fast_ms, content = best_of(options["repeat"], fast)
+            if content != expected:
+                raise CommandError(f"{name}: the fast path output differs")
+
+            rows = queryset[:limit].count()
+            self.stdout.write(
+                f"{name}: {rows} rows, serializer {serializer_ms:.1f} ms, "
+                f"fast path {fast_ms:.1f} ms "
+                f"({serializer_ms / max(fast_ms, 1e-6):.1f}x)"
+            )
@@ -0,0 +1,214 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Upper
+
+from train_station.caching import bump_versions
+from train_station.distances import MODES, batch_distances
+from train_station.geocoding import get_geocoder, normalize_name
+from train_station.geohash import encode as encode_geohash
+from train_station.models import Station, Route
+
+
+def read_rows(path):
+    """Streams rows of a CSV or JSON Lines file as dicts"""
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def parse_point(row):
+    latitude, longitude = row.get("latitude"), row.get("longitude")
+    if latitude in (None, "") or longitude in (None, ""):
+        return None
+    return float(latitude), float(longitude)
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports stations and routes from CSV or JSON Lines files. "
+        "Station rows have `name` and optional `latitude`/`longitude`, "
+        "route rows have `source`, `destination` station names and "
+        "an optional `distance`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", help="Path to the stations file")
+        parser.add_argument("--routes", help="Path to the routes file")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows written per transaction",
+        )
+        parser.add_argument(
+            "--distance-mode",
+            choices=list(MODES),
+            default="vincenty",
+            help="Distance formula, see `train_station.distances`",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Maximum concurrent geocoding lookups",
+        )
+
+    def handle(self, *args, **options):
+        if not options["stations"] and not options["routes"]:
+            raise CommandError("Pass --stations and/or --routes")
+
+        self.batch_size = options["batch_size"]
+        self.workers = options["workers"]
+        self.distance_mode = options["distance_mode"]
+        self.geocoder = get_geocoder()
+        # normalized station name -> (id, latitude, longitude)
+        self.stations = {}
+
+        if options["stations"]:
+            created = sum(
+                self.import_stations(chunk)
+                for chunk in chunked(read_rows(options["stations"]), self.batch_size)
+            )
+            self.stdout.write(self.style.SUCCESS(f"Created {created} stations"))
+
+        if options["routes"]:
+            created = sum(
+                self.import_routes(chunk)
+                for chunk in chunked(read_rows(options["routes"]), self.batch_size)
+            )
+            self.stdout.write(self.style.SUCCESS(f"Created {created} routes"))
+
+        bump_versions(Station, Route)
+
+    def load_existing_stations(self, names):
+        """Adds the stored stations named any of `names`, ignoring case"""
+        for station_id, name, latitude, longitude in (
+            Station.objects.annotate(upper_name=Upper("name"))
+            .filter(upper_name__in={" ".join(name.split()).upper() for name in names})
+            .order_by("id")
+            .values_list("id", "name", "latitude", "longitude")
+        ):
+            self.stations.setdefault(
+                normalize_name(name), (station_id, latitude, longitude)
+            )
+
+    def import_stations(self, rows):
+        """Creates the stations of `rows` not stored yet, returns their count"""
+        new_rows = {}
+        for row in rows:
+            key = normalize_name(row["name"])
+            if key not in self.stations:
+                new_rows.setdefault(key, row)
+
+        self.load_existing_stations([row["name"] for row in new_rows.values()])
+        new_rows = {
+            key: row for key, row in new_rows.items() if key not in self.stations
+        }
+
+        coordinates = self.geocoder.geocode_many(
+            (row["name"] for row in new_rows.values() if parse_point(row) is None),
+            max_workers=self.workers,
+        )
+
+        stations = []
+        for key, row in new_rows.items():
+            point = parse_point(row) or coordinates.get(key)
+            if point is None:
+                self.stderr.write(f"Skipping station '{row['name']}': unknown location")
+                continue
+            stations.append(
+                Station(
+                    name=row["name"].strip(),
+                    latitude=point[0],
+                    longitude=point[1],
+                    geohash=encode_geohash(*point),
+                )
+            )
+
+        with transaction.atomic():
+            Station.objects.bulk_create(stations, batch_size=self.batch_size)
+
+        for station in stations:
+            self.stations[normalize_name(station.name)] = (
+                station.id,
+                station.latitude,
+                station.longitude,
+            )
+        return len(stations)
+
+    def import_routes(self, rows):
+        """Creates the routes of `rows` not stored yet, returns their count"""
+        names = {}
+        for row in rows:
+            for field in ("source", "destination"):
+                names.setdefault(normalize_name(row[field]), row[field])
+
+        unknown = [name for key, name in names.items() if key not in self.stations]
+        if unknown:
+            self.import_stations([{"name": name} for name in unknown])
+
+        pairs = {}
+        for row in rows:
+            source = self.stations.get(normalize_name(row["source"]))
+            destination = self.stations.get(normalize_name(row["destination"]))
+            if source is None or destination is None or source == destination:
+                self.stderr.write(
+                    f"Skipping route '{row['source']} - {row['destination']}'"
+                )
+                continue
+            distance = row.get("distance")
+            pairs.setdefault(
+                (source, destination),
+                int(distance) if distance not in (None, "") else None,
+            )
+
+        stored = Route.objects.filter(
+            source_id__in={source[0] for source, _ in pairs},
+            destination_id__in={destination[0] for _, destination in pairs},
+        )
+        existing = set(stored.values_list("source_id", "destination_id"))
+        pairs = {
+            (source, destination): distance
+            for (source, destination), distance in pairs.items()
+            if (source[0], destination[0]) not in existing
+        }
+
+        to_measure = [pair for pair, distance in pairs.items() if distance is None]
+        measured = batch_distances(
+            [source[1:] for source, _ in to_measure],
+            [destination[1:] for _, destination in to_measure],
+            mode=self.distance_mode,
+        )
+        pairs.update(zip(to_measure, measured))
+
+        routes = [
+            Route(
+                source_id=source[0],
+                destination_id=destination[0],
+                distance=distance,
+            )
+            for (source, destination), distance in pairs.items()
+        ]
+        # routes stored since `existing` was read are skipped as conflicts
+        with transaction.atomic():
+            before = stored.count()
+            Route.objects.bulk_create(
+                routes, batch_size=self.batch_size, ignore_conflicts=True
+            )
+            return stored.count() - before
@@ -0,0 +1,101 @@
+import json
+import random
+from unittest import mock
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.views import APIView
+
+from train_station import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a synthetic network into a throwaway test database, replays "
+        "a weighted list/detail/order request mix against the API in process "
+        "and reports latency percentiles, throughput and queries per endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", type=int, default=50)
+        parser.add_argument("--routes", type=int, default=200)
+        parser.add_argument("--trains", type=int, default=20)
+        parser.add_argument("--journeys", type=int, default=2000)
+        parser.add_argument("--tickets", type=int, default=5000)
+        parser.add_argument(
+            "--requests", type=int, default=1000, help="Requests of the default mix"
+        )
+        parser.add_argument("--concurrency", type=int, default=8, help="Client threads")
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the network and the mix"
+        )
+        parser.add_argument(
+            "--replay",
+            metavar="FILE",
+            help='JSON Lines of {"method", "path", "params"|"data"} '
+            "sent instead of the default mix",
+        )
+        parser.add_argument(
+            "--current-database",
+            action="store_true",
+            help="Seed into the configured database instead of a test database",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        if options["stations"] < 2:
+            raise CommandError("At least 2 stations are needed.")
+
+        old_name = None
+        if not options["current_database"]:
+            setup_test_environment(debug=False)
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # throttling would turn most of a single user's burst into 429s,
+            # the views read the throttle classes once at import
+            with mock.patch.object(APIView, "throttle_classes", []):
+                report = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report)
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        network = loadtest.seed_network(
+            rng,
+            stations=options["stations"],
+            routes=options["routes"],
+            trains=options["trains"],
+            journeys=options["journeys"],
+            tickets=options["tickets"],
+        )
+        if options["replay"]:
+            requests = loadtest.read_requests(options["replay"])
+        else:
+            requests = loadtest.build_requests(rng, network, options["requests"])
+        return loadtest.run(requests, network["user"], options["concurrency"])
+
+    def write_report(self, report):
+        self.stdout.write(
+            f"{'endpoint':<36} {'n':>6} {'4xx':>5} {'5xx':>5} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+        )
+        for endpoint, row in report["endpoints"].items():
+            self.stdout.write(
+                f"{endpoint:<36} {row['requests']:>6} {row['client_errors']:>5} "
+                f"{row['server_errors']:>5} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['queries']:>8.1f}"
+            )
+        self.stdout.write(
+            f"{report['requests']} requests in {report['seconds']:.2f} s, "
+            f"{report['throughput']:.1f} requests/s"
+        )
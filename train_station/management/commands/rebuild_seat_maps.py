@@ -0,0 +1,87 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from train_station.availability import journey_keys, schedule_refresh
+from train_station.caching import bump_versions
+from train_station.models import Journey, Ticket
+from train_station.seating import SeatMap, build_seat_maps
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the journeys seat occupancy bitmaps from `Ticket` rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "journeys",
+            nargs="*",
+            type=int,
+            help="Journey ids to rebuild, all journeys by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Journeys rebuilt per transaction",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Journey.objects.order_by("id")
+        if options["journeys"]:
+            queryset = queryset.filter(id__in=options["journeys"])
+
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    queryset.select_for_update(of=("self",))
+                    .filter(id__gt=last_id)
+                    .values_list(
+                        "id",
+                        "train__cargo_num",
+                        "train__places_in_cargo",
+                        "seat_map",
+                        "seats_taken",
+                    )[: options["batch_size"]]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                checked += len(rows)
+
+                seat_maps = build_seat_maps(
+                    {row[0]: (row[1], row[2]) for row in rows},
+                    Ticket.objects.filter(
+                        journey_id__in=[row[0] for row in rows]
+                    ).values_list("journey_id", "cargo", "seat"),
+                )
+                changed = []
+                for journey_id, cargo_num, places, seat_map, seats_taken in rows:
+                    stored = SeatMap(cargo_num, places, seat_map)
+                    rebuilt = seat_maps[journey_id]
+                    if (
+                        stored.to_bytes() != rebuilt.to_bytes()
+                        or seats_taken != rebuilt.taken_count()
+                    ):
+                        changed.append(
+                            Journey(
+                                id=journey_id,
+                                seat_map=rebuilt.to_bytes(),
+                                seats_taken=rebuilt.taken_count(),
+                            )
+                        )
+                Journey.objects.bulk_update(
+                    changed, ["seat_map", "seats_taken"], batch_size=1000
+                )
+                schedule_refresh(
+                    journey_keys(
+                        Journey.objects.filter(id__in=[row.id for row in changed])
+                    )
+                )
+                fixed += len(changed)
+
+        if fixed:
+            bump_versions(Journey)
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} journeys, rebuilt {fixed}")
+        )
@@ -0,0 +1,77 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from train_station.caching import bump_versions
+from train_station.distances import MODES, batch_distances
+from train_station.models import Route
+
+
+class Command(BaseCommand):
+    help = "Recomputes `Route.distance` for every route from station coordinates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            choices=list(MODES),
+            default="vincenty",
+            help="Distance formula, see `train_station.distances`",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Routes computed and updated per transaction",
+        )
+        parser.add_argument(
+            "--only-missing",
+            action="store_true",
+            help="Only fill routes without a distance",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Route.objects.filter(
+            source__latitude__isnull=False,
+            source__longitude__isnull=False,
+            destination__latitude__isnull=False,
+            destination__longitude__isnull=False,
+        ).order_by("id")
+        if options["only_missing"]:
+            queryset = queryset.filter(distance__isnull=True)
+
+        last_id = 0
+        checked = updated = 0
+        while True:
+            rows = list(
+                queryset.filter(id__gt=last_id).values_list(
+                    "id",
+                    "distance",
+                    "source__latitude",
+                    "source__longitude",
+                    "destination__latitude",
+                    "destination__longitude",
+                )[: options["batch_size"]]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            checked += len(rows)
+
+            distances = batch_distances(
+                [row[2:4] for row in rows],
+                [row[4:6] for row in rows],
+                mode=options["mode"],
+            )
+            changed = [
+                Route(id=row[0], distance=distance)
+                for row, distance in zip(rows, distances)
+                if row[1] != distance
+            ]
+            with transaction.atomic():
+                Route.objects.bulk_update(changed, ["distance"], batch_size=1000)
+            updated += len(changed)
+
+        if updated:
+            bump_versions(Route)
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} routes, updated {updated}")
+        )
@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management import BaseCommand
+
+from train_station.availability import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the route daily availability summary from journeys, "
+        "for every service day or the ones between --from and --to"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="First service day, YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Last service day, YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Summary rows inserted per query",
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild(
+            options["date_from"], options["date_to"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Stored {rows} route days"))
@@ -0,0 +1,329 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    # share of requests measured, unsampled requests skip all bookkeeping
+    "SAMPLE_RATE": 1.0,
+    "SERVER_TIMING": True,
+    # sampled requests slower than this are logged with their SQL,
+    # None disables the log
+    "SLOW_REQUEST_MS": 1000,
+    "MAX_LOGGED_QUERIES": 50,
+    "BUCKETS": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+}
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+def metrics_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "METRICS", {})}
+
+
+class RequestMetrics:
+    """Timings of one sampled request, in seconds"""
+
+    __slots__ = ("queries", "db", "serializer", "render", "sql", "depth", "_render")
+
+    def __init__(self, capture_sql=False):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.render = 0.0
+        self.sql = [] if capture_sql else None
+        self.depth = 0
+        self._render = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db += duration
+            if self.sql is not None:
+                self.sql.append((duration, sql))
+
+    def server_timing(self, total):
+        return ", ".join(
+            (
+                f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+                f"serialize;dur={self.serializer * 1000:.1f}",
+                f"render;dur={self.render * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            )
+        )
+
+
+def measure_query(execute, sql, params, many, context):
+    """
+    Execute wrapper of every connection, counting the query towards the
+    current request's metrics. The request's `current_metrics` follows it
+    into `sync_to_async` threads, whose connections run the ORM under ASGI.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def instrument_connection(connection):
+    if measure_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(measure_query)
+
+
+@receiver(connection_created)
+def instrument_new_connection(sender, connection, **kwargs):
+    instrument_connection(connection)
+
+
+@contextmanager
+def measure_serializer():
+    """
+    Adds the time of the block, less its SQL, to the current request's
+    serializer time. Nested blocks are covered by the outermost one.
+    """
+    metrics = current_metrics.get()
+    if metrics is None or metrics.depth:
+        yield
+        return
+    metrics.depth += 1
+    start, db = time.perf_counter(), metrics.db
+    try:
+        yield
+    finally:
+        metrics.serializer += time.perf_counter() - start - (metrics.db - db)
+        metrics.depth -= 1
+
+
+def label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """
+    In-process aggregates of sampled requests per view, rendered in the
+    Prometheus text format. Each worker process keeps its own.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = defaultdict(int)
+            self.durations = {}
+            self.totals = defaultdict(float)
+
+    def observe(self, view, method, status_code, metrics, total, buckets):
+        with self.lock:
+            self.requests[(view, method, status_code)] += 1
+            histogram = self.durations.get(view)
+            if histogram is None:
+                histogram = self.durations[view] = {
+                    "buckets": [0] * len(buckets),
+                    "bounds": buckets,
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for index, bound in enumerate(histogram["bounds"]):
+                if total <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += total
+            histogram["count"] += 1
+            self.totals[("db_queries_total", view)] += metrics.queries
+            self.totals[("db_seconds_total", view)] += metrics.db
+            self.totals[("serializer_seconds_total", view)] += metrics.serializer
+            self.totals[("render_seconds_total", view)] += metrics.render
+
+    def render(self, sample_rate):
+        prefix = "train_station"
+        lines = [
+            f"# HELP {prefix}_metrics_sample_rate Share of requests measured.",
+            f"# TYPE {prefix}_metrics_sample_rate gauge",
+            f"{prefix}_metrics_sample_rate {sample_rate}",
+            f"# HELP {prefix}_requests_total Sampled requests.",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        with self.lock:
+            for (view, method, status_code), count in sorted(self.requests.items()):
+                lines.append(
+                    f'{prefix}_requests_total{{view="{label(view)}",'
+                    f'method="{method}",status="{status_code}"}} {count}'
+                )
+
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# HELP {name} Sampled request duration.")
+            lines.append(f"# TYPE {name} histogram")
+            for view, histogram in sorted(self.durations.items()):
+                view = label(view)
+                for bound, count in zip(histogram["bounds"], histogram["buckets"]):
+                    lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {count}')
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="+Inf"}} {histogram["count"]}'
+                )
+                lines.append(f'{name}_sum{{view="{view}"}} {histogram["sum"]:.6f}')
+                lines.append(f'{name}_count{{view="{view}"}} {histogram["count"]}')
+
+            for metric, description in (
+                ("db_queries_total", "SQL queries of sampled requests."),
+                ("db_seconds_total", "SQL time of sampled requests."),
+                ("serializer_seconds_total", "Serializer time of sampled requests."),
+                ("render_seconds_total", "Rendering time of sampled requests."),
+            ):
+                name = f"{prefix}_{metric}"
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for (key, view), value in sorted(self.totals.items()):
+                    if key == metric:
+                        value = int(value) if key == "db_queries_total" else value
+                        lines.append(f'{name}{{view="{label(view)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return (match and match.view_name) or "unresolved"
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures SQL queries and time, serializer time, rendering time and
+    total time of a sample of requests. Sampled responses carry them in
+    a `Server-Timing` header and add to the aggregates served by
+    `metrics_view`; slow ones are logged with their SQL. Time spent
+    streaming a response body is not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # connections this thread opened before the module was imported
+        for connection in connections.all(initialized_only=True):
+            instrument_connection(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        options = metrics_settings()
+        if not self.sampled(options):
+            return self.get_response(request)
+
+        metrics = RequestMetrics(capture_sql=options["SLOW_REQUEST_MS"] is not None)
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.record(
+            request, response, metrics, time.perf_counter() - start, options
+        )
+
+    async def __acall__(self, request):
+        options = metrics_settings()
+        if not self.sampled(options):
+            return await self.get_response(request)
+
+        metrics = RequestMetrics(capture_sql=options["SLOW_REQUEST_MS"] is not None)
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.record(
+            request, response, metrics, time.perf_counter() - start, options
+        )
+
+    @staticmethod
+    def sampled(options):
+        return options["ENABLED"] and random.random() < options["SAMPLE_RATE"]
+
+    def record(self, request, response, metrics, total, options):
+        view = view_name(request)
+        registry.observe(
+            view,
+            request.method,
+            response.status_code,
+            metrics,
+            total,
+            tuple(options["BUCKETS"]),
+        )
+        if options["SERVER_TIMING"]:
+            response["Server-Timing"] = metrics.server_timing(total)
+        slow_ms = options["SLOW_REQUEST_MS"]
+        if slow_ms is not None and total * 1000 >= slow_ms:
+            self.log_slow_request(request, view, metrics, total, options)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics._render = time.perf_counter()
+            response.add_post_render_callback(
+                lambda _: setattr(
+                    metrics, "render", time.perf_counter() - metrics._render
+                )
+            )
+        return response
+
+    @staticmethod
+    def log_slow_request(request, view, metrics, total, options):
+        queries = sorted(metrics.sql, key=lambda query: -query[0])
+        limit = options["MAX_LOGGED_QUERIES"]
+        lines = [f"{duration * 1000:8.1f} ms  {sql}" for duration, sql in queries]
+        if len(lines) > limit:
+            lines = lines[:limit] + [f"... {len(lines) - limit} more"]
+        logger.warning(
+            "Slow request %s %s (%s) %.1f ms, %d queries in %.1f ms\n%s",
+            request.method,
+            request.get_full_path(),
+            view,
+            total * 1000,
+            metrics.queries,
+            metrics.db * 1000,
+            "\n".join(lines),
+        )
+
+
+def metrics_view(request):
+    """
+    Aggregated request metrics in the Prometheus text format,
+    for `INTERNAL_IPS` and staff users
+    """
+    user = getattr(request, "user", None)
+    if request.META.get("REMOTE_ADDR") not in settings.INTERNAL_IPS and not (
+        user is not None and user.is_staff
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(metrics_settings()["SAMPLE_RATE"]),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
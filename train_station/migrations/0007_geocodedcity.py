@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0006_route_distance_station_latitude_station_longitude"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeocodedCity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("latitude", models.FloatField()),
+                ("longitude", models.FloatField()),
+                ("provider", models.CharField(blank=True, max_length=50)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name_plural": "geocoded cities",
+            },
+        ),
+    ]
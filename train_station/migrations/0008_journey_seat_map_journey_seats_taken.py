@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:02
+
+from django.db import migrations, models
+
+from train_station.seating import build_seat_maps
+
+
+def fill_seat_maps(apps, schema_editor):
+    Journey = apps.get_model("train_station", "Journey")
+    Ticket = apps.get_model("train_station", "Ticket")
+
+    journeys = {
+        journey_id: (cargo_num, places_in_cargo)
+        for journey_id, cargo_num, places_in_cargo in Journey.objects.values_list(
+            "id", "train__cargo_num", "train__places_in_cargo"
+        )
+    }
+    seat_maps = build_seat_maps(
+        journeys, Ticket.objects.values_list("journey_id", "cargo", "seat")
+    )
+    Journey.objects.bulk_update(
+        [
+            Journey(
+                id=journey_id,
+                seat_map=seat_map.to_bytes(),
+                seats_taken=seat_map.taken_count(),
+            )
+            for journey_id, seat_map in seat_maps.items()
+        ],
+        ["seat_map", "seats_taken"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0007_geocodedcity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journey",
+            name="seat_map",
+            field=models.BinaryField(default=bytes, editable=False),
+        ),
+        migrations.AddField(
+            model_name="journey",
+            name="seats_taken",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_seat_maps, migrations.RunPython.noop),
+    ]
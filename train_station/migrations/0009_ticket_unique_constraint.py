@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0008_journey_seat_map_journey_seats_taken"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                fields=("cargo", "seat", "journey"), name="unique_cargo_seat_journey"
+            ),
+        ),
+    ]
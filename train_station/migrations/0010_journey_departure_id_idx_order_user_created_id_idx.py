@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0009_ticket_unique_constraint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["departure_time", "id"], name="journey_departure_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="order_user_created_id_idx"
+            ),
+        ),
+    ]
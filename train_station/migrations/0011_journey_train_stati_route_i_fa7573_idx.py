@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0010_journey_departure_id_idx_order_user_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["route", "departure_time", "arrival_time"],
+                name="train_stati_route_i_fa7573_idx",
+            ),
+        ),
+    ]
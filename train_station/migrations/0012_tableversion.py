@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0011_journey_train_stati_route_i_fa7573_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.4 on 2026-10-17 18:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def fill_availability(apps, schema_editor):
+    Journey = apps.get_model("train_station", "Journey")
+    RouteDailyAvailability = apps.get_model("train_station", "RouteDailyAvailability")
+    totals = (
+        Journey.objects.order_by()
+        .annotate(
+            service_date=TruncDate(
+                "departure_time", tzinfo=timezone.get_default_timezone()
+            )
+        )
+        .values("route_id", "service_date")
+        .annotate(
+            journeys=Count("id"),
+            capacity=Sum(F("train__cargo_num") * F("train__places_in_cargo")),
+            sold=Sum("seats_taken"),
+        )
+    )
+    RouteDailyAvailability.objects.bulk_create(
+        (RouteDailyAvailability(**row) for row in totals), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0012_tableversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RouteDailyAvailability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("service_date", models.DateField()),
+                ("journeys", models.PositiveIntegerField(default=0)),
+                ("capacity", models.PositiveIntegerField(default=0)),
+                ("sold", models.PositiveIntegerField(default=0)),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_availability",
+                        to="train_station.route",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "route daily availability",
+                "indexes": [
+                    models.Index(
+                        fields=["service_date", "route"],
+                        name="availability_date_route_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("route", "service_date"),
+                        name="unique_route_service_date",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# serves `matching_stations`: UPPER(name) LIKE '%TERM%' and the trigram
+# word similarity operator, PostgreSQL only
+INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS station_name_trgm_idx "
+    "ON train_station_station USING gin (UPPER(name) gin_trgm_ops)"
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(INDEX_SQL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS station_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0013_routedailyavailability"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_index, drop_index),
+    ]
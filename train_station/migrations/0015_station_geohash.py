@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:21
+
+from django.db import migrations, models
+
+from train_station.geohash import encode
+
+
+def fill_geohashes(apps, schema_editor):
+    Station = apps.get_model("train_station", "Station")
+    Station.objects.bulk_update(
+        [
+            Station(id=station_id, geohash=encode(latitude, longitude))
+            for station_id, latitude, longitude in Station.objects.filter(
+                latitude__isnull=False, longitude__isnull=False
+            ).values_list("id", "latitude", "longitude")
+        ],
+        ["geohash"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0014_station_name_trgm_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="station",
+            name="geohash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=12
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="station",
+            index=models.Index(fields=["geohash"], name="station_geohash_idx"),
+        ),
+        migrations.RunPython(fill_geohashes, migrations.RunPython.noop),
+    ]
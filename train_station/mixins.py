@@ -0,0 +1,168 @@
+from rest_framework import mixins, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from train_station.metrics import measure_serializer
+from train_station.renderers import FastJSONRenderer
+
+
+def apply_query_plan(queryset, serializer_class):
+    """
+    Applies the query plan a serializer declares on its `Meta`:
+    `select_related` and `prefetch_related` (names or `Prefetch` objects)
+    for the relations it reads and `only` for the columns it renders.
+    """
+    meta = getattr(serializer_class, "Meta", None)
+    select_related = getattr(meta, "select_related", ())
+    prefetch_related = getattr(meta, "prefetch_related", ())
+    only = getattr(meta, "only", ())
+
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if only:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+class QueryPlanMixin:
+    """
+    Loads querysets the way the serializer of the current action needs
+    them, so listing a page costs the same number of queries at any size
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_query_plan(queryset, self.get_serializer_class())
+
+
+def values_lookups(serializer_class):
+    """
+    Splits `Meta.values`, `{field name: lookup or expression}`, into the
+    arguments of `QuerySet.values()`
+    """
+    lookups = serializer_class.Meta.values
+    names = [lookup for lookup in lookups.values() if isinstance(lookup, str)]
+    expressions = {
+        name: lookup for name, lookup in lookups.items() if not isinstance(lookup, str)
+    }
+    return names, expressions
+
+
+def iter_representation(serializer_class, rows):
+    """
+    Renders `.values()` rows with the serializer's own fields, giving what
+    `serializer_class(instances, many=True).data` would without building
+    model instances or walking related objects
+    """
+    fields = serializer_class().fields
+    columns = [
+        (name, lookup if isinstance(lookup, str) else name, fields[name])
+        for name, lookup in serializer_class.Meta.values.items()
+    ]
+    for row in rows:
+        yield {
+            name: None if row[key] is None else field.to_representation(row[key])
+            for name, key, field in columns
+        }
+
+
+def values_to_representation(serializer_class, rows):
+    return list(iter_representation(serializer_class, rows))
+
+
+class FastListMixin:
+    """
+    Lists rows straight from `.values()` when the list serializer declares
+    `Meta.values`, and renders them with `FastJSONRenderer`. Actions other
+    than `list` in `list_actions` return `self.list()` the same way.
+    """
+
+    list_actions = ("list",)
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action not in self.list_actions:
+            return renderers
+        return [
+            FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+            for renderer in renderers
+        ]
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if not hasattr(getattr(serializer_class, "Meta", None), "values"):
+            return super().list(request, *args, **kwargs)
+
+        names, expressions = values_lookups(serializer_class)
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *names, **expressions
+        )
+        page = self.paginate_queryset(queryset)
+        with measure_serializer():
+            data = values_to_representation(
+                serializer_class, queryset if page is None else page
+            )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class SerializerMetricsMixin:
+    """
+    `self.serialized(serializer)` is the serializer's `.data`, timed as the
+    request's serializer time. The model mixins below are DRF's timing only
+    that step; put them after `FastListMixin`, which times its own rows.
+    """
+
+    @staticmethod
+    def serialized(serializer):
+        with measure_serializer():
+            return serializer.data
+
+
+class ListModelMixin(SerializerMetricsMixin, mixins.ListModelMixin):
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(self.serialized(serializer))
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(self.serialized(serializer))
+
+
+class RetrieveModelMixin(SerializerMetricsMixin, mixins.RetrieveModelMixin):
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(self.serialized(serializer))
+
+
+class CreateModelMixin(SerializerMetricsMixin, mixins.CreateModelMixin):
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        data = self.serialized(serializer)
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+
+class UpdateModelMixin(SerializerMetricsMixin, mixins.UpdateModelMixin):
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        if getattr(instance, "_prefetched_objects_cache", None):
+            # If 'prefetch_related' has been applied to a queryset, we need to
+            # forcibly invalidate the prefetch cache on the instance.
+            instance._prefetched_objects_cache = {}
+
+        return Response(self.serialized(serializer))
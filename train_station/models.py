@@ -1,30 +1,17 @@
 import os
-import time
 import uuid
 
 from django.core.exceptions import ValidationError
 from django.utils.text import slugify
 from geopy.distance import geodesic
-from geopy.exc import GeocoderTimedOut
-from geopy.geocoders import Nominatim
 
 from django.conf import settings
 from django.db import models
-from django.db.models import CASCADE
+from django.db.models import CASCADE, Max
 
-
-def get_coordinates(city_name):
-    for attempt in range(5):
-        try:
-            geolocator = Nominatim(user_agent="train_station_v1.0")
-            location = geolocator.geocode(city_name)
-            if location:
-                return location.latitude, location.longitude
-            raise ValueError(f"Coordinates for '{city_name}' could not be found!")
-        except GeocoderTimedOut as error:
-            print(f"Geocoder timed out again: {error}")
-            if attempt < 5:
-                time.sleep(0.5)
+from train_station.geocoding import get_coordinates
+from train_station.geohash import encode as encode_geohash
+from train_station.seating import SeatMap
 
 
 def crew_image_file_path(instance, filename):
@@ -47,21 +34,64 @@ class Crew(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+class GeocodedCity(models.Model):
+    """Persistent geocoding cache keyed by the normalized city name"""
+
+    name = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    provider = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name_plural = "geocoded cities"
+
+
+class TableVersion(models.Model):
+    """
+    Change counter of a model's table, bumped after every committed write,
+    so conditional GETs are answered without building the response
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
 class Station(models.Model):
     name = models.CharField(max_length=255)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # geohash of the coordinates, empty without them, filled in by `save`
+    # so bulk writes must set it themselves
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False)
+
+    @property
+    def coordinates(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return self.latitude, self.longitude
 
     def save(self, *args, **kwargs):
-        if not self.latitude or not self.longitude:
-            coordinates = get_coordinates(self.name)
-            self.latitude = coordinates[0]
-            self.longitude = coordinates[1]
+        if self.coordinates is None:
+            self.latitude, self.longitude = get_coordinates(self.name)
+        self.geohash = encode_geohash(*self.coordinates) if self.coordinates else ""
         super(Station, self).save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["geohash"], name="station_geohash_idx"),
+        ]
+
 
 class Route(models.Model):
     source = models.ForeignKey(Station, on_delete=CASCADE, related_name="source_routes")
@@ -77,12 +107,17 @@ class Route(models.Model):
 
     def calculate_distance(self):
         """
-        Returns the integer distance of 2 cities based on their name.
-        Coordinates returned by the `get_coordinates` and counted kilometers by 'geodesic'
+        Returns the integer distance in kilometers between the route stations.
+        Uses the stored station coordinates, falling back to `get_coordinates`
+        for stations saved without them, and counts kilometers by 'geodesic'
         """
         try:
-            coord_source = get_coordinates(self.source.name)
-            coord_destination = get_coordinates(self.destination.name)
+            coord_source = self.source.coordinates or get_coordinates(
+                self.source.name
+            )
+            coord_destination = self.destination.coordinates or get_coordinates(
+                self.destination.name
+            )
         except ValueError as error:
             raise ValueError(f"Error in getting coordinates: {error}")
 
@@ -109,6 +144,30 @@ class Train(models.Model):
     places_in_cargo = models.IntegerField()
     train_type = models.ForeignKey(TrainType, on_delete=CASCADE, related_name="trains")
 
+    def clean(self):
+        """Rejects a layout without room for the seats sold on the train"""
+        if self.pk is None:
+            return
+        sold = Ticket.objects.filter(journey__train=self).aggregate(
+            cargo=Max("cargo"), seat=Max("seat")
+        )
+        errors = {}
+        for sold_value, train_attr_name in [
+            (sold["cargo"], "cargo_num"),
+            (sold["seat"], "places_in_cargo"),
+        ]:
+            if sold_value is not None and sold_value > getattr(self, train_attr_name):
+                errors[train_attr_name] = (
+                    f"{train_attr_name} must be at least {sold_value}, "
+                    f"tickets are sold up to it"
+                )
+        if errors:
+            raise ValidationError(errors)
+
+    def save(self, *args, **kwargs):
+        self.full_clean()
+        return super(Train, self).save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -122,6 +181,23 @@ class Journey(models.Model):
     crew = models.ManyToManyField(Crew, related_name="journeys")
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    seat_map = models.BinaryField(default=bytes, editable=False)
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
+
+    @property
+    def seating(self):
+        """
+        `SeatMap` over the stored occupancy bitmap, kept in step with
+        tickets by `train_station.signals` and the bulk ordering paths,
+        and rebuilt by them when the journey's train or its layout changes.
+        """
+        return SeatMap(
+            self.train.cargo_num, self.train.places_in_cargo, self.seat_map
+        )
+
+    @property
+    def tickets_available(self):
+        return self.train.cargo_num * self.train.places_in_cargo - self.seats_taken
 
     def __str__(self):
         departure_time = self.departure_time.strftime("%Y-%m-%d %H:%M")
@@ -131,6 +207,44 @@ class Journey(models.Model):
         ordering = ["-departure_time"]
         indexes = [
             models.Index(fields=["route", "departure_time", "arrival_time"]),
+            models.Index(
+                fields=["departure_time", "id"], name="journey_departure_id_idx"
+            ),
+        ]
+
+
+class RouteDailyAvailability(models.Model):
+    """
+    Seats of a route on one service day, the departure date in the
+    default time zone, maintained by `train_station.availability`
+    """
+
+    route = models.ForeignKey(
+        Route, on_delete=CASCADE, related_name="daily_availability"
+    )
+    service_date = models.DateField()
+    journeys = models.PositiveIntegerField(default=0)
+    capacity = models.PositiveIntegerField(default=0)
+    sold = models.PositiveIntegerField(default=0)
+
+    @property
+    def available(self):
+        return self.capacity - self.sold
+
+    def __str__(self):
+        return f"{self.route} {self.service_date}: {self.sold}/{self.capacity}"
+
+    class Meta:
+        verbose_name_plural = "route daily availability"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["route", "service_date"], name="unique_route_service_date"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["service_date", "route"], name="availability_date_route_idx"
+            ),
         ]
 
 
@@ -145,6 +259,11 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"], name="order_user_created_id_idx"
+            ),
+        ]
 
 
 class Ticket(models.Model):
@@ -0,0 +1,162 @@
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+DEFAULT_SETTINGS = {
+    "PAGE_SIZE": 20,
+    "MAX_PAGE_SIZE": 100,
+}
+
+
+def pagination_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "KEYSET_PAGINATION", {})}
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the whole `ordering` tuple rather than on
+    its first field plus an offset, so rows sharing a departure time or a
+    creation timestamp never shift between pages while rows are inserted.
+    The last ordering field must be unique.
+    """
+
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        config = pagination_settings()
+        self.page_size = config["PAGE_SIZE"]
+        self.max_page_size = config["MAX_PAGE_SIZE"]
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip("-")
+            value = (
+                instance[name]
+                if isinstance(instance, dict)
+                else getattr(instance, name)
+            )
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return json.dumps(values)
+
+    def keyset_filter(self, position, reverse):
+        """
+        Rows after `position` in the page order, `a < x OR (a = x AND b < y)`
+        for `(a, b)`, ANDed with `a <= x` so the database can read them as
+        one range of an index leading with the first ordering field
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") != reverse else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        if len(values) > 1:
+            field = self.ordering[0]
+            lookup = "lte" if field.startswith("-") != reverse else "gte"
+            condition &= Q(**{f"{field.lstrip('-')}__{lookup}": values[0]})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` fetching the page with the async ORM"""
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """The unevaluated page of `queryset` plus one row, None if unpaginated"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            _, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(
+                *(
+                    field[1:] if field.startswith("-") else f"-{field}"
+                    for field in self.ordering
+                )
+            )
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self.keyset_filter(current_position, reverse))
+
+        self.reverse, self.current_position = reverse, current_position
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        reverse, current_position = self.reverse, self.current_position
+        self.page = results[: self.page_size]
+
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class JourneyPagination(KeysetPagination):
+    ordering = ("-departure_time", "-id")
+
+
+class JourneySearchPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class RoutePagination(KeysetPagination):
+    ordering = ("id",)
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class RouteAvailabilityPagination(KeysetPagination):
+    ordering = ("service_date", "id")
@@ -0,0 +1,306 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.apps import apps
+from django.conf import settings
+
+DEFAULT_SETTINGS = {
+    "MIN_TRANSFER_MINUTES": 10,
+    "MAX_TRANSFERS": 5,
+    "REBUILD_INTERVAL": 300,
+}
+
+
+def planner_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "JOURNEY_PLANNER", {})}
+
+
+class Connection(NamedTuple):
+    departure_time: object
+    arrival_time: object
+    source_id: int
+    destination_id: int
+    journey_id: int
+    route_id: int
+
+
+class Network:
+    """
+    In-memory view of the timetable: `Route` rows as a distance weighted
+    adjacency graph and `Journey` rows as connections sorted by departure.
+    Built from two queries and kept current through model signals.
+    """
+
+    def __init__(self):
+        self.stations = {}
+        self.routes = {}
+        self.adjacency = defaultdict(dict)
+        self.pairs = defaultdict(set)
+        self.journeys = {}
+        self.connections = []
+        self.built_at = time.monotonic()
+        self.lock = threading.RLock()
+
+    @classmethod
+    def build(cls):
+        Station = apps.get_model("train_station", "Station")
+        Route = apps.get_model("train_station", "Route")
+        Journey = apps.get_model("train_station", "Journey")
+
+        network = cls()
+        network.stations = dict(Station.objects.values_list("id", "name"))
+        for route_id, source_id, destination_id, distance in Route.objects.values_list(
+            "id", "source_id", "destination_id", "distance"
+        ):
+            network._add_route(route_id, source_id, destination_id, distance)
+
+        for (
+            journey_id,
+            route_id,
+            departure_time,
+            arrival_time,
+        ) in Journey.objects.order_by().values_list(
+            "id", "route_id", "departure_time", "arrival_time"
+        ):
+            source_id, destination_id, _ = network.routes[route_id]
+            network.journeys[journey_id] = Connection(
+                departure_time,
+                arrival_time,
+                source_id,
+                destination_id,
+                journey_id,
+                route_id,
+            )
+        network.connections = sorted(network.journeys.values())
+        return network
+
+    def _add_route(self, route_id, source_id, destination_id, distance):
+        self.routes[route_id] = (source_id, destination_id, distance)
+        self.pairs[source_id, destination_id].add(route_id)
+        self._link(source_id, destination_id)
+
+    def _link(self, source_id, destination_id):
+        """Points the edge of a station pair at its shortest route, if any"""
+        candidates = [
+            (self.routes[route_id][2], route_id)
+            for route_id in self.pairs[source_id, destination_id]
+            if self.routes[route_id][2] is not None
+        ]
+        if candidates:
+            self.adjacency[source_id][destination_id] = min(candidates)
+        else:
+            self.adjacency[source_id].pop(destination_id, None)
+
+    def update_station(self, station_id, name):
+        with self.lock:
+            self.stations[station_id] = name
+
+    def remove_station(self, station_id):
+        with self.lock:
+            self.stations.pop(station_id, None)
+
+    def update_route(self, route_id, source_id, destination_id, distance):
+        """
+        Replaces the route's edge and moves its journeys' connections to
+        the new stations, so a route edit keeps its timetable
+        """
+        with self.lock:
+            previous = self.routes.get(route_id)
+            if previous is not None:
+                self.pairs[previous[:2]].discard(route_id)
+            self._add_route(route_id, source_id, destination_id, distance)
+            if previous is None or previous[:2] == (source_id, destination_id):
+                return
+            self._link(*previous[:2])
+            for connection in [
+                c for c in self.journeys.values() if c.route_id == route_id
+            ]:
+                self.update_journey(
+                    connection.journey_id,
+                    route_id,
+                    connection.departure_time,
+                    connection.arrival_time,
+                )
+
+    def remove_route(self, route_id):
+        with self.lock:
+            route = self.routes.pop(route_id, None)
+            if route is None:
+                return
+            self.pairs[route[:2]].discard(route_id)
+            self._link(*route[:2])
+            for connection in [
+                c for c in self.journeys.values() if c.route_id == route_id
+            ]:
+                self.remove_journey(connection.journey_id)
+
+    def update_journey(self, journey_id, route_id, departure_time, arrival_time):
+        with self.lock:
+            self.remove_journey(journey_id)
+            source_id, destination_id, _ = self.routes[route_id]
+            connection = Connection(
+                departure_time,
+                arrival_time,
+                source_id,
+                destination_id,
+                journey_id,
+                route_id,
+            )
+            self.journeys[journey_id] = connection
+            insort(self.connections, connection)
+
+    def remove_journey(self, journey_id):
+        with self.lock:
+            connection = self.journeys.pop(journey_id, None)
+            if connection is not None:
+                index = bisect_left(self.connections, connection)
+                del self.connections[index]
+
+    def shortest_path(self, source_id, destination_id):
+        """Dijkstra over routes, returns `(distance, [route ids])` or None"""
+        with self.lock:
+            distances = {source_id: 0}
+            parents = {}
+            queue = [(0, source_id)]
+            while queue:
+                distance, station_id = heapq.heappop(queue)
+                if station_id == destination_id:
+                    break
+                if distance > distances[station_id]:
+                    continue
+                for next_id, (weight, route_id) in self.adjacency[station_id].items():
+                    candidate = distance + weight
+                    if candidate < distances.get(next_id, candidate + 1):
+                        distances[next_id] = candidate
+                        parents[next_id] = (station_id, route_id)
+                        heapq.heappush(queue, (candidate, next_id))
+            else:
+                return None
+
+        route_ids = []
+        station_id = destination_id
+        while station_id != source_id:
+            station_id, route_id = parents[station_id]
+            route_ids.append(route_id)
+        return distances[destination_id], route_ids[::-1]
+
+    def earliest_arrival(self, source_id, destination_id, departure_time, min_transfer):
+        """
+        Connection Scan: one pass over connections departing after
+        `departure_time`. Changing trains needs `min_transfer` at a station.
+        Returns the list of connections taken or None.
+        """
+        arrivals = {}
+        ready = {source_id: departure_time}
+        parents = {}
+        with self.lock:
+            start = bisect_left(self.connections, (departure_time,))
+            for connection in self.connections[start:]:
+                best = arrivals.get(destination_id)
+                if best is not None and connection.departure_time >= best:
+                    break
+                boarding = ready.get(connection.source_id)
+                if boarding is None or boarding > connection.departure_time:
+                    continue
+                arrival = arrivals.get(connection.destination_id)
+                if arrival is None or connection.arrival_time < arrival:
+                    arrivals[connection.destination_id] = connection.arrival_time
+                    parents[connection.destination_id] = connection
+                    if connection.destination_id != source_id:
+                        ready[connection.destination_id] = (
+                            connection.arrival_time + min_transfer
+                        )
+
+        if destination_id not in parents:
+            return None
+        legs = []
+        station_id = destination_id
+        while station_id != source_id:
+            connection = parents[station_id]
+            legs.append(connection)
+            station_id = connection.source_id
+        return legs[::-1]
+
+    def fewest_transfers(
+        self, source_id, destination_id, departure_time, min_transfer, max_transfers
+    ):
+        """
+        Round based scan in the spirit of RAPTOR: round `k` only boards at
+        stations reached within `k` legs, so the first round that reaches
+        the destination gives the fewest transfers, with the earliest
+        arrival among such itineraries.
+        Returns the list of connections taken or None.
+        """
+        ready = {source_id: departure_time}
+        rounds = []
+        with self.lock:
+            start = bisect_left(self.connections, (departure_time,))
+            connections = self.connections[start:]
+
+        for _ in range(max_transfers + 1):
+            arrivals = {}
+            parents = {}
+            for connection in connections:
+                boarding = ready.get(connection.source_id)
+                if boarding is None or boarding > connection.departure_time:
+                    continue
+                arrival = arrivals.get(connection.destination_id)
+                if arrival is None or connection.arrival_time < arrival:
+                    arrivals[connection.destination_id] = connection.arrival_time
+                    parents[connection.destination_id] = connection
+            rounds.append(parents)
+
+            if destination_id in parents:
+                break
+            improved = False
+            for station_id, arrival in arrivals.items():
+                boarding = arrival + min_transfer
+                current = ready.get(station_id)
+                if station_id != source_id and (current is None or boarding < current):
+                    ready[station_id] = boarding
+                    improved = True
+            if not improved:
+                return None
+        else:
+            return None
+
+        legs = []
+        station_id = destination_id
+        for parents in reversed(rounds):
+            connection = parents[station_id]
+            legs.append(connection)
+            station_id = connection.source_id
+            if station_id == source_id:
+                break
+        return legs[::-1]
+
+
+_network = None
+_network_lock = threading.Lock()
+
+
+def get_network():
+    """Returns the process wide network, building it on first use"""
+    global _network
+    interval = planner_settings()["REBUILD_INTERVAL"]
+    with _network_lock:
+        if _network is None or (
+            interval and time.monotonic() - _network.built_at > interval
+        ):
+            _network = Network.build()
+        return _network
+
+
+def current_network():
+    """Returns the network if it was already built, without building it"""
+    return _network
+
+
+def reset_network():
+    global _network
+    with _network_lock:
+        _network = None
@@ -0,0 +1,206 @@
+from django.apps import apps
+from django.db import transaction
+
+from train_station.availability import schedule_refresh, service_date
+from train_station.caching import bump_versions
+
+
+class SeatMap:
+    """
+    Occupancy bitmap of a journey: seat `s` of cargo `c` is bit
+    `(c - 1) * places_in_cargo + (s - 1)`, least significant bit first.
+    """
+
+    def __init__(self, cargo_num, places_in_cargo, data=b""):
+        self.cargo_num = cargo_num
+        self.places_in_cargo = places_in_cargo
+        size = (cargo_num * places_in_cargo + 7) // 8
+        self.bits = bytearray(bytes(data)[:size].ljust(size, b"\0"))
+
+    @property
+    def capacity(self):
+        return self.cargo_num * self.places_in_cargo
+
+    def _index(self, cargo, seat):
+        if not (1 <= cargo <= self.cargo_num and 1 <= seat <= self.places_in_cargo):
+            raise ValueError(f"Seat {cargo}/{seat} is out of the train")
+        return (cargo - 1) * self.places_in_cargo + seat - 1
+
+    def is_taken(self, cargo, seat):
+        index = self._index(cargo, seat)
+        return bool(self.bits[index // 8] >> (index % 8) & 1)
+
+    def take(self, cargo, seat):
+        index = self._index(cargo, seat)
+        self.bits[index // 8] |= 1 << (index % 8)
+
+    def release(self, cargo, seat):
+        index = self._index(cargo, seat)
+        self.bits[index // 8] &= ~(1 << (index % 8)) & 0xFF
+
+    def as_int(self):
+        return int.from_bytes(self.bits, "little")
+
+    def cargo_mask(self, cargo):
+        """Occupancy of one cargo as an int, bit `seat - 1` set when taken"""
+        return (self.as_int() >> (cargo - 1) * self.places_in_cargo) & (
+            (1 << self.places_in_cargo) - 1
+        )
+
+    def cargo_bitstring(self, cargo):
+        """One character per seat of a cargo, "1" when taken"""
+        return format(self.cargo_mask(cargo), f"0{self.places_in_cargo}b")[::-1]
+
+    def cargo_runs(self, cargo):
+        """Run-length encoded cargo as `[taken, length]` pairs, taken is 0 or 1"""
+        runs = []
+        for state in self.cargo_bitstring(cargo):
+            if runs and runs[-1][0] == int(state):
+                runs[-1][1] += 1
+            else:
+                runs.append([int(state), 1])
+        return runs
+
+    def allocate(self, count, together=True):
+        """
+        Picks `count` free seats without taking them. With `together`
+        the first run of adjacent free seats in one cargo is preferred,
+        then any seats of a single cargo, then the first free seats of
+        the train. Returns `(cargo, seat)` pairs or None if the train
+        has fewer free seats.
+        """
+        if count > self.capacity - self.taken_count():
+            return None
+
+        if together:
+            for cargo in range(1, self.cargo_num + 1):
+                start = self.cargo_bitstring(cargo).find("0" * count)
+                if start != -1:
+                    return [
+                        (cargo, seat) for seat in range(start + 1, start + count + 1)
+                    ]
+            free_by_cargo = self.free_by_cargo()
+            cargo = max(free_by_cargo, key=free_by_cargo.get)
+            if free_by_cargo[cargo] >= count:
+                return self.free_seats(cargo)[:count]
+
+        seats = []
+        for cargo in range(1, self.cargo_num + 1):
+            seats.extend(self.free_seats(cargo)[: count - len(seats)])
+            if len(seats) == count:
+                break
+        return seats
+
+    def free_seats(self, cargo):
+        return [
+            (cargo, seat)
+            for seat, state in enumerate(self.cargo_bitstring(cargo), 1)
+            if state == "0"
+        ]
+
+    def taken_count(self):
+        return self.as_int().bit_count()
+
+    def free_by_cargo(self):
+        value = self.as_int()
+        full = (1 << self.places_in_cargo) - 1
+        return {
+            cargo: self.places_in_cargo
+            - ((value >> (cargo - 1) * self.places_in_cargo) & full).bit_count()
+            for cargo in range(1, self.cargo_num + 1)
+        }
+
+    def to_bytes(self):
+        return bytes(self.bits)
+
+
+def lock_journeys(journey_ids):
+    """
+    Locks journey rows in id order, so concurrent orders spanning several
+    journeys cannot deadlock, and returns them by id with their trains.
+    Must run inside a transaction.
+    """
+    Journey = apps.get_model("train_station", "Journey")
+    return {
+        journey.id: journey
+        for journey in Journey.objects.select_for_update(of=("self",))
+        .select_related("train")
+        .filter(pk__in=journey_ids)
+        .order_by("id")
+    }
+
+
+def save_seat_map(journey, seat_map):
+    """
+    Stores the occupancy of `journey` with an update, not `save()`: of the
+    `Journey` receivers only the response cache and route availability
+    depend on seats, and those are refreshed here
+    """
+    Journey = apps.get_model("train_station", "Journey")
+    journey.seat_map = seat_map.to_bytes()
+    journey.seats_taken = seat_map.taken_count()
+    Journey.objects.filter(pk=journey.pk).update(
+        seat_map=journey.seat_map, seats_taken=journey.seats_taken
+    )
+    bump_versions(Journey)
+    schedule_refresh({(journey.route_id, service_date(journey.departure_time))})
+
+
+def _update_journey_seats(journey_id, seats, taken):
+    with transaction.atomic():
+        journey = lock_journeys([journey_id]).get(journey_id)
+        if journey is None:
+            return
+        seat_map = journey.seating
+        for cargo, seat in seats:
+            if taken:
+                seat_map.take(cargo, seat)
+            else:
+                seat_map.release(cargo, seat)
+        save_seat_map(journey, seat_map)
+
+
+def reserve_seats(journey_id, seats):
+    """Marks `(cargo, seat)` pairs taken, locking the journey row"""
+    _update_journey_seats(journey_id, seats, taken=True)
+
+
+def release_seats(journey_id, seats):
+    """Marks `(cargo, seat)` pairs free, locking the journey row"""
+    _update_journey_seats(journey_id, seats, taken=False)
+
+
+def build_seat_maps(journeys, tickets):
+    """
+    Rebuilds occupancy from scratch. `journeys` maps journey ids to
+    `(cargo_num, places_in_cargo)`, `tickets` yields
+    `(journey_id, cargo, seat)`. Returns `{journey_id: SeatMap}`.
+    """
+    seat_maps = {
+        journey_id: SeatMap(cargo_num, places_in_cargo)
+        for journey_id, (cargo_num, places_in_cargo) in journeys.items()
+    }
+    for journey_id, cargo, seat in tickets:
+        seat_maps[journey_id].take(cargo, seat)
+    return seat_maps
+
+
+def rebuild_seat_maps(journey_ids):
+    """
+    Rebuilds the bitmaps of `journey_ids` from their tickets, as needed
+    when a journey's train or a train's layout changes. Locks the rows.
+    """
+    Ticket = apps.get_model("train_station", "Ticket")
+    with transaction.atomic():
+        journeys = lock_journeys(journey_ids)
+        seat_maps = build_seat_maps(
+            {
+                journey.id: (journey.train.cargo_num, journey.train.places_in_cargo)
+                for journey in journeys.values()
+            },
+            Ticket.objects.filter(journey_id__in=list(journeys)).values_list(
+                "journey_id", "cargo", "seat"
+            ),
+        )
+        for journey_id, seat_map in seat_maps.items():
+            save_seat_map(journeys[journey_id], seat_map)
@@ -1,6 +1,6 @@
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from django.db.models import ExpressionWrapper, F, IntegerField, Prefetch
 from rest_framework import serializers
 
 from train_station.models import (
@@ -12,7 +12,9 @@ from train_station.models import (
     Journey,
     Order,
     Ticket,
+    RouteDailyAvailability,
 )
+from train_station.seating import lock_journeys, save_seat_map
 
 
 class CrewSerializer(serializers.ModelSerializer):
@@ -34,6 +36,37 @@ class StationSerializer(serializers.ModelSerializer):
         read_only_fields = ("latitude", "longitude")
 
 
+class StationAutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(help_text="Start of the station name or a word")
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class StationAutocompleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    routes = serializers.IntegerField()
+
+
+class StationNearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(
+        min_value=0,
+        max_value=1000,
+        required=False,
+        help_text="Stations at most this far, the nearest ones when missing",
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class StationNearbySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+    distance = serializers.FloatField(help_text="Kilometers from the point")
+
+
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
@@ -48,12 +81,23 @@ class RouteListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance")
+        select_related = ("source", "destination")
+        only = ("id", "distance", "source__name", "destination__name")
+        values = {
+            "id": "id",
+            "source": "source__name",
+            "destination": "destination__name",
+            "distance": "distance",
+        }
 
 
 class RouteDetailSerializer(RouteSerializer):
     source = StationSerializer(read_only=True)
     destination = StationSerializer(read_only=True)
 
+    class Meta(RouteSerializer.Meta):
+        select_related = ("source", "destination")
+
 
 class TrainTypeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -71,10 +115,23 @@ class TrainSerializer(serializers.ModelSerializer):
 class TrainListSerializer(TrainSerializer):
     train_type = serializers.CharField(source="train_type.name", read_only=True)
 
+    class Meta(TrainSerializer.Meta):
+        select_related = ("train_type",)
+        values = {
+            "id": "id",
+            "name": "name",
+            "cargo_num": "cargo_num",
+            "places_in_cargo": "places_in_cargo",
+            "train_type": "train_type__name",
+        }
+
 
 class TrainDetailSerializer(TrainSerializer):
     train_type = TrainTypeSerializer(read_only=True)
 
+    class Meta(TrainSerializer.Meta):
+        select_related = ("train_type",)
+
 
 class JourneySerializer(serializers.ModelSerializer):
     class Meta:
@@ -101,6 +158,31 @@ class JourneyListSerializer(JourneySerializer):
             "departure_time",
             "arrival_time",
         )
+        select_related = ("route__source", "route__destination", "train")
+        only = (
+            "id",
+            "departure_time",
+            "arrival_time",
+            "seats_taken",
+            "route__source__name",
+            "route__destination__name",
+            "train__name",
+            "train__cargo_num",
+            "train__places_in_cargo",
+        )
+        values = {
+            "id": "id",
+            "route_source": "route__source__name",
+            "route_destination": "route__destination__name",
+            "train": "train__name",
+            "tickets_available": ExpressionWrapper(
+                F("train__cargo_num") * F("train__places_in_cargo")
+                - F("seats_taken"),
+                output_field=IntegerField(),
+            ),
+            "departure_time": "departure_time",
+            "arrival_time": "arrival_time",
+        }
 
 
 class JourneyDetailSerializer(serializers.ModelSerializer):
@@ -124,30 +206,97 @@ class JourneyDetailSerializer(serializers.ModelSerializer):
             "departure_time",
             "arrival_time",
         )
+        select_related = (
+            "route__source",
+            "route__destination",
+            "train__train_type",
+        )
+        prefetch_related = ("crew",)
 
     def to_representation(self, instance):
         queryset = Crew.objects.prefetch_related("full_name")
         return super().to_representation(instance)
 
     def get_tickets_available_by_cargo(self, obj):
-        max_seats = obj.train.places_in_cargo
-        cargos = obj.train.cargo_num
+        return obj.seating.free_by_cargo()
 
-        tickets_count_by_cargo = (
-            obj.tickets.values("cargo")
-            .annotate(ticket_count=Count("cargo"))
-            .values("cargo", "ticket_count")
-        )
 
-        free_seats = {i: max_seats for i in range(1, cargos + 1)}
+class JourneySeatsSerializer(serializers.ModelSerializer):
+    """
+    Occupancy grid of a journey. `encoding` from the context picks the
+    per-cargo form: "bitstring" ("1" is a taken seat), "rle" as
+    `[taken, run length]` pairs or "expanded" lists of seat numbers.
+    """
 
-        for ticket in tickets_count_by_cargo:
-            free_seats[ticket["cargo"]] -= ticket["ticket_count"]
+    ENCODINGS = ("bitstring", "rle", "expanded")
 
-        return free_seats
+    cargo_num = serializers.IntegerField(source="train.cargo_num", read_only=True)
+    places_in_cargo = serializers.IntegerField(
+        source="train.places_in_cargo", read_only=True
+    )
+    tickets_available = serializers.IntegerField(read_only=True)
+    encoding = serializers.SerializerMethodField()
+    seats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Journey
+        fields = (
+            "id",
+            "cargo_num",
+            "places_in_cargo",
+            "seats_taken",
+            "tickets_available",
+            "encoding",
+            "seats",
+        )
+        select_related = ("train",)
+
+    def get_encoding(self, obj):
+        return self.context.get("encoding", "bitstring")
+
+    def get_seats(self, obj):
+        seat_map = obj.seating
+        encoding = self.get_encoding(obj)
+        seats = {}
+        for cargo in range(1, seat_map.cargo_num + 1):
+            if encoding == "rle":
+                seats[cargo] = seat_map.cargo_runs(cargo)
+            elif encoding == "expanded":
+                bitstring = seat_map.cargo_bitstring(cargo)
+                seats[cargo] = {
+                    "free": [i for i, bit in enumerate(bitstring, 1) if bit == "0"],
+                    "taken": [i for i, bit in enumerate(bitstring, 1) if bit == "1"],
+                }
+            else:
+                seats[cargo] = seat_map.cargo_bitstring(cargo)
+        return seats
+
+
+class PrefetchedJourneyField(serializers.PrimaryKeyRelatedField):
+    """
+    Journey primary key field resolved from `context["journeys"]`
+    when the parent serializer has loaded the journeys in bulk
+    """
+
+    def to_internal_value(self, data):
+        journeys = self.context.get("journeys")
+        if journeys is None:
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            journey = journeys.get(int(data))
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if journey is None:
+            self.fail("does_not_exist", pk_value=data)
+        return journey
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    journey = PrefetchedJourneyField(queryset=Journey.objects.select_related("train"))
+
     def validate(self, attrs):
         data = super().validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -158,6 +307,8 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "cargo", "seat", "journey")
+        # seat collisions are checked for the whole order by OrderSerializer
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
@@ -165,20 +316,239 @@ class TicketListSerializer(TicketSerializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
+    UNIQUE_SEAT_MESSAGE = "The fields cargo, seat, journey must make a unique set."
+
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
         model = Order
         fields = ("id", "tickets", "created_at")
 
+    def to_internal_value(self, data):
+        self.context["journeys"] = self.prefetch_journeys(data)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def prefetch_journeys(data):
+        """Loads every journey of the order with its train in one query"""
+        journey_ids = set()
+        tickets = data.get("tickets") if hasattr(data, "get") else None
+        for ticket in tickets if isinstance(tickets, list) else []:
+            if not isinstance(ticket, dict) or isinstance(ticket.get("journey"), bool):
+                continue
+            try:
+                journey_ids.add(int(ticket.get("journey")))
+            except (TypeError, ValueError):
+                continue
+        return Journey.objects.select_related("train").in_bulk(journey_ids)
+
+    def seat_errors(self, tickets_data, seat_maps):
+        """
+        Per ticket errors for seats already taken on `seat_maps`
+        or repeated within the order, None when all seats are free
+        """
+        errors = []
+        ordered = set()
+        for ticket_data in tickets_data:
+            journey_id = ticket_data["journey"].id
+            seat = (journey_id, ticket_data["cargo"], ticket_data["seat"])
+            if seat in ordered or seat_maps[journey_id].is_taken(*seat[1:]):
+                errors.append(
+                    {
+                        "non_field_errors": [
+                            serializers.ErrorDetail(
+                                self.UNIQUE_SEAT_MESSAGE, code="unique"
+                            )
+                        ]
+                    }
+                )
+            else:
+                errors.append({})
+            ordered.add(seat)
+        return errors if any(errors) else None
+
+    def validate_tickets(self, tickets_data):
+        seat_maps = {
+            ticket_data["journey"].id: ticket_data["journey"].seating
+            for ticket_data in tickets_data
+        }
+        errors = self.seat_errors(tickets_data, seat_maps)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return tickets_data
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-            return order
+        tickets_data = validated_data.pop("tickets")
+        try:
+            with transaction.atomic():
+                journeys = lock_journeys(
+                    {ticket_data["journey"].id for ticket_data in tickets_data}
+                )
+                seat_maps = {
+                    journey_id: journey.seating
+                    for journey_id, journey in journeys.items()
+                }
+                errors = self.seat_errors(tickets_data, seat_maps)
+                if errors:
+                    raise serializers.ValidationError({"tickets": errors})
+
+                order = Order.objects.create(**validated_data)
+                Ticket.objects.bulk_create(
+                    [Ticket(order=order, **ticket_data) for ticket_data in tickets_data]
+                )
+                for ticket_data in tickets_data:
+                    seat_maps[ticket_data["journey"].id].take(
+                        ticket_data["cargo"], ticket_data["seat"]
+                    )
+                for journey_id, journey in journeys.items():
+                    save_seat_map(journey, seat_maps[journey_id])
+                return order
+        except IntegrityError:
+            # the seat bitmap missed a ticket, `rebuild_seat_maps` repairs it
+            raise serializers.ValidationError(
+                {"tickets": [self.UNIQUE_SEAT_MESSAGE]}, code="unique"
+            )
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        prefetch_related = (
+            Prefetch(
+                "tickets",
+                queryset=Ticket.objects.select_related(
+                    "journey__route__source",
+                    "journey__route__destination",
+                    "journey__train",
+                ),
+            ),
+        )
+
+
+class OrderAllocateSerializer(serializers.Serializer):
+    """Orders `seats` tickets of a journey, letting the server pick the seats"""
+
+    journey = serializers.PrimaryKeyRelatedField(queryset=Journey.objects.all())
+    seats = serializers.IntegerField(min_value=1)
+    together = serializers.BooleanField(default=True)
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            journey_id = validated_data["journey"].id
+            journey = lock_journeys([journey_id])[journey_id]
+            seat_map = journey.seating
+            seats = seat_map.allocate(
+                validated_data["seats"], together=validated_data["together"]
+            )
+            if seats is None:
+                raise serializers.ValidationError(
+                    {"seats": f"Only {journey.tickets_available} seats are left."}
+                )
+
+            for cargo, seat in seats:
+                seat_map.take(cargo, seat)
+            save_seat_map(journey, seat_map)
+
+            order = Order.objects.create(user=validated_data["user"])
+            Ticket.objects.bulk_create(
+                [
+                    Ticket(order=order, journey=journey, cargo=cargo, seat=seat)
+                    for cargo, seat in seats
+                ]
+            )
+            return order
+
+    def to_representation(self, instance):
+        return OrderSerializer(instance, context=self.context).data
+
+
+class JourneyPlanQuerySerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    departure_time = serializers.DateTimeField(required=False)
+    mode = serializers.ChoiceField(
+        choices=("earliest", "transfers", "distance"), default="earliest"
+    )
+    min_transfer = serializers.IntegerField(
+        min_value=0, required=False, help_text="Minimum transfer time in minutes"
+    )
+
+    def validate(self, attrs):
+        if attrs["source"] == attrs["destination"]:
+            raise serializers.ValidationError(
+                "source and destination must be different stations"
+            )
+        return attrs
+
+
+class JourneySearchQuerySerializer(serializers.Serializer):
+    min_seats = serializers.IntegerField(min_value=1, default=1)
+
+    def get_fields(self):
+        # `from` is a keyword, so the station params can't be declared above
+        return {
+            "from": serializers.CharField(
+                min_length=2, help_text="Part of the departure station name"
+            ),
+            "to": serializers.CharField(
+                min_length=2, help_text="Part of the arrival station name"
+            ),
+            **super().get_fields(),
+        }
+
+
+class JourneyPlanLegSerializer(serializers.Serializer):
+    journey = serializers.IntegerField(allow_null=True)
+    route = serializers.IntegerField()
+    source = serializers.CharField()
+    destination = serializers.CharField()
+    distance = serializers.IntegerField(allow_null=True)
+    departure_time = serializers.DateTimeField(allow_null=True)
+    arrival_time = serializers.DateTimeField(allow_null=True)
+
+
+class JourneyPlanSerializer(serializers.Serializer):
+    mode = serializers.CharField()
+    transfers = serializers.IntegerField()
+    distance = serializers.IntegerField()
+    departure_time = serializers.DateTimeField(allow_null=True)
+    arrival_time = serializers.DateTimeField(allow_null=True)
+    legs = JourneyPlanLegSerializer(many=True)
+
+
+class RouteAvailabilityQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if (
+            "date_from" in attrs
+            and "date_to" in attrs
+            and attrs["date_from"] > attrs["date_to"]
+        ):
+            raise serializers.ValidationError("date_from must not be after date_to")
+        return attrs
+
+
+class RouteDailyAvailabilitySerializer(serializers.ModelSerializer):
+    source = serializers.CharField(source="route.source.name", read_only=True)
+    destination = serializers.CharField(
+        source="route.destination.name", read_only=True
+    )
+    available = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = RouteDailyAvailability
+        fields = (
+            "id",
+            "route",
+            "source",
+            "destination",
+            "service_date",
+            "journeys",
+            "capacity",
+            "sold",
+            "available",
+        )
+        select_related = ("route__source", "route__destination")
@@ -0,0 +1,236 @@
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from train_station.autocomplete import current_index, reset_index
+from train_station.availability import journey_keys, schedule_refresh, service_date
+from train_station.caching import bump_versions
+from train_station.models import (
+    Crew,
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Journey,
+    Ticket,
+    RouteDailyAvailability,
+)
+from train_station.planner import current_network, reset_network
+from train_station.seating import rebuild_seat_maps, reserve_seats, release_seats
+
+
+@receiver(post_save, sender=Station)
+def update_network_station(sender, instance, **kwargs):
+    network = current_network()
+    if network is not None:
+        network.update_station(instance.id, instance.name)
+
+
+@receiver(post_delete, sender=Station)
+def remove_network_station(sender, instance, **kwargs):
+    network = current_network()
+    if network is not None:
+        network.remove_station(instance.id)
+
+
+@receiver(post_save, sender=Route)
+def update_network_route(sender, instance, **kwargs):
+    network = current_network()
+    if network is not None:
+        network.update_route(
+            instance.id,
+            instance.source_id,
+            instance.destination_id,
+            instance.distance,
+        )
+
+
+@receiver(post_delete, sender=Route)
+def remove_network_route(sender, instance, **kwargs):
+    network = current_network()
+    if network is not None:
+        network.remove_route(instance.id)
+
+
+@receiver(post_save, sender=Station)
+def update_index_station(sender, instance, **kwargs):
+    index = current_index()
+    if index is not None:
+        index.update_station(instance.id, instance.name)
+
+
+@receiver(post_delete, sender=Station)
+def remove_index_station(sender, instance, **kwargs):
+    index = current_index()
+    if index is not None:
+        index.remove_station(instance.id)
+
+
+@receiver(post_save, sender=Route)
+def count_index_route(sender, instance, created, **kwargs):
+    index = current_index()
+    if index is None:
+        return
+    if not created:
+        # the stations may have changed, recount on the next search
+        reset_index()
+        return
+    index.count_route(instance.source_id, instance.destination_id)
+
+
+@receiver(post_delete, sender=Route)
+def uncount_index_route(sender, instance, **kwargs):
+    index = current_index()
+    if index is not None:
+        index.count_route(instance.source_id, instance.destination_id, step=-1)
+
+
+@receiver(post_save, sender=Journey)
+def update_network_journey(sender, instance, **kwargs):
+    network = current_network()
+    if network is None:
+        return
+    if instance.route_id not in network.routes:
+        reset_network()
+        return
+    network.update_journey(
+        instance.id,
+        instance.route_id,
+        instance.departure_time,
+        instance.arrival_time,
+    )
+
+
+@receiver(post_delete, sender=Journey)
+def remove_network_journey(sender, instance, **kwargs):
+    network = current_network()
+    if network is not None:
+        network.remove_journey(instance.id)
+
+
+SEAT_FIELDS = {"journey", "journey_id", "cargo", "seat"}
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_seat(sender, instance, update_fields=None, **kwargs):
+    instance._previous_seat = None
+    if instance._state.adding or (
+        update_fields is not None and not SEAT_FIELDS & set(update_fields)
+    ):
+        return
+    instance._previous_seat = (
+        Ticket.objects.filter(pk=instance.pk)
+        .values_list("journey_id", "cargo", "seat")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def reserve_ticket_seat(sender, instance, created, **kwargs):
+    seat = (instance.journey_id, instance.cargo, instance.seat)
+    previous = getattr(instance, "_previous_seat", None)
+    if not created and previous in (None, seat):
+        return
+    if previous is not None:
+        release_seats(previous[0], [previous[1:]])
+    reserve_seats(instance.journey_id, [seat[1:]])
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, **kwargs):
+    release_seats(instance.journey_id, [(instance.cargo, instance.seat)])
+
+
+CACHED_MODELS = (
+    Crew,
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Journey,
+    Ticket,
+    RouteDailyAvailability,
+)
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    bump_versions(sender)
+
+
+# connected per model: a receiver of every sender would stop Django from
+# fast deleting rows of any model
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+@receiver(m2m_changed, sender=Journey.crew.through)
+def invalidate_journey_crew(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_versions(Journey)
+
+
+AVAILABILITY_FIELDS = {"route", "route_id", "train", "train_id", "departure_time"}
+
+
+@receiver(pre_save, sender=Journey)
+def remember_journey_service_day(sender, instance, update_fields=None, **kwargs):
+    instance._previous_service_day = None
+    instance._previous_train_id = None
+    if instance._state.adding or (
+        update_fields is not None and not AVAILABILITY_FIELDS & set(update_fields)
+    ):
+        return
+    previous = (
+        Journey.objects.filter(pk=instance.pk)
+        .values_list("route_id", "departure_time", "train_id")
+        .first()
+    )
+    if previous is not None:
+        instance._previous_service_day = (previous[0], service_date(previous[1]))
+        instance._previous_train_id = previous[2]
+
+
+@receiver(post_save, sender=Journey)
+def rebuild_journey_seat_map(sender, instance, created, **kwargs):
+    previous_train_id = getattr(instance, "_previous_train_id", None)
+    if not created and previous_train_id not in (None, instance.train_id):
+        rebuild_seat_maps([instance.id])
+
+
+@receiver(post_save, sender=Journey)
+def refresh_journey_availability(sender, instance, **kwargs):
+    keys = {(instance.route_id, service_date(instance.departure_time))}
+    if getattr(instance, "_previous_service_day", None):
+        keys.add(instance._previous_service_day)
+    schedule_refresh(keys)
+
+
+@receiver(post_delete, sender=Journey)
+def refresh_deleted_journey_availability(sender, instance, **kwargs):
+    schedule_refresh({(instance.route_id, service_date(instance.departure_time))})
+
+
+@receiver(pre_save, sender=Train)
+def remember_train_layout(sender, instance, **kwargs):
+    instance._previous_layout = None
+    if not instance._state.adding:
+        instance._previous_layout = (
+            Train.objects.filter(pk=instance.pk)
+            .values_list("cargo_num", "places_in_cargo")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Train)
+def rebuild_train_seat_maps(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_layout", None)
+    if previous not in (None, (instance.cargo_num, instance.places_in_cargo)):
+        rebuild_seat_maps(
+            list(Journey.objects.filter(train=instance).values_list("id", flat=True))
+        )
+
+
+@receiver(post_save, sender=Train)
+def refresh_train_availability(sender, instance, created, **kwargs):
+    if not created:
+        schedule_refresh(journey_keys(Journey.objects.filter(train=instance)))
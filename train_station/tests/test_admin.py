@@ -0,0 +1,39 @@
+import csv
+import json
+
+from django.urls import reverse
+
+from train_station.models import Ticket
+from train_station.tests.test_factories import BaseTestCase, sample_ticket
+
+
+class OrderAdminExportTests(BaseTestCase):
+    url = reverse("admin:train_station_order_changelist")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        sample_ticket(order=self.order, journey=self.journey, seat=3)
+
+    def export(self, action):
+        res = self.client.post(
+            self.url, {"action": action, "_selected_action": [self.order.id]}
+        )
+        self.assertTrue(res.streaming)
+        return b"".join(res.streaming_content).decode()
+
+    def test_export_csv(self):
+        rows = list(csv.DictReader(self.export("export_csv").splitlines()))
+
+        tickets = Ticket.objects.filter(order=self.order).order_by("id")
+        self.assertEqual(
+            [(int(row["ticket"]), int(row["seat"])) for row in rows],
+            [(ticket.id, ticket.seat) for ticket in tickets],
+        )
+        self.assertEqual(rows[0]["user"], self.user.email)
+
+    def test_export_ndjson(self):
+        rows = [json.loads(line) for line in self.export("export_ndjson").splitlines()]
+
+        self.assertEqual({row["order"] for row in rows}, {self.order.id})
+        self.assertEqual(rows[0]["source"], self.journey.route.source.name)
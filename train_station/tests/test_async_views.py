@@ -0,0 +1,105 @@
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.tests.test_factories import BaseTestCase
+
+
+@override_settings(RESPONSE_CACHE={"ENABLED": False})
+class AsyncReadViewTests(BaseTestCase):
+    def assertSameResponse(self, sync_url, async_url, params=None):
+        expected = self.client.get(sync_url, params)
+        res = self.client.get(async_url, params)
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(res["Content-Type"], expected["Content-Type"])
+        self.assertEqual(res.content, expected.content)
+        return res
+
+    def test_journey_list(self):
+        res = self.assertSameResponse(
+            reverse("train_station:journey-list"),
+            reverse("train_station:async-journey-list"),
+            {"route": self.journey.route_id, "page_size": 1},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_journey_list_next_page(self):
+        first = self.client.get(
+            reverse("train_station:async-journey-list"), {"page_size": 1}
+        )
+
+        res = self.client.get(first.data["next"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data["results"], first.data["results"])
+
+    def test_journey_detail_and_seats(self):
+        for name in ("journey-detail", "journey-seats"):
+            res = self.assertSameResponse(
+                reverse(f"train_station:{name}", args=[self.journey.id]),
+                reverse(f"train_station:async-{name}", args=[self.journey.id]),
+                {"encoding": "rle"} if name == "journey-seats" else None,
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_route_search_and_availability(self):
+        self.assertSameResponse(
+            reverse("train_station:route-list"),
+            reverse("train_station:async-route-list"),
+            {"source": self.route.source_id},
+        )
+        self.assertSameResponse(
+            reverse("train_station:routedailyavailability-list"),
+            reverse("train_station:async-routedailyavailability-list"),
+        )
+
+    def test_errors(self):
+        url = reverse("train_station:async-journey-seats", args=[self.journey.id])
+
+        self.assertEqual(
+            self.client.get(url, {"encoding": "hex"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse("train_station:async-journey-detail", args=[0])
+            ).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(APIClient().get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_conditional_get(self):
+        url = reverse("train_station:async-journey-list")
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_served_by_the_async_handler(self):
+        authorization = self.client._credentials["HTTP_AUTHORIZATION"]
+
+        res = await AsyncClient().get(
+            reverse("train_station:async-journey-list"),
+            headers={"authorization": authorization},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()["results"]), 2)
+
+
+class AsyncResponseCacheTests(BaseTestCase):
+    def test_cached_response(self):
+        url = reverse("train_station:async-journey-detail", args=[self.journey.id])
+        first = self.client.get(url)
+
+        # only the table versions
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.models import TokenUser
+
+from train_station.models import Order
+from train_station.tests.test_factories import BaseTestCase
+
+STATION_URL = reverse("train_station:station-list")
+ORDER_URL = reverse("train_station:order-list")
+
+
+class ClaimsJWTAuthenticationTests(BaseTestCase):
+    def test_obtained_tokens_carry_claims(self):
+        res = APIClient().post(
+            reverse("user:token_obtain_pair"),
+            {"email": "testuser@test.com", "password": "testpass"},
+        )
+
+        access = tokens.AccessToken(res.data["access"])
+        self.assertEqual(access["email"], "testuser@test.com")
+        self.assertTrue(access["is_staff"])
+
+    def test_reads_use_the_token_user(self):
+        self.client.get(STATION_URL)
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.wsgi_request.user, TokenUser)
+        self.assertEqual(
+            len(res.data["results"]), Order.objects.filter(user=self.user).count()
+        )
+
+    def test_writes_load_the_user(self):
+        res = self.client.post(STATION_URL, {"name": "Paris"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIsInstance(res.wsgi_request.user, get_user_model())
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(STATION_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTHENTICATION={"STATE_TIMEOUT": 0})
+    def test_state_of_other_workers_expires(self):
+        self.client.get(STATION_URL)
+        # a change made by another process sends no signal here
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_outdated_staff_claim_loads_the_user(self):
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.wsgi_request.user, get_user_model())
+        self.assertFalse(res.wsgi_request.user.is_staff)
+
+    def test_tokens_without_claims_load_the_user(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION="Bearer "
+            f"{tokens.RefreshToken.for_user(self.user).access_token}"
+        )
+
+        res = client.get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.wsgi_request.user, get_user_model())
@@ -0,0 +1,101 @@
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+
+from train_station.autocomplete import StationIndex, fold, get_index, reset_index
+from train_station.tests.test_factories import (
+    BaseTestCase,
+    sample_route,
+    sample_station,
+)
+
+AUTOCOMPLETE_URL = reverse("train_station:station-autocomplete")
+
+
+class StationIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = StationIndex()
+        for station_id, name in enumerate(
+            ("Lviv-Holovnyi", "Lyon Part-Dieu", "Łódź Fabryczna", "Zürich HB"), 1
+        ):
+            self.index.update_station(station_id, name)
+
+    def names(self, query, limit=10):
+        return [match["name"] for match in self.index.search(query, limit)]
+
+    def test_fold(self):
+        self.assertEqual(fold(" Zürich  HB "), "zurich hb")
+        self.assertEqual(fold("Lviv-Holovnyi"), "lviv holovnyi")
+        self.assertEqual(fold("Kraków Główny"), "krakow glowny")
+        self.assertEqual(fold("Østerport, Straße"), "osterport strasse")
+
+    def test_prefix_of_name_or_word(self):
+        self.assertEqual(self.names("ly"), ["Lyon Part-Dieu"])
+        self.assertEqual(self.names("ZURICH"), ["Zürich HB"])
+        self.assertEqual(self.names("holov"), ["Lviv-Holovnyi"])
+        self.assertEqual(self.names("lviv hol"), ["Lviv-Holovnyi"])
+        self.assertEqual(self.names("dieu"), ["Lyon Part-Dieu"])
+        self.assertEqual(self.names("lodz"), ["Łódź Fabryczna"])
+        self.assertEqual(self.names("xyz"), [])
+        self.assertEqual(self.names("-"), [])
+
+    def test_ranked_by_routes(self):
+        self.index.count_route(2, 4)
+
+        self.assertEqual(
+            self.names("l"), ["Lyon Part-Dieu", "Lviv-Holovnyi", "Łódź Fabryczna"]
+        )
+        self.assertEqual(self.names("l", limit=1), ["Lyon Part-Dieu"])
+
+    def test_update_and_remove(self):
+        self.assertEqual(self.names("lv"), ["Lviv-Holovnyi"])
+
+        self.index.update_station(2, "Marseille")
+        self.index.remove_station(1)
+
+        self.assertEqual(self.names("l"), ["Łódź Fabryczna"])
+        self.assertEqual(self.names("lv"), [])
+        self.assertEqual(self.names("mars"), ["Marseille"])
+
+
+class StationAutocompleteViewTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        reset_index()
+
+    def test_autocomplete(self):
+        sample_route(source=self.station1, destination=self.station2)
+        sample_station(name="Kharkiv", latitude=49.99, longitude=36.23)
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "khar"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data[0], {"id": self.station1.id, "name": "Kharkiv", "routes": 1}
+        )
+        self.assertEqual(len(res.data), 2)
+
+    def test_no_queries_once_built(self):
+        self.client.get(AUTOCOMPLETE_URL, {"q": "o"})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "os", "limit": 1})
+
+        self.assertEqual([match["name"] for match in res.data], ["Oslo"])
+
+    def test_follows_changes(self):
+        get_index()
+        station = sample_station(name="Częstochowa", latitude=50.8, longitude=19.1)
+        self.station2.delete()
+
+        self.assertEqual(
+            self.client.get(AUTOCOMPLETE_URL, {"q": "czest"}).data[0]["id"], station.id
+        )
+        self.assertEqual(self.client.get(AUTOCOMPLETE_URL, {"q": "par"}).data, [])
+
+    def test_invalid(self):
+        for params in ({}, {"q": "os", "limit": 0}):
+            with self.subTest(params=params):
+                res = self.client.get(AUTOCOMPLETE_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
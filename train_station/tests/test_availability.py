@@ -0,0 +1,140 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from train_station.models import RouteDailyAvailability
+from train_station.tests.test_factories import (
+    BaseTestCase,
+    sample_journey,
+    sample_route,
+    sample_station,
+    sample_train,
+)
+
+AVAILABILITY_URL = reverse("train_station:routedailyavailability-list")
+
+
+class RouteDailyAvailabilityTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.kyiv_lviv = sample_route(
+            source=sample_station(name="Kyiv"), destination=sample_station(name="Lviv")
+        )
+        self.train = sample_train(cargo_num=2, places_in_cargo=10)
+        self.day = date(2030, 5, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.morning = self.add_journey(8)
+            self.evening = self.add_journey(20)
+
+    def add_journey(self, hour, day=None):
+        departure_time = datetime.combine(
+            day or self.day, datetime.min.time(), dt_timezone.utc
+        ) + timedelta(hours=hour)
+        return sample_journey(
+            route=self.kyiv_lviv,
+            train=self.train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def summary(self, day=None):
+        return RouteDailyAvailability.objects.filter(
+            route=self.kyiv_lviv, service_date=day or self.day
+        ).first()
+
+    def test_new_journeys_are_summed(self):
+        summary = self.summary()
+
+        self.assertEqual(summary.journeys, 2)
+        self.assertEqual(summary.capacity, 40)
+        self.assertEqual(summary.sold, 0)
+
+    def test_booking_updates_sold_seats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("train_station:order-list"),
+                {
+                    "tickets": [
+                        {"cargo": 1, "seat": 1, "journey": self.morning.id},
+                        {"cargo": 1, "seat": 1, "journey": self.evening.id},
+                        {"cargo": 2, "seat": 4, "journey": self.evening.id},
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.summary().sold, 3)
+        self.assertEqual(self.summary().available, 37)
+
+    def test_moved_and_deleted_journeys(self):
+        next_day = self.day + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evening.departure_time += timedelta(days=1)
+            self.evening.save()
+
+        self.assertEqual(self.summary().journeys, 1)
+        self.assertEqual(self.summary(next_day).journeys, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.evening.delete()
+
+        self.assertIsNone(self.summary(next_day))
+
+    def test_train_layout_change(self):
+        self.train.places_in_cargo = 20
+        with self.captureOnCommitCallbacks(execute=True):
+            self.train.save()
+
+        self.assertEqual(self.summary().capacity, 80)
+
+    def test_refresh_command(self):
+        RouteDailyAvailability.objects.all().delete()
+        out = StringIO()
+
+        call_command("refresh_route_availability", "--from", "2030-05-01", stdout=out)
+
+        self.assertIn("Stored 1 route days", out.getvalue())
+        self.assertEqual(self.summary().journeys, 2)
+        self.assertEqual(self.summary().capacity, 40)
+
+    def test_endpoint_filters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_journey(9, day=self.day + timedelta(days=3))
+
+        res = self.client.get(
+            AVAILABILITY_URL,
+            {
+                "route": self.kyiv_lviv.id,
+                "date_from": "2030-05-01",
+                "date_to": "2030-05-02",
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [
+                {
+                    "id": self.summary().id,
+                    "route": self.kyiv_lviv.id,
+                    "source": "Kyiv",
+                    "destination": "Lviv",
+                    "service_date": "2030-05-01",
+                    "journeys": 2,
+                    "capacity": 40,
+                    "sold": 0,
+                    "available": 40,
+                }
+            ],
+        )
+
+    def test_endpoint_rejects_reversed_range(self):
+        res = self.client.get(
+            AVAILABILITY_URL, {"date_from": "2030-05-02", "date_to": "2030-05-01"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
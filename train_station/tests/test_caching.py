@@ -0,0 +1,220 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models.deletion import Collector
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.caching import bump_versions, get_table_versions
+from train_station.models import Crew, GeocodedCity, Journey, Route, TableVersion
+
+from train_station.tests.test_factories import (
+    BaseTestCase,
+    sample_ticket,
+)
+from user.tokens import RefreshToken
+
+JOURNEY_URL = reverse("train_station:journey-list")
+ROUTE_URL = reverse("train_station:route-list")
+STATION_URL = reverse("train_station:station-list")
+
+
+class ResponseCacheTests(BaseTestCase):
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get(STATION_URL)
+
+        # the user's state was read by the first request
+        with self.assertNumQueries(0):
+            second = self.client.get(STATION_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_actions_are_cached(self):
+        url = reverse("train_station:journey-seats", args=[self.journey.id])
+        first = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_query_params_are_normalized(self):
+        self.client.get(JOURNEY_URL, {"route": self.route.id, "page_size": 5})
+
+        # only the table versions
+        with self.assertNumQueries(1):
+            self.client.get(JOURNEY_URL, {"page_size": 5, "route": self.route.id})
+
+    def test_if_none_match(self):
+        etag = self.client.get(STATION_URL)["ETag"]
+
+        res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertEqual(res.content, b"")
+
+    def test_change_invalidates_dependent_responses(self):
+        etag = self.client.get(ROUTE_URL)["ETag"]
+        source = self.route.source
+        source.name = "Kyiv-Pasazhyrskyi"
+        with self.captureOnCommitCallbacks(execute=True):
+            source.save()
+
+        res = self.client.get(ROUTE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        sources = {route["source"] for route in res.data["results"]}
+        self.assertIn("Kyiv-Pasazhyrskyi", sources)
+
+    def test_unrelated_change_keeps_cache(self):
+        self.client.get(STATION_URL)
+        self.journey.departure_time = self.journey.arrival_time
+        self.journey.save()
+
+        with self.assertNumQueries(0):
+            self.client.get(STATION_URL)
+
+    def test_uncached_models_keep_fast_delete(self):
+        collector = Collector(using="default")
+
+        self.assertTrue(collector.can_fast_delete(GeocodedCity.objects.all()))
+        self.assertFalse(collector.can_fast_delete(Crew.objects.all()))
+
+    def test_booking_refreshes_availability(self):
+        url = reverse("train_station:journey-detail", args=[self.journey.id])
+        available = self.client.get(url).data["tickets_available"]
+
+        sample_ticket(journey=self.journey, seat=20)
+
+        self.assertEqual(self.client.get(url).data["tickets_available"], available - 1)
+
+    def test_roles_are_cached_apart(self):
+        self.client.get(STATION_URL)
+        user = get_user_model().objects.create_user(
+            email="passenger@test.com", password="testpass"
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+        )
+
+        with self.assertNumQueries(2):
+            client.get(STATION_URL)
+
+    def test_writes_are_not_cached(self):
+        self.client.get(STATION_URL)
+
+        res = self.client.post(STATION_URL, {"name": "Paris"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        names = [station["name"] for station in self.client.get(STATION_URL).data]
+        self.assertEqual(names.count("Paris"), 2)
+
+    @override_settings(RESPONSE_CACHE={"ENABLED": False})
+    def test_disabled(self):
+        self.client.get(STATION_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(STATION_URL)
+
+        self.assertNotIn("ETag", res)
+
+
+class ConditionalGetTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_versions(Journey, Route)
+        # Last-Modified is only sent once the second of the change is over
+        self.updated_at = timezone.now().replace(microsecond=500000) - timedelta(
+            minutes=1
+        )
+        TableVersion.objects.update(updated_at=self.updated_at)
+
+    def test_table_versions(self):
+        versions = get_table_versions([Journey, Route])
+
+        self.assertEqual(versions["train_station.journey"][0], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.journey.save()
+
+        self.assertEqual(get_table_versions([Journey])["train_station.journey"][0], 2)
+        self.assertEqual(get_table_versions([Route])["train_station.route"][0], 1)
+
+    def test_if_none_match_is_answered_from_versions(self):
+        res = self.client.get(JOURNEY_URL)
+        self.assertIn("Last-Modified", res)
+
+        # only the table versions
+        with self.assertNumQueries(1):
+            res = self.client.get(JOURNEY_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get(ROUTE_URL)["ETag"]
+
+        res = self.client.get(
+            ROUTE_URL, {"source": self.route.source_id}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_committed_change_modifies(self):
+        etag = self.client.get(JOURNEY_URL)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_ticket(journey=self.journey, seat=20)
+
+        res = self.client.get(JOURNEY_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(ROUTE_URL)["Last-Modified"]
+
+        res = self.client.get(ROUTE_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        TableVersion.objects.filter(name="train_station.route").update(
+            updated_at=TableVersion.objects.get(name="train_station.route").updated_at
+            + timedelta(seconds=5)
+        )
+        res = self.client.get(ROUTE_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_last_modified_covers_the_whole_second(self):
+        last_modified = self.client.get(ROUTE_URL)["Last-Modified"]
+        self.assertEqual(last_modified, http_date(self.updated_at.timestamp() + 0.5))
+
+        TableVersion.objects.filter(name="train_station.route").update(
+            updated_at=self.updated_at + timedelta(milliseconds=300)
+        )
+        res = self.client.get(ROUTE_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        TableVersion.objects.filter(name="train_station.route").update(
+            updated_at=timezone.now()
+        )
+        res = self.client.get(ROUTE_URL)
+        self.assertNotIn("Last-Modified", res)
+        res = self.client.get(ROUTE_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_none_match_any(self):
+        res = self.client.get(JOURNEY_URL, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        missing = reverse("train_station:journey-detail", args=[self.journey.id + 100])
+        res = self.client.get(missing, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,229 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from train_station.models import Station, Route, Journey
+from train_station.tests.test_factories import sample_journey, sample_ticket
+
+
+def write_file(suffix, content):
+    file = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False)
+    file.write(content)
+    file.close()
+    return file.name
+
+
+class ImportNetworkCommandTests(TestCase):
+    def setUp(self):
+        self.stations_path = write_file(
+            ".csv",
+            "name,latitude,longitude\n"
+            "Kyiv,,\n"
+            "Paris,,\n"
+            "Nowhere,50.0,30.0\n"
+            "kyiv,,\n",
+        )
+        self.routes_path = write_file(
+            ".jsonl",
+            "\n".join(
+                json.dumps(row)
+                for row in [
+                    {"source": "Kyiv", "destination": "Paris"},
+                    {"source": "Paris", "destination": "Kyiv", "distance": 2000},
+                    {"source": "Kyiv", "destination": "Paris"},
+                    {"source": "Kyiv", "destination": "Lviv"},
+                    {"source": "Kyiv", "destination": "kyiv"},
+                ]
+            ),
+        )
+
+    def tearDown(self):
+        os.remove(self.stations_path)
+        os.remove(self.routes_path)
+
+    def import_network(self):
+        stdout = StringIO()
+        call_command(
+            "import_network",
+            stations=self.stations_path,
+            routes=self.routes_path,
+            batch_size=2,
+            stdout=stdout,
+            stderr=StringIO(),
+        )
+        return stdout.getvalue()
+
+    def test_import_network(self):
+        self.import_network()
+
+        self.assertEqual(
+            sorted(Station.objects.values_list("name", flat=True)),
+            ["Kyiv", "Lviv", "Nowhere", "Paris"],
+        )
+        self.assertEqual(Station.objects.get(name="Kyiv").latitude, 50.4500336)
+        self.assertEqual(
+            Route.objects.get(source__name="Kyiv", destination__name="Paris").distance,
+            2031,
+        )
+        self.assertEqual(
+            Route.objects.get(source__name="Paris", destination__name="Kyiv").distance,
+            2000,
+        )
+        self.assertEqual(Route.objects.count(), 3)
+
+    def test_import_network_is_idempotent(self):
+        self.import_network()
+        output = self.import_network()
+
+        self.assertEqual(Station.objects.count(), 4)
+        self.assertEqual(Route.objects.count(), 3)
+        self.assertIn("Created 0 stations", output)
+        self.assertIn("Created 0 routes", output)
+
+    def test_stored_stations_match_ignoring_case(self):
+        Station.objects.create(name="PARIS", latitude=48.85, longitude=2.35)
+
+        output = self.import_network()
+
+        self.assertEqual(
+            sorted(Station.objects.values_list("name", flat=True)),
+            ["Kyiv", "Lviv", "Nowhere", "PARIS"],
+        )
+        self.assertIn("Created 2 stations", output)
+
+    def test_routes_stored_meanwhile_are_not_counted(self):
+        def store_route_meanwhile(sources, destinations, mode):
+            if not Route.objects.exists():
+                Route.objects.create(
+                    source=Station.objects.get(name="Kyiv"),
+                    destination=Station.objects.get(name="Paris"),
+                )
+            return [1] * len(sources)
+
+        with mock.patch(
+            "train_station.management.commands.import_network.batch_distances",
+            side_effect=store_route_meanwhile,
+        ):
+            output = self.import_network()
+
+        self.assertEqual(Route.objects.count(), 3)
+        self.assertIn("Created 2 routes", output)
+
+
+class RecomputeDistancesCommandTests(TestCase):
+    def test_recompute_distances(self):
+        source = Station.objects.create(name="Kyiv")
+        destination = Station.objects.create(name="Paris")
+        route = Route.objects.create(source=source, destination=destination, distance=1)
+        out = StringIO()
+
+        call_command("recompute_distances", stdout=out)
+
+        route.refresh_from_db()
+        self.assertEqual(route.distance, 2031)
+        self.assertIn("updated 1", out.getvalue())
+
+
+class RebuildSeatMapsCommandTests(TestCase):
+    def test_rebuild_seat_maps(self):
+        journey = sample_journey()
+        sample_ticket(journey=journey, cargo=2, seat=7)
+        Journey.objects.filter(id=journey.id).update(seat_map=b"", seats_taken=0)
+        out = StringIO()
+
+        call_command("rebuild_seat_maps", stdout=out)
+
+        journey.refresh_from_db()
+        self.assertEqual(journey.seats_taken, 1)
+        self.assertTrue(journey.seating.is_taken(2, 7))
+        self.assertIn("rebuilt 1", out.getvalue())
+
+
+class BenchmarkListsCommandTests(TestCase):
+    def test_benchmark_lists(self):
+        sample_journey()
+        out = StringIO()
+
+        call_command("benchmark_lists", "--repeat", "1", stdout=out)
+
+        output = out.getvalue()
+        for name in ("journeys: 1 rows", "routes: 1 rows", "trains: 1 rows"):
+            self.assertIn(name, output)
+
+
+class LoadtestCommandTests(TestCase):
+    options = (
+        "--current-database",
+        "--stations=6",
+        "--routes=10",
+        "--trains=2",
+        "--journeys=20",
+        "--tickets=30",
+        "--concurrency=1",
+        "--json",
+    )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_default_mix(self):
+        out = StringIO()
+
+        call_command("loadtest", *self.options, "--requests=60", stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["requests"], 60)
+        self.assertIn("GET journey-list", report["endpoints"])
+        self.assertEqual(Journey.objects.count(), 20)
+        for row in report["endpoints"].values():
+            self.assertEqual(row["server_errors"], 0)
+            self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+
+    def test_replay(self):
+        path = write_file(
+            ".jsonl",
+            '{"path": "/api/train-stations/journeys/", "params": {"page_size": 5}}\n'
+            "\n"
+            '{"method": "GET", "path": "/api/train-stations/stations/"}\n',
+        )
+        self.addCleanup(os.remove, path)
+        out = StringIO()
+
+        call_command("loadtest", *self.options, f"--replay={path}", stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            list(report["endpoints"]), ["GET journey-list", "GET station-list"]
+        )
+        self.assertEqual(report["endpoints"]["GET journey-list"]["client_errors"], 0)
+
+
+class BenchmarkAsyncCommandTests(TransactionTestCase):
+    def test_benchmark_async(self):
+        get_user_model().objects.create_user(
+            email="benchmark@test.com", password="testpass"
+        )
+        sample_journey()
+        out = StringIO()
+
+        call_command(
+            "benchmark_async",
+            "--endpoint=journeys",
+            "--endpoint=seats",
+            "--requests=4",
+            "--concurrency=2",
+            "--latency-ms=0",
+            "--host=testserver",
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("journeys: sync", output)
+        self.assertIn("seats: sync", output)
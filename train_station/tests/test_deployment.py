@@ -0,0 +1,40 @@
+import importlib
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from base.warmup import warm_up_database
+
+
+def production_settings(**environ):
+    with mock.patch.dict(os.environ, environ):
+        return importlib.reload(importlib.import_module("base.settings_production"))
+
+
+class ProductionSettingsTests(SimpleTestCase):
+    def test_pooled_connections(self):
+        settings = production_settings(DB_POOL_MAX_SIZE="4")
+
+        database = settings.DATABASES["default"]
+        self.assertFalse(settings.DEBUG)
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertEqual(database["OPTIONS"]["pool"]["max_size"], 4)
+        self.assertEqual(database["ENGINE"], "django.db.backends.postgresql")
+
+    def test_persistent_connections(self):
+        settings = production_settings(DB_POOL="false", ALLOWED_HOSTS="a.com, b.com")
+
+        database = settings.DATABASES["default"]
+        self.assertEqual(database["CONN_MAX_AGE"], 600)
+        self.assertNotIn("OPTIONS", database)
+        self.assertEqual(settings.ALLOWED_HOSTS, ["a.com", "b.com"])
+
+
+class WarmUpDatabaseTests(TestCase):
+    def test_warm_up_database(self):
+        with self.assertLogs("base.warmup", "INFO") as logs:
+            self.assertEqual(warm_up_database(), ["default"])
+
+        self.assertIn("Database default ready", logs.output[0])
@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase
+from geopy.distance import geodesic
+
+from train_station.distances import batch_distances
+
+KYIV = (50.4500336, 30.5241361)
+PARIS = (48.8588897, 2.3200410217200766)
+LOS_ANGELES = (34.0536909, -118.2427660)
+
+
+class BatchDistancesTests(SimpleTestCase):
+    def test_vincenty_matches_geodesic(self):
+        sources = [KYIV, PARIS, LOS_ANGELES, KYIV, (0, 0)]
+        destinations = [PARIS, LOS_ANGELES, KYIV, KYIV, (0.5, 179.7)]
+
+        self.assertEqual(
+            batch_distances(sources, destinations),
+            [
+                int(geodesic(source, destination).kilometers)
+                for source, destination in zip(sources, destinations)
+            ],
+        )
+
+    def test_haversine_is_close_to_geodesic(self):
+        (distance,) = batch_distances([KYIV], [LOS_ANGELES], mode="haversine")
+        self.assertAlmostEqual(
+            distance, geodesic(KYIV, LOS_ANGELES).kilometers, delta=0.005 * distance
+        )
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            batch_distances([KYIV], [PARIS], mode="flat")
@@ -1,10 +1,11 @@
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from train_station.throttling import get_backend
 from train_station.models import (
     Crew,
     Station,
@@ -15,6 +16,8 @@ from train_station.models import (
     Order,
     Ticket,
 )
+from user.authentication import user_states
+from user.tokens import RefreshToken
 
 
 def sample_crew(**params):
@@ -98,6 +101,9 @@ def sample_ticket(**params):
 
 class BaseTestCase(APITestCase):
     def setUp(self):
+        cache.clear()
+        get_backend().reset()
+        user_states.reset()
         self.client = APIClient()
         self.user = get_user_model().objects.create_superuser(
             email="testuser@test.com", password="testpass"
@@ -0,0 +1,79 @@
+import json
+import tempfile
+
+from django.test import TestCase
+
+from train_station.geocoding import (
+    BaseProvider,
+    GazetteerProvider,
+    Geocoder,
+    normalize_name,
+)
+from train_station.models import GeocodedCity, Station, Route
+
+
+class CountingProvider(BaseProvider):
+    name = "counting"
+
+    def __init__(self, places):
+        self.places = places
+        self.calls = 0
+
+    def geocode(self, city_name):
+        self.calls += 1
+        return self.places.get(city_name)
+
+
+class GeocoderTests(TestCase):
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("  New   York "), "new york")
+        self.assertEqual(normalize_name("KYIV"), normalize_name("kyiv"))
+
+    def test_gazetteer_json_provider(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as file:
+            json.dump({"Atlantis": [10.5, -20.25]}, file)
+            file.flush()
+            provider = GazetteerProvider(file.name)
+            self.assertEqual(provider.geocode("  atlantis"), (10.5, -20.25))
+            self.assertIsNone(provider.geocode("Lemuria"))
+
+    def test_provider_hit_is_cached(self):
+        provider = CountingProvider({"Atlantis": (10.5, -20.25)})
+        geocoder = Geocoder([provider])
+
+        self.assertEqual(geocoder.geocode("Atlantis"), (10.5, -20.25))
+        self.assertEqual(geocoder.geocode("ATLANTIS"), (10.5, -20.25))
+        self.assertEqual(provider.calls, 1)
+        self.assertTrue(GeocodedCity.objects.filter(name="atlantis").exists())
+
+        other_geocoder = Geocoder([provider])
+        self.assertEqual(other_geocoder.geocode("Atlantis"), (10.5, -20.25))
+        self.assertEqual(provider.calls, 1)
+
+    def test_geocode_many_deduplicates_names(self):
+        GeocodedCity.objects.create(name="lemuria", latitude=1.0, longitude=2.0)
+        provider = CountingProvider({"Atlantis": (10.5, -20.25)})
+        geocoder = Geocoder([provider])
+
+        resolved = geocoder.geocode_many(
+            ["Atlantis", "atlantis", "Lemuria", "Mu"], max_workers=2
+        )
+
+        self.assertEqual(resolved, {"atlantis": (10.5, -20.25), "lemuria": (1.0, 2.0)})
+        self.assertEqual(provider.calls, 2)
+        self.assertTrue(GeocodedCity.objects.filter(name="atlantis").exists())
+
+    def test_unknown_city_raises(self):
+        geocoder = Geocoder([CountingProvider({})])
+        with self.assertRaises(ValueError):
+            geocoder.geocode("Lemuria")
+
+    def test_route_distance_uses_stored_coordinates(self):
+        source = Station.objects.create(
+            name="Nowhere", latitude=50.4500336, longitude=30.5241361
+        )
+        destination = Station.objects.create(
+            name="Elsewhere", latitude=48.8588897, longitude=2.3200410217200766
+        )
+        route = Route.objects.create(source=source, destination=destination)
+        self.assertEqual(route.distance, 2031)
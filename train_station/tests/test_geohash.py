@@ -0,0 +1,117 @@
+import random
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+
+from train_station.distances import haversine
+from train_station.geohash import (
+    MAX_CELLS,
+    covering_prefixes,
+    encode,
+    prefix_range,
+    prefix_ranges,
+)
+from train_station.models import Station
+from train_station.tests.test_factories import BaseTestCase, sample_station
+from user.authentication import user_states
+
+NEARBY_URL = reverse("train_station:station-nearby")
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode(self):
+        self.assertEqual(encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(encode(57.64911, 10.40744), "u4pruydq")
+
+    def test_prefix_range(self):
+        self.assertEqual(prefix_range("u4p"), ("u4p", "u4q"))
+        self.assertEqual(prefix_range("u4z"), ("u4z", "u5"))
+        self.assertEqual(prefix_range("zz"), ("zz", None))
+        self.assertEqual(
+            prefix_ranges(["u4q", "zz", "u4p", "u4z"]),
+            [("u4p", "u4r"), ("u4z", "u5"), ("zz", None)],
+        )
+
+    def test_prefixes_cover_the_circle(self):
+        rng = random.Random(7)
+        for _ in range(300):
+            latitude = rng.choice((rng.uniform(-90, 90), rng.uniform(80, 90)))
+            longitude = rng.choice((rng.uniform(-180, 180), rng.uniform(179, 180)))
+            radius_km = rng.choice((0.05, 1, 25, 400, 3000))
+            prefixes = covering_prefixes(latitude, longitude, radius_km)
+            self.assertLessEqual(len(prefixes), MAX_CELLS)
+
+            for _ in range(20):
+                point = (
+                    latitude + rng.uniform(-1, 1) * radius_km / 111,
+                    longitude + rng.uniform(-1, 1) * radius_km / 10,
+                )
+                point = (
+                    max(min(point[0], 90), -90),
+                    (point[1] + 180) % 360 - 180,
+                )
+                if haversine(latitude, longitude, *point) > radius_km:
+                    continue
+                with self.subTest(center=(latitude, longitude), point=point):
+                    self.assertTrue(encode(*point).startswith(tuple(prefixes)))
+
+
+class StationNearbyViewTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.reykjavik = sample_station(
+            name="Reykjavik", latitude=64.1466, longitude=-21.9426
+        )
+        self.keflavik = sample_station(
+            name="Keflavik", latitude=64.0049, longitude=-22.5624
+        )
+        self.akureyri = sample_station(
+            name="Akureyri", latitude=65.6835, longitude=-18.0878
+        )
+
+    def test_within_radius(self):
+        res = self.client.get(
+            NEARBY_URL, {"lat": 64.14, "lon": -21.9, "radius_km": 100}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["id"] for station in res.data],
+            [self.reykjavik.id, self.keflavik.id],
+        )
+        self.assertLess(res.data[0]["distance"], 3)
+        self.assertAlmostEqual(res.data[1]["distance"], 34, delta=2)
+
+    def test_nearest(self):
+        res = self.client.get(NEARBY_URL, {"lat": 65.6, "lon": -18.1, "limit": 3})
+
+        self.assertEqual(
+            [station["id"] for station in res.data],
+            [self.akureyri.id, self.reykjavik.id, self.keflavik.id],
+        )
+
+    def test_geohash_is_kept(self):
+        self.reykjavik.latitude, self.reykjavik.longitude = 59.91, 10.75
+        self.reykjavik.save()
+
+        self.assertEqual(
+            Station.objects.get(id=self.reykjavik.id).geohash, encode(59.91, 10.75)
+        )
+
+    def test_one_query(self):
+        user_states.get(self.user.pk)
+
+        with self.assertNumQueries(1):
+            self.client.get(NEARBY_URL, {"lat": 64.14, "lon": -21.9, "radius_km": 5})
+
+    def test_invalid(self):
+        for params in (
+            {"lat": 91, "lon": 0},
+            {"lat": 0},
+            {"lat": 0, "lon": 0, "radius_km": -1},
+        ):
+            with self.subTest(params=params):
+                res = self.client.get(NEARBY_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
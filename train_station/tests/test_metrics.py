@@ -0,0 +1,122 @@
+import re
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from django.urls import NoReverseMatch, reverse
+from rest_framework import status
+from rest_framework.serializers import BaseSerializer
+
+from train_station.metrics import registry
+from train_station.tests.test_factories import BaseTestCase, sample_station
+from user.tokens import RefreshToken
+
+STATION_URL = reverse("train_station:station-list")
+METRICS_URL = reverse("metrics")
+
+
+class RequestMetricsTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        sample_station(name="Kyiv")
+
+    def test_server_timing(self):
+        res = self.client.get(STATION_URL)
+
+        timing = res["Server-Timing"]
+        for name in ("db;dur=", "queries", "serialize;dur=", "render;dur="):
+            self.assertIn(name, timing)
+        self.assertIn("total;dur=", timing)
+
+    def test_queries_are_counted_under_asgi(self):
+        token = RefreshToken.for_user(self.user).access_token
+        client = AsyncClient()
+
+        for name in ("journey-list", "async-journey-list"):
+            with self.subTest(name=name):
+                res = async_to_sync(client.get)(
+                    reverse(f"train_station:{name}"),
+                    headers={"authorization": f"Bearer {token}"},
+                )
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                queries = re.search(r'desc="(\d+) queries"', res["Server-Timing"])
+                self.assertGreater(int(queries[1]), 0)
+
+    def test_serializers_are_timed_in_the_views(self):
+        self.client.get(STATION_URL)
+
+        self.assertEqual(
+            BaseSerializer.data.fget.__module__, "rest_framework.serializers"
+        )
+        self.assertGreater(
+            registry.totals[("serializer_seconds_total", "train_station:station-list")],
+            0,
+        )
+
+    def test_only_serialization_counts_as_serializer_time(self):
+        def slow_filter(queryset):
+            time.sleep(0.2)
+            return queryset
+
+        with mock.patch(
+            "train_station.views.StationViewSet.filter_queryset",
+            side_effect=slow_filter,
+        ):
+            self.client.get(STATION_URL)
+
+        self.assertLess(
+            registry.totals[("serializer_seconds_total", "train_station:station-list")],
+            0.2,
+        )
+
+    def test_timed_views_gain_no_actions(self):
+        for name in ("station-detail", "crew-detail", "order-detail"):
+            with self.subTest(name=name):
+                with self.assertRaises(NoReverseMatch):
+                    reverse(f"train_station:{name}", args=[1])
+
+    def test_prometheus_endpoint(self):
+        self.client.get(STATION_URL)
+        self.client.get(STATION_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = res.content.decode()
+        self.assertIn(
+            'train_station_requests_total{view="train_station:station-list",'
+            'method="GET",status="200"} 2',
+            body,
+        )
+        self.assertIn(
+            "train_station_request_duration_seconds_count"
+            '{view="train_station:station-list"} 2',
+            body,
+        )
+        self.assertIn(
+            'train_station_db_queries_total{view="train_station:station-list"}', body
+        )
+
+    def test_endpoint_is_internal(self):
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="203.0.113.7")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS={"SAMPLE_RATE": 0})
+    def test_unsampled_requests_are_not_measured(self):
+        res = self.client.get(STATION_URL)
+
+        self.assertNotIn("Server-Timing", res)
+        self.assertNotIn("station-list", registry.render(0))
+
+    @override_settings(METRICS={"SLOW_REQUEST_MS": 0})
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.assertLogs("train_station.metrics", "WARNING") as logs:
+            self.client.get(STATION_URL)
+
+        self.assertIn("Slow request GET /api/train-stations/stations/", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
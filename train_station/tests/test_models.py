@@ -1,10 +1,17 @@
+from unittest import mock
+
 from django.core.exceptions import ValidationError
 
 from train_station.models import Ticket
+from train_station.seating import SeatMap
 from train_station.tests.test_factories import (
     BaseTestCase,
     sample_station,
     sample_route,
+    sample_journey,
+    sample_order,
+    sample_ticket,
+    sample_train,
 )
 
 
@@ -34,3 +41,113 @@ class TicketModelTest(BaseTestCase):
         ticket = Ticket(cargo=1, seat=123, journey=self.journey, order=self.order)
         with self.assertRaises(ValidationError):
             ticket.full_clean()
+
+
+class JourneySeatMapTest(BaseTestCase):
+    def test_seat_map_bits(self):
+        seat_map = SeatMap(cargo_num=3, places_in_cargo=5)
+        seat_map.take(1, 1)
+        seat_map.take(2, 5)
+        seat_map.take(3, 2)
+        seat_map.release(3, 2)
+
+        self.assertTrue(seat_map.is_taken(2, 5))
+        self.assertFalse(seat_map.is_taken(3, 2))
+        self.assertEqual(seat_map.taken_count(), 2)
+        self.assertEqual(seat_map.free_by_cargo(), {1: 4, 2: 4, 3: 5})
+        with self.assertRaises(ValueError):
+            seat_map.take(4, 1)
+
+    def test_seat_map_allocate(self):
+        seat_map = SeatMap(cargo_num=2, places_in_cargo=4)
+        seat_map.take(1, 2)
+        seat_map.take(2, 3)
+
+        self.assertEqual(seat_map.allocate(2), [(1, 3), (1, 4)])
+        self.assertEqual(seat_map.allocate(3), [(1, 1), (1, 3), (1, 4)])
+        self.assertEqual(seat_map.allocate(3, together=False), [(1, 1), (1, 3), (1, 4)])
+        self.assertEqual(len(seat_map.allocate(6)), 6)
+        self.assertIsNone(seat_map.allocate(7))
+
+    def test_tickets_update_seat_map(self):
+        journey = sample_journey()
+        first = sample_ticket(journey=journey, cargo=1, seat=1)
+        sample_ticket(journey=journey, cargo=2, seat=3)
+
+        journey.refresh_from_db()
+        self.assertEqual(journey.seats_taken, 2)
+        self.assertEqual(journey.tickets_available, 248)
+        self.assertTrue(journey.seating.is_taken(2, 3))
+
+        first.delete()
+        journey.refresh_from_db()
+        self.assertEqual(journey.seats_taken, 1)
+        self.assertFalse(journey.seating.is_taken(1, 1))
+
+    def test_booking_skips_journey_receivers(self):
+        journey = sample_journey()
+        order = sample_order()
+
+        with mock.patch("train_station.signals.current_network") as network:
+            Ticket.objects.create(journey=journey, order=order, cargo=1, seat=1)
+
+        network.assert_not_called()
+        journey.refresh_from_db()
+        self.assertEqual(journey.seats_taken, 1)
+
+    def test_ticket_changes_move_the_seat(self):
+        journey = sample_journey()
+        other = sample_journey()
+        ticket = sample_ticket(journey=journey, cargo=1, seat=1)
+
+        ticket.seat = 2
+        ticket.save()
+        journey.refresh_from_db()
+        self.assertFalse(journey.seating.is_taken(1, 1))
+        self.assertTrue(journey.seating.is_taken(1, 2))
+
+        ticket.journey = other
+        ticket.save()
+        journey.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(journey.seats_taken, 0)
+        self.assertTrue(other.seating.is_taken(1, 2))
+
+    def test_train_changes_rebuild_seat_map(self):
+        journey = sample_journey()
+        sample_ticket(journey=journey, cargo=2, seat=1)
+
+        journey.train = sample_train(cargo_num=3, places_in_cargo=10)
+        journey.save()
+        journey.refresh_from_db()
+        self.assertEqual(journey.seating.taken_count(), 1)
+        self.assertTrue(journey.seating.is_taken(2, 1))
+
+        journey.train.places_in_cargo = 20
+        journey.train.save()
+        journey.refresh_from_db()
+        self.assertEqual(journey.seating.as_int(), 1 << 20)
+
+    def test_train_layout_keeps_sold_seats(self):
+        journey = sample_journey()
+        sample_ticket(journey=journey, cargo=2, seat=10)
+        train = journey.train
+
+        train.places_in_cargo = 5
+        with self.assertRaises(ValidationError) as error:
+            train.save()
+        self.assertIn("places_in_cargo", error.exception.message_dict)
+
+        train.refresh_from_db()
+        journey.refresh_from_db()
+        self.assertEqual(train.places_in_cargo, 50)
+        self.assertTrue(journey.seating.is_taken(2, 10))
+
+    def test_order_delete_releases_seats(self):
+        journey = sample_journey()
+        ticket = sample_ticket(journey=journey, cargo=1, seat=1)
+
+        ticket.order.delete()
+
+        journey.refresh_from_db()
+        self.assertEqual(journey.seats_taken, 0)
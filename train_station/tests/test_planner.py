@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from train_station.planner import Network, get_network, reset_network
+from train_station.tests.test_factories import (
+    BaseTestCase,
+    sample_journey,
+    sample_route,
+    sample_station,
+    sample_train,
+)
+
+PLAN_URL = reverse("train_station:plan-list")
+
+
+class JourneyPlanTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        reset_network()
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.kyiv = sample_station(name="Kyiv")
+        self.lviv = sample_station(name="Lviv")
+        self.warsaw = sample_station(name="Warsaw")
+        self.kyiv_lviv = sample_route(
+            source=self.kyiv, destination=self.lviv, distance=470
+        )
+        self.lviv_warsaw = sample_route(
+            source=self.lviv, destination=self.warsaw, distance=310
+        )
+        self.kyiv_warsaw = sample_route(
+            source=self.kyiv, destination=self.warsaw, distance=1000
+        )
+        train = sample_train()
+        self.first_leg = self.add_journey(self.kyiv_lviv, train, 1, 2)
+        self.short_transfer = self.add_journey(self.lviv_warsaw, train, 2.05, 3)
+        self.second_leg = self.add_journey(self.lviv_warsaw, train, 2.5, 4)
+        self.direct = self.add_journey(self.kyiv_warsaw, train, 1, 6)
+
+    def tearDown(self):
+        super().tearDown()
+        reset_network()
+
+    def add_journey(self, route, train, departure_hours, arrival_hours):
+        return sample_journey(
+            route=route,
+            train=train,
+            departure_time=self.start + timedelta(hours=departure_hours),
+            arrival_time=self.start + timedelta(hours=arrival_hours),
+        )
+
+    def plan(self, **params):
+        return self.client.get(
+            PLAN_URL,
+            {
+                "source": self.kyiv.id,
+                "destination": self.warsaw.id,
+                "departure_time": self.start.isoformat(),
+                **params,
+            },
+        )
+
+    def test_earliest_arrival_respects_min_transfer(self):
+        res = self.plan(mode="earliest")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [leg["journey"] for leg in res.data["legs"]],
+            [self.first_leg.id, self.second_leg.id],
+        )
+        self.assertEqual(res.data["transfers"], 1)
+        self.assertEqual(res.data["distance"], 780)
+
+    def test_earliest_arrival_without_min_transfer(self):
+        res = self.plan(mode="earliest", min_transfer=0)
+
+        self.assertEqual(
+            [leg["journey"] for leg in res.data["legs"]],
+            [self.first_leg.id, self.short_transfer.id],
+        )
+
+    def test_fewest_transfers(self):
+        res = self.plan(mode="transfers")
+
+        self.assertEqual([leg["journey"] for leg in res.data["legs"]], [self.direct.id])
+        self.assertEqual(res.data["transfers"], 0)
+
+    def test_shortest_distance(self):
+        res = self.plan(mode="distance")
+
+        self.assertEqual(
+            [leg["route"] for leg in res.data["legs"]],
+            [self.kyiv_lviv.id, self.lviv_warsaw.id],
+        )
+        self.assertEqual(res.data["distance"], 780)
+
+    def test_network_follows_journey_changes(self):
+        get_network()
+        self.second_leg.delete()
+        self.short_transfer.delete()
+
+        res = self.plan(mode="earliest")
+
+        self.assertEqual([leg["journey"] for leg in res.data["legs"]], [self.direct.id])
+
+    def test_network_keeps_journeys_on_route_changes(self):
+        get_network()
+        self.kyiv_lviv.distance = 480
+        self.kyiv_lviv.save()
+
+        res = self.plan(mode="earliest")
+
+        self.assertEqual(
+            [leg["journey"] for leg in res.data["legs"]],
+            [self.first_leg.id, self.second_leg.id],
+        )
+        self.assertEqual(res.data["distance"], 790)
+
+    def test_network_moves_journeys_with_their_route(self):
+        krakow = sample_station(name="Krakow", latitude=50.06, longitude=19.94)
+        get_network()
+        self.kyiv_warsaw.destination = krakow
+        self.kyiv_warsaw.save()
+
+        res = self.plan(mode="transfers", destination=krakow.id)
+
+        self.assertEqual([leg["journey"] for leg in res.data["legs"]], [self.direct.id])
+        self.assertEqual(
+            [leg["journey"] for leg in self.plan(mode="transfers").data["legs"]],
+            [self.first_leg.id, self.second_leg.id],
+        )
+
+    def test_edge_falls_back_to_another_route(self):
+        network = Network()
+        network.update_route(1, self.kyiv.id, self.lviv.id, 470)
+        network.update_route(2, self.kyiv.id, self.lviv.id, 520)
+
+        self.assertEqual(network.adjacency[self.kyiv.id][self.lviv.id], (470, 1))
+
+        network.update_route(1, self.kyiv.id, self.warsaw.id, 1000)
+        self.assertEqual(network.adjacency[self.kyiv.id][self.lviv.id], (520, 2))
+
+        network.remove_route(2)
+        self.assertNotIn(self.lviv.id, network.adjacency[self.kyiv.id])
+
+    def test_no_connection(self):
+        res = self.plan(mode="earliest", departure_time=self.start + timedelta(days=1))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_same_station(self):
+        res = self.plan(destination=self.kyiv.id)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,137 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.tests.test_factories import BaseTestCase
+from train_station.throttling import (
+    DEFAULT_SETTINGS,
+    LocalBackend,
+    RedisBackend,
+    parse_rate,
+)
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - test dependency
+    fakeredis = None
+
+STATION_URL = reverse("train_station:station-list")
+ORDER_URL = reverse("train_station:order-list")
+
+
+class LocalBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.backend = LocalBackend({})
+
+    def test_burst_then_steady_rate(self):
+        with mock.patch("train_station.throttling.time.time", return_value=1000.0):
+            allowed = [self.backend.acquire("key", 1.0, 3.0) for _ in range(4)]
+            self.assertEqual(allowed[:3], [(True, 0.0)] * 3)
+            self.assertEqual(allowed[3], (False, 1.0))
+
+        with mock.patch("train_station.throttling.time.time", return_value=1001.0):
+            self.assertTrue(self.backend.acquire("key", 1.0, 3.0)[0])
+            self.assertFalse(self.backend.acquire("key", 1.0, 3.0)[0])
+
+    def test_limit_holds_under_concurrency(self):
+        def acquire(_):
+            return self.backend.acquire("key", 0.6, 60.0)[0]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            allowed = sum(executor.map(acquire, range(400)))
+
+        self.assertEqual(allowed, 100)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("20/min"), (20, 60))
+        self.assertEqual(parse_rate("5/s"), (5, 1))
+
+
+@skipUnless(fakeredis, "fakeredis[lua] runs the GCRA script")
+class RedisBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+
+    def backend(self):
+        """A backend of its own on the shared server, as each worker has"""
+        with mock.patch(
+            "train_station.throttling.redis.Redis.from_url",
+            return_value=fakeredis.FakeRedis(server=self.server),
+        ):
+            return RedisBackend({**DEFAULT_SETTINGS, "REDIS_URL": "redis://fake"})
+
+    def test_burst_then_wait(self):
+        backend = self.backend()
+
+        allowed = [
+            backend.acquire("train_station:throttle:k", 10.0, 30.0) for _ in range(4)
+        ]
+
+        self.assertEqual([result[0] for result in allowed], [True] * 3 + [False])
+        self.assertAlmostEqual(allowed[3][1], 10.0, delta=0.5)
+
+    def test_limit_is_shared_by_workers(self):
+        first, second = self.backend(), self.backend()
+
+        self.assertTrue(first.acquire("train_station:throttle:k", 60.0, 60.0)[0])
+        self.assertFalse(second.acquire("train_station:throttle:k", 60.0, 60.0)[0])
+
+    def test_reset_deletes_throttle_keys_only(self):
+        backend = self.backend()
+        backend.acquire("train_station:throttle:k", 60.0, 60.0)
+        backend.client.set("other", 1)
+
+        backend.reset()
+
+        self.assertEqual(backend.client.keys(), [b"other"])
+        self.assertTrue(backend.acquire("train_station:throttle:k", 60.0, 60.0)[0])
+
+    def test_unreachable_server_lets_requests_through(self):
+        backend = self.backend()
+        self.server.connected = False
+
+        with self.assertLogs("train_station.throttling", "WARNING"):
+            self.assertEqual(
+                backend.acquire("train_station:throttle:k", 60.0, 0.0), (True, 0.0)
+            )
+
+
+@override_settings(
+    THROTTLING={"RATES": {"anon": "1/min", "browse": "2/min", "booking": "5/min"}}
+)
+class GCRAThrottleTests(BaseTestCase):
+    def test_browse_budget(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(STATION_URL).status_code, 200)
+
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "30")
+
+    def test_booking_has_its_own_budget(self):
+        for _ in range(3):
+            self.client.get(STATION_URL)
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 2, "journey": self.journey.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_anonymous_clients_by_address(self):
+        url = reverse("user:token_obtain_pair")
+        credentials = {"email": "nobody@test.com", "password": "wrong"}
+        client = APIClient()
+
+        self.assertEqual(client.post(url, credentials).status_code, 401)
+        self.assertEqual(client.post(url, credentials).status_code, 429)
+        self.assertEqual(
+            client.post(url, credentials, REMOTE_ADDR="203.0.113.7").status_code, 401
+        )
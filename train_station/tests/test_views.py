@@ -1,16 +1,37 @@
-from datetime import timedelta
+import asyncio
+import csv
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
 from PIL import Image
+from unittest import skipUnless
 import os
 import tempfile
-
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core import signals
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from train_station.models import Order
+from rest_framework.renderers import JSONRenderer
+
+from train_station.filters import time_range_filters
+from train_station.mixins import apply_query_plan
+from train_station.pagination import JourneyPagination
+from train_station.renderers import FastJSONRenderer
+from train_station.serializers import (
+    JourneyListSerializer,
+    RouteListSerializer,
+    TrainListSerializer,
+)
+from train_station.models import Journey, Order, Route
 from train_station.tests.test_factories import (
     BaseTestCase,
     sample_route,
@@ -19,7 +40,10 @@ from train_station.tests.test_factories import (
     sample_order,
     sample_crew,
     sample_station,
+    sample_ticket,
 )
+from user.authentication import user_states
+from user.tokens import RefreshToken
 
 
 CREW_URL = reverse("train_station:crew-list")
@@ -89,8 +113,8 @@ class RouteViewTests(BaseTestCase):
         )
         self.assertEqual(res_destin.status_code, status.HTTP_200_OK)
 
-        route_source_ids = [route["id"] for route in res_source.data]
-        route_destin_ids = [route["id"] for route in res_destin.data]
+        route_source_ids = [route["id"] for route in res_source.data["results"]]
+        route_destin_ids = [route["id"] for route in res_destin.data["results"]]
 
         self.assertNotIn(self.route.id, route_destin_ids)
         self.assertIn(route_test.id, route_destin_ids)
@@ -100,7 +124,7 @@ class RouteViewTests(BaseTestCase):
     def test_route_list_view(self):
         response = self.client.get(reverse("train_station:route-list"))
         self.assertEqual(response.status_code, 200)
-        for route in response.data:
+        for route in response.data["results"]:
             self.assertIn("source", route)
             self.assertIn("destination", route)
             self.assertNotIn("id", route["source"])
@@ -152,7 +176,7 @@ class JourneyViewTests(BaseTestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
-        journey_ids = [journey["id"] for journey in res.data]
+        journey_ids = [journey["id"] for journey in res.data["results"]]
 
         self.assertNotIn(self.journey.id, journey_ids)
         self.assertIn(journey_test.id, journey_ids)
@@ -186,18 +210,88 @@ class JourneyViewTests(BaseTestCase):
         self.assertEqual(res_depart.status_code, status.HTTP_200_OK)
         self.assertEqual(res_arrive.status_code, status.HTTP_200_OK)
 
-        journey_depart_ids = [journey["id"] for journey in res_depart.data]
-        journey_arrive_ids = [journey["id"] for journey in res_arrive.data]
+        journey_depart_ids = [journey["id"] for journey in res_depart.data["results"]]
+        journey_arrive_ids = [journey["id"] for journey in res_arrive.data["results"]]
 
         self.assertNotIn(self.journey.id, journey_depart_ids)
         self.assertIn(journey_test.id, journey_depart_ids)
         self.assertNotIn(self.journey.id, journey_arrive_ids)
         self.assertIn(journey_test.id, journey_arrive_ids)
 
+    def test_filter_by_departure_range(self):
+        departure_time = timezone.now().replace(microsecond=0) + timedelta(days=3)
+        journey_test = sample_journey(
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+        url = reverse("train_station:journey-list")
+
+        res = self.client.get(
+            url,
+            {
+                "departure_after": departure_time.isoformat(),
+                "departure_before": (departure_time + timedelta(hours=1)).isoformat(),
+            },
+        )
+        journey_ids = [journey["id"] for journey in res.data["results"]]
+        self.assertEqual(journey_ids, [journey_test.id])
+
+        res = self.client.get(url, {"departure_before": departure_time.isoformat()})
+        journey_ids = [journey["id"] for journey in res.data["results"]]
+        self.assertNotIn(journey_test.id, journey_ids)
+        self.assertIn(self.journey.id, journey_ids)
+
+    def test_filter_by_date_in_time_zone(self):
+        departure_time = datetime(2030, 5, 1, 22, 30, tzinfo=dt_timezone.utc)
+        journey_test = sample_journey(
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+        url = reverse("train_station:journey-list")
+
+        res_utc = self.client.get(url, {"date": "2030-05-01"})
+        res_kyiv = self.client.get(url, {"date": "2030-05-02", "tz": "Europe/Kyiv"})
+        res_kyiv_before = self.client.get(
+            url, {"date": "2030-05-01", "tz": "Europe/Kyiv"}
+        )
+
+        self.assertEqual(
+            [journey["id"] for journey in res_utc.data["results"]], [journey_test.id]
+        )
+        self.assertEqual(
+            [journey["id"] for journey in res_kyiv.data["results"]], [journey_test.id]
+        )
+        self.assertEqual(res_kyiv_before.data["results"], [])
+
+    def test_invalid_time_filters(self):
+        url = reverse("train_station:journey-list")
+        for params in (
+            {"date": "tomorrow"},
+            {"departure_time": "2030-13-01"},
+            {"departure_after": "2030-05-01 25:00"},
+            {"date": "2030-05-01", "tz": "Mars/Olympus"},
+        ):
+            with self.subTest(params=params):
+                res = self.client.get(url, params)
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == "postgresql", "EXPLAIN output of PostgreSQL")
+    def test_time_filters_use_index(self):
+        queryset = Journey.objects.filter(
+            route_id=self.journey.route_id,
+            **time_range_filters({"date": "2030-05-01"}),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+
+        self.assertIn("Index", plan)
+        self.assertNotIn("Seq Scan", plan)
+
     def test_journey_list_view(self):
         response = self.client.get(reverse("train_station:journey-list"))
         self.assertEqual(response.status_code, 200)
-        for journey in response.data:
+        for journey in response.data["results"]:
             self.assertIn("route_source", journey)
             self.assertIn("route_destination", journey)
             self.assertIn("train", journey)
@@ -238,6 +332,131 @@ class JourneyViewTests(BaseTestCase):
         self.assertIsInstance(response.data["tickets_available_by_cargo"], dict)
 
 
+class KeysetPaginationTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("train_station:journey-list")
+        departure_time = timezone.now() + timedelta(days=1)
+        self.journeys = [
+            sample_journey(
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=5),
+            )
+            for _ in range(5)
+        ]
+        self.expected = list(
+            Journey.objects.order_by("-departure_time", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def collect(self, response):
+        ids = [journey["id"] for journey in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            ids.extend(journey["id"] for journey in response.data["results"])
+        return ids
+
+    def test_pages_follow_departure_time_and_id(self):
+        res = self.client.get(self.url, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNone(res.data["previous"])
+        self.assertEqual(self.collect(res), self.expected)
+
+    def test_rows_inserted_before_cursor_do_not_shift_pages(self):
+        res = self.client.get(self.url, {"page_size": 2})
+        first_page = [journey["id"] for journey in res.data["results"]]
+        sample_journey(
+            departure_time=self.journeys[0].departure_time,
+            arrival_time=self.journeys[0].arrival_time,
+        )
+
+        rest = self.collect(self.client.get(res.data["next"]))
+
+        self.assertEqual(first_page + rest, self.expected)
+
+    def test_previous_link(self):
+        res = self.client.get(self.url, {"page_size": 2})
+        res = self.client.get(res.data["next"])
+        res = self.client.get(res.data["previous"])
+
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]],
+            [self.journeys[4].id, self.journeys[3].id],
+        )
+        self.assertIsNone(res.data["previous"])
+
+    def test_page_size_is_capped(self):
+        with self.settings(KEYSET_PAGINATION={"MAX_PAGE_SIZE": 3}):
+            res = self.client.get(self.url, {"page_size": 1000})
+
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_filter_bounds_the_first_field(self):
+        pagination = JourneyPagination()
+        pagination.ordering = JourneyPagination.ordering
+
+        condition = pagination.keyset_filter('["2030-01-01T00:00:00", 7]', False)
+        self.assertEqual(
+            condition,
+            (
+                Q(departure_time__lt="2030-01-01T00:00:00")
+                | Q(departure_time="2030-01-01T00:00:00", id__lt=7)
+            )
+            & Q(departure_time__lte="2030-01-01T00:00:00"),
+        )
+        condition = pagination.keyset_filter('["2030-01-01T00:00:00", 7]', True)
+        self.assertIn(
+            ("departure_time__gte", "2030-01-01T00:00:00"), condition.children
+        )
+
+    def test_invalid_cursor(self):
+        res = self.client.get(self.url, {"cursor": "garbage"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class JourneySeatsViewTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.journey = sample_journey(
+            train=sample_train(cargo_num=2, places_in_cargo=4)
+        )
+        sample_ticket(journey=self.journey, cargo=1, seat=2)
+        sample_ticket(journey=self.journey, cargo=1, seat=3)
+        sample_ticket(journey=self.journey, cargo=2, seat=4)
+        self.url = reverse("train_station:journey-seats", args=[self.journey.id])
+
+    def test_seats_bitstring(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["encoding"], "bitstring")
+        self.assertEqual(res.data["seats"], {1: "0110", 2: "0001"})
+        self.assertEqual(res.data["tickets_available"], 5)
+
+    def test_seats_rle(self):
+        res = self.client.get(self.url, {"encoding": "rle"})
+
+        self.assertEqual(
+            res.data["seats"], {1: [[0, 1], [1, 2], [0, 1]], 2: [[0, 3], [1, 1]]}
+        )
+
+    def test_seats_expanded(self):
+        res = self.client.get(self.url, {"encoding": "expanded"})
+
+        self.assertEqual(res.data["seats"][1], {"free": [1, 4], "taken": [2, 3]})
+
+    def test_seats_unknown_encoding(self):
+        res = self.client.get(self.url, {"encoding": "png"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class OrderViewTests(BaseTestCase):
     def test_list_orders(self):
         order = sample_order(user=self.user)
@@ -246,7 +465,7 @@ class OrderViewTests(BaseTestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
-        order_ids = [order["id"] for order in res.data]
+        order_ids = [order["id"] for order in res.data["results"]]
         self.assertIn(order.id, order_ids)
 
         other_user = get_user_model().objects.create_user(
@@ -255,7 +474,7 @@ class OrderViewTests(BaseTestCase):
         other_order = sample_order(user=other_user)
         res = self.client.get(url)
 
-        order_ids = [order["id"] for order in res.data]
+        order_ids = [order["id"] for order in res.data["results"]]
         self.assertNotIn(other_order.id, order_ids)
 
     def test_create_order(self):
@@ -280,6 +499,40 @@ class OrderViewTests(BaseTestCase):
         self.assertEqual(created_order.tickets.count(), 1)
         self.assertEqual(created_order.tickets.first().cargo, 1)
 
+    def test_create_order_query_count_is_constant(self):
+        url = reverse("train_station:order-list")
+
+        def order_data(seats):
+            return {
+                "tickets": [
+                    {"journey": self.journey.id, "cargo": 2, "seat": seat}
+                    for seat in seats
+                ]
+            }
+
+        with CaptureQueriesContext(connection) as one_ticket:
+            res = self.client.post(url, order_data([1]), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as six_tickets:
+            res = self.client.post(url, order_data(range(2, 8)), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 6)
+
+        self.assertEqual(len(six_tickets), len(one_ticket))
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_taken, 7)
+
+    def test_create_order_with_repeated_seat(self):
+        url = reverse("train_station:order-list")
+        ticket = {"journey": self.journey.id, "cargo": 3, "seat": 3}
+
+        res = self.client.post(url, {"tickets": [ticket, ticket]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+
     def test_create_order_invalid_ticket(self):
         url = reverse("train_station:order-list")
         order_data = {
@@ -314,6 +567,50 @@ class OrderViewTests(BaseTestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+class OrderAllocateViewTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("train_station:order-allocate")
+        self.journey = sample_journey(
+            train=sample_train(cargo_num=2, places_in_cargo=4)
+        )
+        sample_ticket(journey=self.journey, cargo=1, seat=2)
+
+    def allocate(self, seats, together=True):
+        return self.client.post(
+            self.url,
+            {"journey": self.journey.id, "seats": seats, "together": together},
+            format="json",
+        )
+
+    def test_allocate_adjacent_seats(self):
+        res = self.allocate(3)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted((ticket["cargo"], ticket["seat"]) for ticket in res.data["tickets"]),
+            [(2, 1), (2, 2), (2, 3)],
+        )
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_taken, 4)
+
+    def test_allocate_spreads_over_cargos(self):
+        res = self.allocate(5)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 5)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_available, 2)
+
+    def test_allocate_not_enough_seats(self):
+        res = self.allocate(8)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seats", res.data)
+
+
 class PermissionTests(BaseTestCase):
 
     def setUp(self):
@@ -411,3 +708,285 @@ class PermissionTests(BaseTestCase):
             },
         )
         self.assertEqual(res_post.status_code, status.HTTP_201_CREATED)
+
+
+class ListQueryCountTests(BaseTestCase):
+    """Every list endpoint costs the same number of queries at any page size"""
+
+    ENDPOINTS = {
+        "crew-list": 1,
+        "station-list": 1,
+        "traintype-list": 1,
+        "train-list": 1,
+        "route-list": 2,
+        "journey-list": 2,
+        "order-list": 2,
+    }
+
+    def setUp(self):
+        super().setUp()
+        # the token's user is checked once, not per request
+        user_states.get(self.user.pk)
+        for seat in range(1, 6):
+            sample_ticket(order=self.order, seat=seat)
+            sample_order(user=self.user)
+
+    def test_list_query_counts(self):
+        for name, queries in self.ENDPOINTS.items():
+            url = reverse(f"train_station:{name}")
+            for page_size in (1, 20):
+                with self.subTest(endpoint=name, page_size=page_size):
+                    with self.assertNumQueries(queries):
+                        res = self.client.get(url, {"page_size": page_size})
+                    self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class FastListTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        route = sample_route(
+            source=sample_station(name="Kyiv", latitude=50.45, longitude=30.52),
+            destination=sample_station(
+                name="Gare\u2028d’Austerlitz \"Paris\"", latitude=48.84, longitude=2.37
+            ),
+        )
+        Route.objects.filter(id=route.id).update(distance=None)
+        sample_journey(
+            route=route,
+            train=sample_train(name="Intercity+ №7"),
+            departure_time=timezone.now().replace(microsecond=123456),
+        )
+
+    def test_fast_lists_match_serializers(self):
+        for name, serializer_class in (
+            ("journey-list", JourneyListSerializer),
+            ("route-list", RouteListSerializer),
+            ("train-list", TrainListSerializer),
+        ):
+            model = serializer_class.Meta.model
+            instances = apply_query_plan(model.objects.all(), serializer_class)
+            expected = {
+                row["id"]: JSONRenderer().render(row)
+                for row in serializer_class(instances, many=True).data
+            }
+            with self.subTest(endpoint=name):
+                res = self.client.get(reverse(f"train_station:{name}"))
+                rows = res.data["results"] if "results" in res.data else res.data
+                self.assertEqual(
+                    {row["id"]: FastJSONRenderer().render(row) for row in rows},
+                    expected,
+                )
+
+    def test_list_body_is_rendered_by_fast_renderer(self):
+        res = self.client.get(reverse("train_station:route-list"))
+
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
+        self.assertIn(b"\\u2028", res.content)
+
+    def test_fast_renderer_falls_back(self):
+        renderer = FastJSONRenderer()
+
+        self.assertEqual(
+            renderer.render({"id": 2**70}), b'{"id":1180591620717411303424}'
+        )
+        self.assertEqual(
+            renderer.render([1], "application/json; indent=2"), b"[\n  1\n]"
+        )
+
+
+class JourneyExportTests(BaseTestCase):
+    url = reverse("train_station:journey-export")
+
+    def setUp(self):
+        super().setUp()
+        self.later = sample_journey(
+            departure_time=self.journey.departure_time + timedelta(days=1),
+            arrival_time=self.journey.arrival_time + timedelta(days=1),
+        )
+
+    def test_export_ndjson(self):
+        res = self.client.get(self.url)
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line) for line in b"".join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), Journey.objects.count())
+        self.assertEqual(rows[-1]["id"], self.later.id)
+        listed = {
+            journey["id"]: journey
+            for journey in self.client.get(
+                reverse("train_station:journey-list"), {"page_size": 100}
+            ).data["results"]
+        }
+        self.assertEqual({row["id"]: row for row in rows}, listed)
+
+    def test_export_csv(self):
+        res = self.client.get(self.url, {"format": "csv"})
+
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertIn("journeys.csv", res["Content-Disposition"])
+        content = b"".join(res.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), Journey.objects.count())
+        self.assertEqual(
+            list(rows[0]),
+            list(JourneyListSerializer.Meta.values),
+        )
+        self.assertEqual(rows[-1]["id"], str(self.later.id))
+
+    def test_export_applies_filters(self):
+        res = self.client.get(self.url, {"route": self.later.route_id})
+
+        rows = b"".join(res.streaming_content).splitlines()
+        self.assertEqual([json.loads(row)["id"] for row in rows], [self.later.id])
+
+    def test_export_invalid_filter(self):
+        res = self.client.get(self.url, {"format": "csv", "date": "tomorrow"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_unknown_format(self):
+        res = self.client.get(self.url, {"format": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_streams_under_asgi(self):
+        token = RefreshToken.for_user(self.user).access_token
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": self.url,
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", f"Bearer {token}".encode()),
+            ],
+        }
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+        bodies = []
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                bodies.append((message.get("body", b""), render.call_count))
+
+        # the test database lives in this test's transaction
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        try:
+            with mock.patch("train_station.exports.CHUNK_SIZE", 1), mock.patch.object(
+                FastJSONRenderer,
+                "render",
+                autospec=True,
+                side_effect=FastJSONRenderer.render,
+            ) as render:
+                async_to_sync(ASGIHandler())(scope, receive, send)
+        finally:
+            signals.request_started.connect(close_old_connections)
+            signals.request_finished.connect(close_old_connections)
+
+        rows = b"".join(body for body, _ in bodies).splitlines()
+        self.assertEqual(len(rows), Journey.objects.count())
+        # each row is sent before the next one is read
+        self.assertEqual(
+            [rendered for body, rendered in bodies if body],
+            list(range(1, len(rows) + 1)),
+        )
+
+
+@override_settings(RESPONSE_CACHE={"ENABLED": False})
+class JourneySearchTests(BaseTestCase):
+    url = reverse("train_station:journey-search")
+
+    def setUp(self):
+        super().setUp()
+        kyiv = sample_station(
+            name="Kyiv-Pasazhyrskyi", latitude=50.44, longitude=30.49
+        )
+        lviv = sample_station(name="Lviv-Holovnyi", latitude=49.84, longitude=23.99)
+        self.route = sample_route(source=kyiv, destination=lviv)
+        self.tomorrow = timezone.localtime() + timedelta(days=1)
+
+        def journey(start, **params):
+            return sample_journey(
+                route=self.route,
+                departure_time=start,
+                arrival_time=start + timedelta(hours=6),
+                **params,
+            )
+
+        self.evening = journey(self.tomorrow.replace(hour=20))
+        self.morning = journey(self.tomorrow.replace(hour=8))
+        self.later = journey(self.tomorrow + timedelta(days=1))
+        self.past = journey(timezone.now() - timedelta(days=1))
+        self.small = journey(
+            self.tomorrow.replace(hour=12),
+            train=sample_train(cargo_num=1, places_in_cargo=2),
+        )
+        sample_ticket(journey=self.small, cargo=1, seat=1)
+        sample_journey(
+            route=sample_route(source=lviv, destination=kyiv),
+            departure_time=self.tomorrow,
+            arrival_time=self.tomorrow + timedelta(hours=6),
+        )
+
+    def search(self, **params):
+        res = self.client.get(self.url, {"from": "kyiv", "to": "lviv", **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [journey["id"] for journey in res.data["results"]]
+
+    def test_search_by_station_names_and_date(self):
+        ids = self.search(date=self.tomorrow.date().isoformat())
+
+        self.assertEqual(ids, [self.morning.id, self.small.id, self.evening.id])
+
+    def test_search_upcoming_journeys(self):
+        ids = self.search(to="HOLOVNYI")
+
+        self.assertEqual(
+            ids, [self.morning.id, self.small.id, self.evening.id, self.later.id]
+        )
+
+    def test_search_min_seats(self):
+        ids = self.search(min_seats=2)
+
+        self.assertNotIn(self.small.id, ids)
+        self.assertIn(self.morning.id, ids)
+
+    def test_search_results(self):
+        res = self.client.get(self.url, {"from": "kyiv", "to": "lviv", "page_size": 1})
+
+        self.assertEqual(
+            res.data["results"][0],
+            JourneyListSerializer(
+                apply_query_plan(Journey.objects, JourneyListSerializer).get(
+                    id=self.morning.id
+                )
+            ).data,
+        )
+        self.assertIsNotNone(res.data["next"])
+
+    def test_search_is_one_query(self):
+        user_states.get(self.user.pk)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(self.url, {"from": "kyiv", "to": "lviv"})
+
+        # upcoming journeys change with the time, not the table versions
+        self.assertNotIn("Last-Modified", res)
+
+    def test_search_invalid(self):
+        for params in ({"from": "kyiv"}, {"from": "k", "to": "lviv"}):
+            with self.subTest(params=params):
+                res = self.client.get(self.url, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "BACKEND": "train_station.throttling.LocalBackend",
+    "REDIS_URL": None,
+    "KEY_PREFIX": "train_station:throttle",
+    # requests per period of each scope, None lifts the limit
+    "RATES": {
+        "anon": "10/day",
+        "browse": "30/day",
+        "write": "30/day",
+        "booking": "30/day",
+    },
+    # requests a client may send at once, the number of requests of the
+    # rate when missing
+    "BURST": {},
+}
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def throttle_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "THROTTLING", {})}
+
+
+def parse_rate(rate):
+    """`"<requests>/<period>"`, DRF style, as `(requests, seconds)`"""
+    requests, period = rate.split("/")
+    return int(requests), PERIODS[period[0]]
+
+
+class LocalBackend:
+    """
+    GCRA in process memory, for development and tests. Limits hold per
+    process only, so several workers together admit several times more.
+    """
+
+    # clients kept before the ones back to a full bucket are dropped
+    MAX_KEYS = 10000
+
+    def __init__(self, options):
+        self.lock = threading.Lock()
+        self.arrivals = {}
+
+    def acquire(self, key, interval, tolerance):
+        with self.lock:
+            now = time.time()
+            if len(self.arrivals) >= self.MAX_KEYS:
+                self.arrivals = {
+                    client: arrival
+                    for client, arrival in self.arrivals.items()
+                    if arrival > now
+                }
+            arrival = max(self.arrivals.get(key, now), now) + interval
+            wait = arrival - now - tolerance
+            if wait > 0:
+                return False, wait
+            self.arrivals[key] = arrival
+            return True, 0.0
+
+    def reset(self):
+        with self.lock:
+            self.arrivals.clear()
+
+
+# GCRA on the Redis clock: KEYS[1] holds the theoretical arrival time,
+# one atomic script per request so all workers share the limit
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local arrival = math.max(tonumber(redis.call("GET", KEYS[1])) or now, now)
+arrival = arrival + interval
+local wait = arrival - now - tolerance
+if wait > 0 then
+    return {0, string.format("%.6f", wait)}
+end
+redis.call("SET", KEYS[1], string.format("%.6f", arrival), "PX",
+    math.ceil((arrival - now) * 1000))
+return {1, "0"}
+"""
+
+
+class RedisBackend:
+    """
+    GCRA in Redis or a server speaking its protocol: one key holding a
+    timestamp per client and scope, updated by an atomic script. When
+    the server is unreachable requests are let through.
+    """
+
+    def __init__(self, options):
+        if redis is None:
+            raise ImportError("RedisBackend requires the redis package.")
+        self.client = redis.Redis.from_url(options["REDIS_URL"])
+        self.script = self.client.register_script(GCRA_SCRIPT)
+        self.key_prefix = options["KEY_PREFIX"]
+
+    def acquire(self, key, interval, tolerance):
+        try:
+            allowed, wait = self.script(keys=[key], args=[interval, tolerance])
+        except redis.RedisError:
+            logger.warning("Throttling backend unavailable", exc_info=True)
+            return True, 0.0
+        return bool(allowed), float(wait)
+
+    def reset(self):
+        """Deletes the keys of every client, those under `KEY_PREFIX`"""
+        keys = []
+        for key in self.client.scan_iter(match=f"{self.key_prefix}:*", count=1000):
+            keys.append(key)
+            if len(keys) == 1000:
+                self.client.delete(*keys)
+                keys = []
+        if keys:
+            self.client.delete(*keys)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend():
+    options = throttle_settings()
+    key = (options["BACKEND"], options["REDIS_URL"])
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = import_string(options["BACKEND"])(options)
+        return _backends[key]
+
+
+class GCRAThrottle(BaseThrottle):
+    """
+    Token bucket limits in the GCRA form: one timestamp per client and
+    scope instead of a list of request times, in a backend shared by all
+    workers. Anonymous requests share the `anon` scope per address.
+    Authenticated ones use the scope the view's `throttle_scopes` maps
+    its action to, or `browse` for reads and `write` otherwise.
+    """
+
+    def get_scope(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return "anon"
+        scope = getattr(view, "throttle_scopes", {}).get(getattr(view, "action", None))
+        if scope is not None:
+            return scope
+        return "browse" if request.method in SAFE_METHODS else "write"
+
+    def allow_request(self, request, view):
+        options = throttle_settings()
+        scope = self.get_scope(request, view)
+        rate = options["RATES"].get(scope)
+        if rate is None:
+            return True
+
+        requests, period = parse_rate(rate)
+        interval = period / requests
+        tolerance = interval * options["BURST"].get(scope, requests)
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+
+        allowed, self.seconds = get_backend().acquire(
+            f"{options['KEY_PREFIX']}:{scope}:{ident}", interval, tolerance
+        )
+        return allowed
+
+    def wait(self):
+        return self.seconds
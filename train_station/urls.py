@@ -1,5 +1,7 @@
+from django.urls import path
 from rest_framework import routers
 
+from train_station.async_views import AsyncReadView
 from train_station.views import (
     CrewViewSet,
     StationViewSet,
@@ -8,6 +10,8 @@ from train_station.views import (
     TrainTypeViewSet,
     JourneyViewSet,
     OrderViewSet,
+    JourneyPlanViewSet,
+    RouteAvailabilityViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -19,7 +23,35 @@ router.register("trains", TrainViewSet)
 router.register("train-types", TrainTypeViewSet)
 router.register("journeys", JourneyViewSet)
 router.register("orders", OrderViewSet)
+router.register("plan", JourneyPlanViewSet, basename="plan")
+router.register("route-availability", RouteAvailabilityViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path(
+        "async/journeys/",
+        AsyncReadView.as_view(viewset_class=JourneyViewSet, action="list"),
+        name="async-journey-list",
+    ),
+    path(
+        "async/journeys/<int:pk>/",
+        AsyncReadView.as_view(viewset_class=JourneyViewSet, action="retrieve"),
+        name="async-journey-detail",
+    ),
+    path(
+        "async/journeys/<int:pk>/seats/",
+        AsyncReadView.as_view(viewset_class=JourneyViewSet, action="seats"),
+        name="async-journey-seats",
+    ),
+    path(
+        "async/routes/",
+        AsyncReadView.as_view(viewset_class=RouteViewSet, action="list"),
+        name="async-route-list",
+    ),
+    path(
+        "async/route-availability/",
+        AsyncReadView.as_view(viewset_class=RouteAvailabilityViewSet, action="list"),
+        name="async-routedailyavailability-list",
+    ),
+] + router.urls
 
 app_name = "train_station"
@@ -1,11 +1,40 @@
-from django.db.models import F, Count
-from rest_framework import viewsets, mixins, status
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from train_station import mixins
+from train_station.autocomplete import get_index
+from train_station.caching import ConditionalGetMixin, ResponseCacheMixin
+from train_station.exports import (
+    CHUNK_SIZE,
+    CSVRenderer,
+    NDJSONRenderer,
+    export_response,
+)
+from train_station.filters import matching_stations, time_range_filters
+from train_station.geohash import nearest_stations, stations_within
+from train_station.mixins import (
+    FastListMixin,
+    QueryPlanMixin,
+    SerializerMetricsMixin,
+    iter_representation,
+    values_lookups,
+)
+from train_station.pagination import (
+    JourneyPagination,
+    JourneySearchPagination,
+    OrderPagination,
+    RouteAvailabilityPagination,
+    RoutePagination,
+)
 from train_station.permissions import IsAdminOrIfAuthenticatedReadOnly
+from train_station.planner import get_network, planner_settings
 from train_station.models import (
     Crew,
     Station,
@@ -13,11 +42,17 @@ from train_station.models import (
     TrainType,
     Train,
     Journey,
-    Order
+    Order,
+    Ticket,
+    RouteDailyAvailability,
 )
 from train_station.serializers import (
     CrewSerializer,
     StationSerializer,
+    StationAutocompleteQuerySerializer,
+    StationAutocompleteSerializer,
+    StationNearbyQuerySerializer,
+    StationNearbySerializer,
     OrderSerializer,
     JourneySerializer,
     TrainSerializer,
@@ -31,6 +66,13 @@ from train_station.serializers import (
     JourneyListSerializer,
     OrderListSerializer,
     CrewImageSerializer,
+    JourneyPlanQuerySerializer,
+    JourneyPlanSerializer,
+    JourneySearchQuerySerializer,
+    JourneySeatsSerializer,
+    OrderAllocateSerializer,
+    RouteAvailabilityQuerySerializer,
+    RouteDailyAvailabilitySerializer,
 )
 
 
@@ -49,7 +91,7 @@ class CrewViewSet(
         serializer = self.get_serializer(crew, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(self.serialized(serializer), status=status.HTTP_200_OK)
 
     def get_serializer_class(self):
         if self.action == "upload_image":
@@ -59,23 +101,73 @@ class CrewViewSet(
 
 
 class StationViewSet(
+    ResponseCacheMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
     queryset = Station.objects.all()
+    cache_models = (Station,)
     serializer_class = StationSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_serializer_class(self):
+        if self.action == "autocomplete":
+            return StationAutocompleteSerializer
+
+        if self.action == "nearby":
+            return StationNearbySerializer
+
+        return StationSerializer
+
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    def autocomplete(self, request):
+        """
+        Stations whose name or one of its words starts with `q`, ignoring
+        case and accents, most connected first, `?q=<text>&limit=<n>`.
+        Served from the in-process index without querying the database.
+        """
+        query = StationAutocompleteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        matches = get_index().search(params["q"], params["limit"])
+        serializer = self.get_serializer(matches, many=True)
+        return Response(self.serialized(serializer))
+
+    @action(methods=["GET"], detail=False, url_path="nearby")
+    def nearby(self, request):
+        """
+        Stations nearest to a point, within `radius_km` when given, with
+        their distance in kilometers, `?lat=&lon=&radius_km=&limit=`.
+        Candidates come from the geohash cells around the point only.
+        """
+        query = StationNearbyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        if "radius_km" in params:
+            stations = stations_within(
+                params["lat"], params["lon"], params["radius_km"], params["limit"]
+            )
+        else:
+            stations = nearest_stations(params["lat"], params["lon"], params["limit"])
+        serializer = self.get_serializer(stations, many=True)
+        return Response(self.serialized(serializer))
+
 
 class RouteViewSet(
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    FastListMixin,
+    QueryPlanMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
     queryset = Route.objects.all()
+    cache_models = (Route, Station)
     serializer_class = RouteSerializer
+    pagination_class = RoutePagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
     @staticmethod
@@ -120,12 +212,16 @@ class TrainTypeViewSet(
 
 
 class TrainViewSet(
+    ResponseCacheMixin,
+    FastListMixin,
+    QueryPlanMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
     queryset = Train.objects.all()
+    cache_models = (Train, TrainType)
     serializer_class = TrainSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
@@ -139,19 +235,28 @@ class TrainViewSet(
         return TrainSerializer
 
 
-class JourneyViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Journey.objects.all()
-        .select_related("route", "train")
-        .prefetch_related("crew")
-        .annotate(
-            tickets_available=(
-                F("train__cargo_num") * F("train__places_in_cargo") - Count("tickets")
-            )
-        )
-    )
+class JourneyViewSet(
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    FastListMixin,
+    QueryPlanMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.ListModelMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Journey.objects.all()
+    list_actions = ("list", "search")
+    cache_actions = ("list", "retrieve", "seats", "search")
+    # not "search": it lists upcoming journeys, which change as time passes
+    # without any table version changing
+    conditional_actions = ("list", "retrieve")
+    cache_models = (Journey, Route, Station, Train, TrainType, Crew, Ticket)
+    cache_timeout_setting = "AVAILABILITY_TIMEOUT"
 
     serializer_class = JourneySerializer
+    pagination_class = JourneyPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
     @staticmethod
@@ -160,47 +265,133 @@ class JourneyViewSet(viewsets.ModelViewSet):
         return [int(str_id) for str_id in qs.split(",")]
 
     def get_queryset(self):
+        if self.action == "seats":
+            return self.queryset
+
+        if self.action == "search":
+            return self.get_search_queryset()
+
         route = self.request.query_params.get("route")
-        departure_time = self.request.query_params.get("departure_time")
-        arrival_time = self.request.query_params.get("arrival_time")
 
         queryset = self.queryset
 
         if route:
             route_ids = self._params_to_ints(route)
-            queryset = queryset.filter(route__id__in=route_ids)
-
-        if departure_time:
-            queryset = queryset.filter(departure_time__startswith=departure_time)
-
-        if arrival_time:
-            queryset = queryset.filter(arrival_time__startswith=arrival_time)
-
-        return queryset.distinct()
+            queryset = queryset.filter(route_id__in=route_ids)
+
+        return queryset.filter(**time_range_filters(self.request.query_params))
+
+    def get_search_queryset(self):
+        """
+        Journeys from stations matching `from` to ones matching `to` with
+        `min_seats` free, departing in the time range of the list filters
+        or from now on, as one statement: the station and route matches
+        are subqueries feeding the (route, departure_time) index.
+        """
+        query = JourneySearchQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        routes = Route.objects.filter(
+            source__in=matching_stations(params["from"]),
+            destination__in=matching_stations(params["to"]),
+        )
+        time_range = time_range_filters(self.request.query_params) or {
+            "departure_time__gte": timezone.now()
+        }
+        return (
+            self.queryset.filter(route__in=routes.values("id"), **time_range)
+            .alias(
+                seats_available=JourneyListSerializer.Meta.values[
+                    "tickets_available"
+                ]
+            )
+            .filter(seats_available__gte=params["min_seats"])
+        )
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "search"):
             return JourneyListSerializer
 
         if self.action == "retrieve":
             return JourneyDetailSerializer
 
+        if self.action == "seats":
+            return JourneySeatsSerializer
+
         return JourneySerializer
 
+    def get_seats_context(self):
+        encodings = JourneySeatsSerializer.ENCODINGS
+        encoding = self.request.query_params.get("encoding", "bitstring")
+        if encoding not in encodings:
+            raise ValidationError(
+                {"encoding": f"Must be one of: {', '.join(encodings)}."}
+            )
+        return {**self.get_serializer_context(), "encoding": encoding}
+
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        """Seat occupancy grid, `?encoding=bitstring|rle|expanded`"""
+        context = self.get_seats_context()
+        journey = self.get_object()
+        serializer = self.get_serializer(journey, context=context)
+        return Response(self.serialized(serializer), status=status.HTTP_200_OK)
+
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="search",
+        pagination_class=JourneySearchPagination,
+    )
+    def search(self, request):
+        """
+        Journeys between two stations found by name in departure order,
+        `?from=<name>&to=<name>&date=YYYY-MM-DD&min_seats=<n>`
+        """
+        return self.list(request)
+
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        renderer_classes=(NDJSONRenderer, CSVRenderer),
+    )
+    def export(self, request):
+        """
+        Streams every journey matching the list filters in departure
+        order, `?format=ndjson` (the default) or `?format=csv`
+        """
+        names, expressions = values_lookups(JourneyListSerializer)
+        rows = (
+            self.get_queryset()
+            .order_by("departure_time", "id")
+            .values(*names, **expressions)
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        return export_response(
+            request,
+            iter_representation(JourneyListSerializer, rows),
+            list(JourneyListSerializer.Meta.values),
+            request.accepted_renderer.format,
+            "journeys",
+        )
+
 
 class OrderViewSet(
+    QueryPlanMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     GenericViewSet,
 ):
-    queryset = Order.objects.prefetch_related(
-        "tickets__journey__route", "tickets__journey__train", "tickets__journey__crew"
-    )
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = OrderPagination
     permission_classes = (IsAuthenticated,)
+    throttle_scopes = {"create": "booking", "allocate": "booking"}
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return self.queryset.filter(user_id=self.request.user.pk)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -209,7 +400,158 @@ class OrderViewSet(
         if self.action == "retrieve":
             return OrderListSerializer
 
+        if self.action == "allocate":
+            return OrderAllocateSerializer
+
         return OrderSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @action(methods=["POST"], detail=False, url_path="allocate")
+    def allocate(self, request):
+        """
+        Orders `seats` tickets on `journey` with server assigned seats,
+        adjacent in one cargo when `together` (the default) allows it
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(self.serialized(serializer), status=status.HTTP_201_CREATED)
+
+
+class RouteAvailabilityViewSet(
+    ResponseCacheMixin,
+    QueryPlanMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """
+    Seats per route and service day from the maintained summary table,
+    `?route=<ids>&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD`
+    """
+
+    queryset = RouteDailyAvailability.objects.all()
+    cache_models = (RouteDailyAvailability, Route, Station)
+    serializer_class = RouteDailyAvailabilitySerializer
+    pagination_class = RouteAvailabilityPagination
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    @staticmethod
+    def _params_to_ints(qs):
+        """Converts a list of string IDs to a list of integers"""
+        return [int(str_id) for str_id in qs.split(",")]
+
+    def get_queryset(self):
+        query = RouteAvailabilityQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        route = self.request.query_params.get("route")
+
+        queryset = self.queryset
+
+        if route:
+            queryset = queryset.filter(route_id__in=self._params_to_ints(route))
+
+        if "date_from" in params:
+            queryset = queryset.filter(service_date__gte=params["date_from"])
+
+        if "date_to" in params:
+            queryset = queryset.filter(service_date__lte=params["date_to"])
+
+        return queryset
+
+
+class JourneyPlanViewSet(SerializerMetricsMixin, GenericViewSet):
+    """
+    Plans multi-leg trips between two stations over the in-memory network:
+    `earliest` arrival or fewest `transfers` by the timetable,
+    or the shortest `distance` by routes alone.
+    """
+
+    serializer_class = JourneyPlanSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    def list(self, request):
+        query = JourneyPlanQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        options = planner_settings()
+
+        network = get_network()
+        for station in (params["source"], params["destination"]):
+            if station not in network.stations:
+                raise NotFound(f"Station {station} does not exist.")
+
+        if params["mode"] == "distance":
+            plan = self.plan_by_distance(network, params)
+        else:
+            departure_time = params.get("departure_time") or timezone.now()
+            min_transfer = timedelta(
+                minutes=params.get("min_transfer", options["MIN_TRANSFER_MINUTES"])
+            )
+            if params["mode"] == "earliest":
+                connections = network.earliest_arrival(
+                    params["source"],
+                    params["destination"],
+                    departure_time,
+                    min_transfer,
+                )
+            else:
+                connections = network.fewest_transfers(
+                    params["source"],
+                    params["destination"],
+                    departure_time,
+                    min_transfer,
+                    options["MAX_TRANSFERS"],
+                )
+            plan = connections and self.plan_by_timetable(network, connections)
+
+        if not plan:
+            raise NotFound("No connection found.")
+
+        plan["mode"] = params["mode"]
+        plan["transfers"] = len(plan["legs"]) - 1
+        plan["distance"] = sum(leg["distance"] or 0 for leg in plan["legs"])
+        return Response(self.serialized(self.get_serializer(plan)))
+
+    @staticmethod
+    def plan_by_distance(network, params):
+        path = network.shortest_path(params["source"], params["destination"])
+        if path is None:
+            return None
+        legs = []
+        for route_id in path[1]:
+            source_id, destination_id, distance = network.routes[route_id]
+            legs.append(
+                {
+                    "journey": None,
+                    "route": route_id,
+                    "source": network.stations.get(source_id),
+                    "destination": network.stations.get(destination_id),
+                    "distance": distance,
+                    "departure_time": None,
+                    "arrival_time": None,
+                }
+            )
+        return {"departure_time": None, "arrival_time": None, "legs": legs}
+
+    @staticmethod
+    def plan_by_timetable(network, connections):
+        legs = [
+            {
+                "journey": connection.journey_id,
+                "route": connection.route_id,
+                "source": network.stations.get(connection.source_id),
+                "destination": network.stations.get(connection.destination_id),
+                "distance": network.routes[connection.route_id][2],
+                "departure_time": connection.departure_time,
+                "arrival_time": connection.arrival_time,
+            }
+            for connection in connections
+        ]
+        return {
+            "departure_time": legs[0]["departure_time"],
+            "arrival_time": legs[-1]["arrival_time"],
+            "legs": legs,
+        }
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from user.tokens import USER_CLAIMS
+
+DEFAULT_SETTINGS = {
+    # seconds a worker trusts the is_active and is_staff it read for a
+    # user, so a deactivated or demoted user is locked out at most this
+    # long after the change in other workers
+    "STATE_TIMEOUT": 30,
+}
+
+
+def authentication_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, "TOKEN_AUTHENTICATION", {})}
+
+
+class UserStates:
+    """
+    `(is_active, is_staff)` per user id, or None for a deleted user, read
+    from the database at most once per `STATE_TIMEOUT` in each process
+    """
+
+    # users kept before the expired ones are dropped
+    MAX_USERS = 10000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.states = {}
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            expires, state = self.states.get(user_id, (0, None))
+        if expires > now:
+            return state
+
+        state = (
+            get_user_model()
+            .objects.filter(pk=user_id)
+            .values_list("is_active", "is_staff")
+            .first()
+        )
+        with self.lock:
+            if len(self.states) >= self.MAX_USERS:
+                self.states = {
+                    user: entry for user, entry in self.states.items() if entry[0] > now
+                }
+            self.states[user_id] = (
+                now + authentication_settings()["STATE_TIMEOUT"],
+                state,
+            )
+        return state
+
+    def forget(self, user_id):
+        with self.lock:
+            self.states.pop(user_id, None)
+
+    def reset(self):
+        with self.lock:
+            self.states.clear()
+
+
+user_states = UserStates()
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication building safe method requests' users from the
+    token's signed claims instead of loading the user row. Only whether
+    the user is still active and staff is checked, against `user_states`.
+    Writes, and tokens without the claims or with an outdated `is_staff`,
+    get the user from the database as before.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS:
+            user = self.get_token_user(validated_token)
+            if user is not None:
+                return user, validated_token
+
+        return self.get_user(validated_token), validated_token
+
+    def get_token_user(self, validated_token):
+        claims = (api_settings.USER_ID_CLAIM, *USER_CLAIMS)
+        if any(claim not in validated_token for claim in claims):
+            return None
+
+        state = user_states.get(validated_token[api_settings.USER_ID_CLAIM])
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        is_active, is_staff = state
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if is_staff != validated_token["is_staff"]:
+            return None
+
+        return api_settings.TOKEN_USER_CLASS(validated_token)
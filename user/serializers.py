@@ -1,5 +1,10 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+)
+
+from user.tokens import RefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -28,3 +33,7 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    token_class = RefreshToken
@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from user.authentication import user_states
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user_state(sender, instance, **kwargs):
+    user_states.forget(instance.pk)
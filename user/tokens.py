@@ -0,0 +1,15 @@
+from rest_framework_simplejwt import tokens
+
+# user fields signed into every token, read back by ClaimsJWTAuthentication
+USER_CLAIMS = ("email", "is_staff")
+
+
+class RefreshToken(tokens.RefreshToken):
+    """Refresh token carrying `USER_CLAIMS`, copied into its access tokens"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token